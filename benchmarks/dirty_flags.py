@@ -0,0 +1,101 @@
+"""
+Runs the attribute writes of a combat tick on stats-like components, comparing the __setattr__ hook that looks up every assignment in _flags with the Field descriptors and the dirty mask.
+Run with luserver on PYTHONPATH: python benchmarks/dirty_flags.py
+"""
+import time
+
+from bitstream import c_bit, WriteStream
+import luserver.world
+from luserver.game_object import Field, Flag, FlagObject
+
+COMPONENTS = 200
+TICKS = 2000
+
+class LegacyFlagObject:
+	"""FlagObject before the dirty mask."""
+
+	def __init__(self):
+		self._flags = {}
+
+	def __setattr__(self, name, value):
+		self.attr_changed(name)
+		super().__setattr__(name, value)
+
+	def attr_changed(self, name):
+		if hasattr(self, "_flags") and name in self._flags:
+			setattr(self, self._flags[name], hasattr(self, name))
+			self.signal_serialize()
+
+	def flag(self, name, stream, additional_condition=False):
+		flag = getattr(self, name)
+		condition = flag or additional_condition
+		stream.write(c_bit(condition))
+		if flag:
+			setattr(self, name, False)
+		return condition
+
+class LegacyStats(LegacyFlagObject):
+	dirty = 0
+
+	def __init__(self):
+		super().__init__()
+		self._flags["life"] = "stats_flag"
+		self._flags["armor"] = "stats_flag"
+		self.life = 100
+		self.armor = 50
+		self.last_hit = 0
+		self.hits = 0
+		self.dirty = 0
+
+	def signal_serialize(self):
+		self.dirty += 1
+
+class Stats(FlagObject):
+	stats_flag = Flag()
+	life = Field(stats_flag)
+	armor = Field(stats_flag)
+	dirty = 0
+
+	def __init__(self):
+		self.life = 100
+		self.armor = 50
+		self.last_hit = 0
+		self.hits = 0
+		self.dirty = 0
+
+	def signal_serialize(self):
+		self.dirty += 1
+
+def tick(components, number):
+	"""Every component does its bookkeeping, every fourth takes a hit, then all are serialized."""
+	out = WriteStream()
+	for index, comp in enumerate(components):
+		comp.last_hit = number
+		comp.hits += 1
+		if (index + number) % 4 == 0:
+			comp.armor = (comp.armor + 7) % 50
+			comp.life = (comp.life + 13) % 100
+		if comp.flag("stats_flag", out):
+			out.write(c_bit(True))
+	return bytes(out)
+
+def run(cls):
+	components = [cls() for _ in range(COMPONENTS)]
+	start = time.perf_counter()
+	streams = [tick(components, number) for number in range(TICKS)]
+	return time.perf_counter() - start, streams, [(comp.life, comp.armor, comp.hits, comp.dirty) for comp in components]
+
+def main():
+	legacy_time, legacy_streams, legacy_state = run(LegacyStats)
+	new_time, new_streams, new_state = run(Stats)
+
+	assert legacy_streams == new_streams
+	assert legacy_state == new_state
+	writes = COMPONENTS * TICKS
+	print("%i components, %i ticks" % (COMPONENTS, TICKS))
+	print("__setattr__ hook: %.3f s, %.0f ns per component tick" % (legacy_time, legacy_time / writes * 1e9))
+	print("dirty mask:       %.3f s, %.0f ns per component tick" % (new_time, new_time / writes * 1e9))
+	print("speedup: %.1fx" % (legacy_time / new_time))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,124 @@
+"""
+Compares the compiled game message encoders with the previous per-call introspection and checks that both produce identical bytes.
+Run with luserver on PYTHONPATH: python benchmarks/game_message.py
+"""
+import inspect
+import re
+import timeit
+from types import SimpleNamespace
+
+from bitstream import c_bit, c_float, c_int64, c_ubyte, c_uint, c_uint64, c_ushort, Serializable
+from luserver.bitstream import WriteStream
+import luserver.world
+from luserver.game_object import c_int, E, GameObject, Mapping, OBJ_NONE, Player, Sequence
+from luserver.ldf import LDF, LDFDataType
+from luserver.messages import GameMessage, WorldClientMsg
+from luserver.math.quaternion import Quaternion
+from luserver.math.vector import Vector3
+from luserver.components.char import CharacterComponent
+from luserver.components.char.mission import CharMission
+from luserver.components.script import ScriptComponent
+from luserver.components.skill import SkillComponent
+
+ITERATIONS = 20000
+
+def legacy_serialize(out, type_, value):
+	if type_ == float:
+		out.write(c_float(value))
+	elif type_ == bytes:
+		out.write(value, length_type=c_uint)
+	elif type_ == str:
+		out.write(value, length_type=c_uint)
+	elif hasattr(type_, "__origin__") and type_.__origin__ is not None:
+		if type_.__origin__ == Sequence:
+			length_type, value_type = type_.__args__
+			out.write(length_type(len(value)))
+			for i in value:
+				legacy_serialize(out, value_type, i)
+		elif type_.__origin__ == Mapping:
+			length_type, key_type, value_type = type_.__args__
+			out.write(length_type(len(value)))
+			for k, v in value.items():
+				legacy_serialize(out, key_type, k)
+				legacy_serialize(out, value_type, v)
+		else:
+			raise TypeError(type_)
+	elif issubclass(type_, (c_int, c_int64, c_ubyte, c_uint, c_uint64)):
+		out.write(type_(value))
+	elif type_ == LDF:
+		ldf_text = value.to_str()
+		out.write(ldf_text, length_type=c_uint)
+		if ldf_text:
+			out.write(bytes(2))
+	elif issubclass(type_, GameObject) or issubclass(type_, Player):
+		if value is OBJ_NONE:
+			out.write(c_int64(0))
+		else:
+			out.write(c_int64(value.object_id))
+	elif inspect.isclass(type_) and issubclass(type_, Serializable):
+		type_.serialize(value, out)
+	else:
+		raise TypeError(type_)
+
+def legacy_encode(func, self, *args, **kwargs):
+	"""The encoding part of _send_game_message before encoders were compiled."""
+	game_message_id = GameMessage[re.sub("(^|_)(.)", lambda match: match.group(2).upper(), func.__name__)].value
+	out = WriteStream()
+	out.write_header(WorldClientMsg.GameMessage)
+	out.write(c_int64(self.object.object_id))
+	out.write(c_ushort(game_message_id))
+
+	signature = inspect.signature(func)
+	params = list(signature.parameters.values())[1:]
+	if params and params[0].name == "player":
+		params.pop(0)
+	elif "player" in kwargs:
+		del kwargs["player"]
+
+	bound_args = signature.bind(self, *args, **kwargs)
+	for param in params:
+		if param.annotation == bool:
+			value = bound_args.arguments.get(param.name, param.default)
+			assert value in (True, False)
+			out.write(c_bit(value))
+		else:
+			if param.default not in (param.empty, E):
+				is_not_default = param.name in bound_args.arguments and bound_args.arguments[param.name] != param.default
+				out.write(c_bit(is_not_default))
+				if not is_not_default:
+					continue
+			value = bound_args.arguments[param.name]
+			legacy_serialize(out, param.annotation, value)
+	return out
+
+def compiled_encode(wrapper, self, *args, **kwargs):
+	encoder = wrapper.encoder
+	if not encoder.has_player_param:
+		kwargs.pop("player", None)
+	return encoder.encode(self.object.object_id, encoder.bind(args, kwargs))
+
+def main():
+	obj = SimpleNamespace(object_id=1152921504606846977, lot=1)
+	other = SimpleNamespace(object_id=288300744895889662, lot=6010)
+	component = SimpleNamespace(object=obj)
+	ldf = LDF()
+	ldf.ldf_set("wave", LDFDataType.INT32, 3)
+
+	cases = [
+		(CharacterComponent.drop_client_loot, (), {"spawn_position": Vector3(1, 2, 3), "final_position": Vector3(4, 5, 6), "currency": 0, "item_template": 3039, "loot_id": 288300744895889663, "owner": obj, "source_obj": other}),
+		(ScriptComponent.script_network_var_update, (ldf,), {}),
+		(CharMission.notify_mission_task, (176,), {"task_mask": 2, "updates": [1.0, 2.0]}),
+		(SkillComponent.echo_start_skill, (), {"optional_originator_id": 0, "optional_target_id": other.object_id, "originator_rot": Quaternion(0, 0, 0, 0), "bitstream": b"\x01\x02\x03", "skill_id": 1, "ui_skill_handle": 7, "player": None}),
+	]
+
+	for wrapper, args, kwargs in cases:
+		legacy = bytes(legacy_encode(wrapper.__wrapped__, component, *args, **dict(kwargs)))
+		compiled = bytes(compiled_encode(wrapper, component, *args, **dict(kwargs)))
+		assert legacy == compiled, (wrapper.__name__, legacy, compiled)
+
+		legacy_time = timeit.timeit(lambda: legacy_encode(wrapper.__wrapped__, component, *args, **dict(kwargs)), number=ITERATIONS)
+		compiled_time = timeit.timeit(lambda: compiled_encode(wrapper, component, *args, **dict(kwargs)), number=ITERATIONS)
+		print("%-28s legacy %6.2f us  compiled %6.2f us  speedup %.1fx" % (wrapper.__name__, legacy_time/ITERATIONS*1e6, compiled_time/ITERATIONS*1e6, legacy_time/compiled_time))
+
+if __name__ == "__main__":
+	main()
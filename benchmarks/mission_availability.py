@@ -0,0 +1,73 @@
+"""
+Replays a character's full mission history against mission givers, comparing prereq checks that walk the prereqs on every interaction with the cached availability that is invalidated along the prereq dependency graph.
+Run with luserver on PYTHONPATH: python benchmarks/mission_availability.py
+"""
+import random
+import time
+from types import SimpleNamespace
+
+import luserver.world
+from luserver.components.char.mission import CharMission
+from luserver.components.mission import check_prereqs, evaluate_prereqs, MissionProgress, MissionState
+
+MISSION_COUNT = 1500
+NPC_COUNT = 150
+MISSIONS_PER_NPC = 10
+REWARDS = 0, 0, False, (), None, 0, 0, 0
+
+def gen_missions(rng):
+	"""Missions with prereqs in the format of the static table, each depending on earlier missions like the real mission chains."""
+	missions = {}
+	for mission_id in range(1, MISSION_COUNT+1):
+		prereqs = []
+		if mission_id > 1:
+			for _ in range(rng.randint(1, 2)):
+				prereqs.append(tuple(rng.randrange(max(1, mission_id-50), mission_id) for _ in range(rng.randint(1, 3))))
+		missions[mission_id] = REWARDS, tuple(prereqs), (), True, False, None
+	return missions
+
+def new_player():
+	player = SimpleNamespace(add_handlers=lambda source: None, char=SimpleNamespace())
+	player.char.mission = CharMission(player)
+	return player
+
+def replay(player, history, npcs, check):
+	"""Accept and complete the missions in order, interacting with every mission giver after each step. Returns the offered missions."""
+	char_mission = player.char.mission
+	offers = []
+	for mission_id in history:
+		# complete_mission also hands out rewards, which needs a full player, so the state changes are done directly
+		char_mission._store(mission_id, MissionProgress(mission_id, luserver.world.server.static.missions[mission_id]))
+		for npc_missions in npcs:
+			for npc_mission_id in npc_missions:
+				if npc_mission_id not in char_mission.missions and check(npc_mission_id, player):
+					offers.append(npc_mission_id)
+					break
+		char_mission.missions[mission_id].state = MissionState.Completed
+		char_mission._state_changed(mission_id)
+	return offers
+
+def main():
+	rng = random.Random(1)
+	missions = gen_missions(rng)
+	luserver.world._server = SimpleNamespace(static=SimpleNamespace(version=1, missions=missions))
+	npcs = [rng.sample(range(1, MISSION_COUNT+1), MISSIONS_PER_NPC) for _ in range(NPC_COUNT)]
+	history = sorted(missions)
+
+	start = time.perf_counter()
+	old_offers = replay(new_player(), history, npcs, evaluate_prereqs)
+	old_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	new_offers = replay(new_player(), history, npcs, check_prereqs)
+	new_time = time.perf_counter() - start
+
+	assert old_offers == new_offers
+	interactions = len(history) * NPC_COUNT
+	print("%i missions, %i mission givers, %i interactions" % (MISSION_COUNT, NPC_COUNT, interactions))
+	print("prereq walk: %.3f s, %.2f us per interaction" % (old_time, old_time / interactions * 1e6))
+	print("cached:      %.3f s, %.2f us per interaction" % (new_time, new_time / interactions * 1e6))
+	print("speedup: %.1fx" % (old_time / new_time))
+
+if __name__ == "__main__":
+	main()
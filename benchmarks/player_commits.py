@@ -0,0 +1,143 @@
+"""
+Simulates a minute of players moving around, taking hits and collecting loot with a commit every second, comparing characters that are registered as changed by every serialization and store their session state with characters whose physics and stats are kept in the session and stored at the autosave checkpoint.
+Reports the stored size of a character, the bytes written and the commit time.
+Run with luserver on PYTHONPATH: python benchmarks/player_commits.py
+"""
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+import transaction
+import ZODB
+import ZODB.FileStorage
+from persistent.list import PersistentList
+
+import luserver.world
+from luserver.game_object import Flag, Player, SessionField
+from luserver.components.component import Component
+from luserver.math.quaternion import Quaternion
+from luserver.math.vector import Vector3
+
+PLAYERS = 50
+SECONDS = 60
+UPDATES_PER_SECOND = 10
+AUTOSAVE_INTERVAL = 60
+
+class Physics(Component):
+	physics_data_flag = Flag()
+	position = SessionField(physics_data_flag)
+	rotation = SessionField(physics_data_flag)
+	velocity = SessionField(physics_data_flag)
+	on_ground = SessionField(physics_data_flag)
+
+	def serialize(self, out, is_creation):
+		pass
+
+class Stats(Component):
+	stats_flag = Flag()
+	life = SessionField(stats_flag)
+	armor = SessionField(stats_flag)
+	imagination = SessionField(stats_flag)
+	faction = SessionField(stats_flag)
+
+	def serialize(self, out, is_creation):
+		pass
+
+class Char:
+	pass
+
+class LegacyPlayer(Player):
+	"""Player before the split, every serialization registers the character."""
+	_volatile_attrs = frozenset()
+
+def make_player(cls, object_id, rng, in_session):
+	player = cls.__new__(cls)
+	physics = Physics.__new__(Physics)
+	physics.object = player
+	physics.position = Vector3(rng.uniform(-500, 500), 300, rng.uniform(-500, 500))
+	physics.rotation = Quaternion()
+	physics.velocity = Vector3()
+	physics.on_ground = True
+	stats = Stats.__new__(Stats)
+	stats.object = player
+	stats.life = 4
+	stats.armor = 6
+	stats.imagination = 6
+	stats.faction = 1
+	char = Char()
+	# statistics and appearance, in the shape of the character component
+	char.__dict__.update(("stat_%i" % index, rng.randrange(100000)) for index in range(40))
+	char.unlocked_emotes = PersistentList(range(20))
+	player.__dict__.update(lot=1, object_id=object_id, name="player%i" % object_id, _serialize_scheduled=False, physics=physics, stats=stats, char=char, components=[physics, stats, char])
+	if in_session:
+		session = {}
+	else:
+		# session state stored with the character
+		session = char.__dict__
+	session.update(dropped_loot={}, last_collisions=[])
+	return player, session
+
+def play(cls, path, in_session):
+	rng = random.Random(1)
+	db = ZODB.DB(ZODB.FileStorage.FileStorage(path))
+	conn = db.open()
+	player_data = {}
+	luserver.world._server = SimpleNamespace(player_data=player_data, dirty_objects=set())
+	players = []
+	for object_id in range(PLAYERS):
+		player, session = make_player(cls, object_id, rng, in_session)
+		player_data[player] = session
+		if in_session:
+			player._attach_session()
+		players.append(player)
+	conn.root()["players"] = PersistentList(players)
+	transaction.commit()
+	start_size = os.path.getsize(path)
+
+	commit_time = 0.0
+	commits = 0
+	for second in range(1, SECONDS+1):
+		for _ in range(UPDATES_PER_SECOND):
+			for player in players:
+				player.physics.position.x += rng.uniform(-1, 1)
+				player.physics.position.z += rng.uniform(-1, 1)
+				player.physics.attr_changed("position")
+				if rng.random() < 0.05:
+					player.stats.armor = (player.stats.armor + 1) % 7
+				session = player_data[player]
+				session["last_collisions"] = [rng.randrange(1000)] if rng.random() < 0.1 else []
+				if rng.random() < 0.02:
+					session["dropped_loot"][rng.randrange(1 << 40)] = rng.randrange(20000)
+			# world tick serializes the dirty players
+			for player in luserver.world._server.dirty_objects:
+				player._serialize_scheduled = False
+			luserver.world._server.dirty_objects.clear()
+		if cls is not LegacyPlayer and second % AUTOSAVE_INTERVAL == 0:
+			for player in players:
+				player.checkpoint()
+		start = time.perf_counter()
+		transaction.commit()
+		commit_time += time.perf_counter() - start
+		commits += 1
+
+	written = os.path.getsize(path) - start_size
+	record_size = len(db.storage.load(players[0]._p_oid)[0])
+	positions = [(player.physics.position.x, player.physics.position.z, player.stats.armor) for player in players]
+	conn.close()
+	db.close()
+	return record_size, written, commit_time / commits, positions
+
+def main():
+	with tempfile.TemporaryDirectory() as tmp:
+		old = play(LegacyPlayer, os.path.join(tmp, "old.fs"), False)
+		new = play(Player, os.path.join(tmp, "new.fs"), True)
+	assert old[3] == new[3]
+	print("%i players, %i s, %i position updates per second, commit every second, autosave every %i s" % (PLAYERS, SECONDS, UPDATES_PER_SECOND, AUTOSAVE_INTERVAL))
+	for label, (record_size, written, commit_time, _) in (("registered by serialization", old), ("session state", new)):
+		print("%-28s character %5i bytes, %8i bytes written, %.2f ms per commit" % (label+":", record_size, written, commit_time * 1000))
+	print("bytes written: %.1fx less, commit time: %.1fx faster" % (old[1] / new[1], old[2] / new[2]))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,118 @@
+"""
+Compares position update decoding with one read per float against the fixed-layout decoder, and reports packets per second on one core.
+Run with luserver on PYTHONPATH: python benchmarks/position_update.py
+"""
+import timeit
+
+from bitstream import c_bit, c_float, c_int64, ReadStream, WriteStream
+import luserver.world
+from luserver.math.quaternion import Quaternion
+from luserver.math.vector import Vector3
+from luserver.modules.general import apply_position_update, decode_position_update
+
+ITERATIONS = 50000
+
+class FakePhysics:
+	"""Stand-in for a controllable physics component without the game object machinery."""
+
+	def __init__(self):
+		self.position = Vector3()
+		self.rotation = Quaternion()
+		self.on_ground = True
+		self.unknown_bool = False
+		self.velocity = Vector3()
+		self.angular_velocity = 0, 0, 0
+		self.unknown_object_id = 0
+		self.unknown_float3 = 0, 0, 0
+		self.deeper_unknown_float3 = 0, 0, 0
+
+	def attr_changed(self, name):
+		pass
+
+def legacy_update(physics, vehicle, message):
+	"""The decoding part of _on_position_update before the fixed-layout decoder."""
+	physics.position.update(message.read(c_float), message.read(c_float), message.read(c_float))
+	physics.attr_changed("position")
+	physics.rotation.update(message.read(c_float), message.read(c_float), message.read(c_float), message.read(c_float))
+	physics.attr_changed("rotation")
+	physics.on_ground = message.read(c_bit)
+	physics.unknown_bool = message.read(c_bit)
+	if vehicle:
+		vehicle.position.update(physics.position)
+		vehicle.attr_changed("position")
+		vehicle.rotation.update(physics.rotation)
+		vehicle.attr_changed("rotation")
+		vehicle.on_ground = physics.on_ground
+		vehicle.unknown_bool = physics.unknown_bool
+	if message.read(c_bit):
+		physics.velocity.update(message.read(c_float), message.read(c_float), message.read(c_float))
+		physics.attr_changed("velocity")
+		if vehicle:
+			vehicle.velocity.update(physics.velocity)
+			vehicle.attr_changed("velocity")
+	if message.read(c_bit):
+		physics.angular_velocity = message.read(c_float), message.read(c_float), message.read(c_float)
+		if vehicle:
+			vehicle.angular_velocity = physics.angular_velocity
+	if message.read(c_bit):
+		physics.unknown_object_id = message.read(c_int64)
+		physics.unknown_float3 = message.read(c_float), message.read(c_float), message.read(c_float)
+		if vehicle:
+			vehicle.unknown_object_id = physics.unknown_object_id
+			vehicle.unknown_float3 = physics.unknown_float3
+		if message.read(c_bit):
+			physics.deeper_unknown_float3 = message.read(c_float), message.read(c_float), message.read(c_float)
+			if vehicle:
+				vehicle.deeper_unknown_float3 = physics.deeper_unknown_float3
+
+def fast_update(physics, vehicle, message):
+	update = decode_position_update(message)
+	apply_position_update(physics, update)
+	if vehicle:
+		apply_position_update(vehicle, update)
+
+def make_packet(full):
+	out = WriteStream()
+	for value in (12.5, 300.25, -1044.0, 0.0, 0.7071, 0.0, 0.7071):
+		out.write(c_float(value))
+	out.write(c_bit(True))
+	out.write(c_bit(False))
+	out.write(c_bit(True))
+	for value in (1.0, -2.0, 3.5):
+		out.write(c_float(value))
+	out.write(c_bit(full))
+	if full:
+		for value in (0.1, 0.2, 0.3):
+			out.write(c_float(value))
+	out.write(c_bit(full))
+	if full:
+		out.write(c_int64(70368744177664))
+		for value in (4.0, 5.0, 6.0):
+			out.write(c_float(value))
+		out.write(c_bit(True))
+		for value in (7.0, 8.0, 9.0):
+			out.write(c_float(value))
+	return bytes(out)
+
+def state(physics):
+	return (physics.position, physics.rotation, physics.on_ground, physics.unknown_bool, physics.velocity, tuple(physics.angular_velocity), physics.unknown_object_id, tuple(physics.unknown_float3), tuple(physics.deeper_unknown_float3))
+
+def main():
+	for name, full in (("walking", False), ("full", True)):
+		data = make_packet(full)
+		for with_vehicle in (False, True):
+			legacy_physics, legacy_vehicle = FakePhysics(), FakePhysics() if with_vehicle else None
+			fast_physics, fast_vehicle = FakePhysics(), FakePhysics() if with_vehicle else None
+			legacy_update(legacy_physics, legacy_vehicle, ReadStream(data))
+			fast_update(fast_physics, fast_vehicle, ReadStream(data))
+			assert state(legacy_physics) == state(fast_physics)
+			if with_vehicle:
+				assert state(legacy_vehicle) == state(fast_vehicle)
+
+			legacy_time = timeit.timeit(lambda: legacy_update(legacy_physics, legacy_vehicle, ReadStream(data)), number=ITERATIONS)
+			fast_time = timeit.timeit(lambda: fast_update(fast_physics, fast_vehicle, ReadStream(data)), number=ITERATIONS)
+			label = name + (" + vehicle" if with_vehicle else "")
+			print("%-16s legacy %8.0f packets/s  fast %8.0f packets/s  speedup %.1fx" % (label, ITERATIONS/legacy_time, ITERATIONS/fast_time, legacy_time/fast_time))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,94 @@
+"""
+Casts NPC skills in a survival-sized fight, comparing serializing the behavior tree on every cast with the cached payloads that only have the target and handles patched in.
+Run with luserver on PYTHONPATH: python benchmarks/skill_payloads.py
+"""
+import itertools
+import random
+import time
+from types import SimpleNamespace
+
+import luserver.world
+from luserver.components.behaviors import And, AttackDelay, BasicAttack, Interrupt, Knockback, NPCCombatSkill, PayloadWriter, ProjectileAttack, skill_payloads, Stun, TacArc
+
+NPC_COUNT = 40
+NPC_LOTS = 8
+PLAYER_COUNT = 4
+SECONDS = 120
+PROJECTILE_LOT = 100
+PROJECTILE_SKILL = 1000
+
+def gen_skills():
+	"""Skills in the shape of the stock enemy melee, charged and ranged attacks."""
+	ids = itertools.count(1)
+	def hit():
+		return And(next(ids), [BasicAttack(next(ids), None), Knockback(next(ids)), Interrupt(next(ids), False), Stun(next(ids))])
+	melee = NPCCombatSkill(next(ids), TacArc(next(ids), hit(), None, None, True, False), 0, 5)
+	charged = NPCCombatSkill(next(ids), AttackDelay(next(ids), TacArc(next(ids), hit(), None, None, True, False), 1), 0, 5)
+	ranged = NPCCombatSkill(next(ids), ProjectileAttack(next(ids), PROJECTILE_LOT, 3), 0, 20)
+	projectile = BasicAttack(next(ids), None)
+	return [melee, charged, ranged], projectile
+
+class Skill:
+	def __init__(self, caster, serialize):
+		self.caster = caster
+		self.serialize = serialize
+		self.last_ui_handle = 0
+		self.sent = []
+
+	def cast_sync_skill(self, delay, behavior, target):
+		handle = self.last_ui_handle
+		self.last_ui_handle += 1
+		self.sent.append(self.serialize((behavior,), self.caster, target))
+		return handle
+
+	def cast_projectile(self, proj_behavs, target):
+		self.sent.append(self.serialize(proj_behavs, self.caster, target))
+		return 1 << 58 | len(self.sent)
+
+def tree_walk(behaviors, caster, target):
+	writer = PayloadWriter()
+	for behavior in behaviors:
+		behavior.serialize(writer, caster, target, 0)
+	return bytes(writer)
+
+def fight(skills, serialize):
+	"""Every NPC casts all its skills at a player each second, like BaseCombatAIComponent. Returns all sent payloads."""
+	rng = random.Random(1)
+	players = [SimpleNamespace(lot=1, object_id=1 << 60 | i) for i in range(PLAYER_COUNT)]
+	npcs = []
+	for i in range(NPC_COUNT):
+		npc = SimpleNamespace(lot=10000 + i % NPC_LOTS, object_id=1 << 58 | i)
+		npc.skill = Skill(npc, serialize)
+		npcs.append(npc)
+	sent = []
+	for _ in range(SECONDS):
+		for npc in npcs:
+			target = rng.choice(players)
+			for skill in skills:
+				sent.append(serialize((skill,), npc, target))
+	for npc in npcs:
+		sent.extend(npc.skill.sent)
+	return sent
+
+def main():
+	skills, projectile = gen_skills()
+	static = SimpleNamespace(version=1, object_skills={PROJECTILE_LOT: [(PROJECTILE_SKILL, 0)]}, skill_behavior={PROJECTILE_SKILL: (projectile, 0)})
+	luserver.world._server = SimpleNamespace(static=static)
+
+	start = time.perf_counter()
+	old_sent = fight(skills, tree_walk)
+	old_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	new_sent = fight(skills, skill_payloads.payload)
+	new_time = time.perf_counter() - start
+
+	assert old_sent == new_sent
+	casts = NPC_COUNT * SECONDS * len(skills)
+	print("%i NPCs, %i players, %i casts, %i payloads" % (NPC_COUNT, PLAYER_COUNT, casts, len(new_sent)))
+	print("tree walk: %.3f s, %.0f casts/s" % (old_time, casts / old_time))
+	print("cached:    %.3f s, %.0f casts/s" % (new_time, casts / new_time))
+	print("speedup: %.1fx" % (old_time / new_time))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,57 @@
+"""
+Resolves the components of the objects spawned by survival waves, comparing resolving the components registry on every spawn with the cached per-LOT blueprints.
+Run with luserver on PYTHONPATH: python benchmarks/spawn_blueprints.py
+"""
+import random
+import time
+from types import SimpleNamespace
+
+import luserver.world
+from luserver.game_object import _blueprint, _build_blueprint
+
+SPAWNS = 100000
+SCRIPTS = {1: "general.binoculars", 2: "general.death_trigger"}
+
+# component lists in the shape of the registry entries of enemies, smashables, loot and projectiles
+COMPONENTS_REGISTRY = {
+	12000: ((1, 1), (2, 2), (7, 3), (9, 4), (60, 5), (5, 1), (17, 6), (108, 7)),
+	12001: ((1, 1), (2, 2), (7, 8), (9, 9), (60, 10), (17, 11)),
+	12002: ((3, 1), (2, 2), (7, 12), (5, 2)),
+	12003: ((3, 2), (2, 3), (11, 4), (23, 5)),
+	12004: ((3, 3), (2, 4)),
+	12005: ((40, 1), (2, 5), (9, 6), (5, None)),
+}
+SET_VARS = {}, {"custom_script": "general.binoculars"}, {"render_disabled": True}, {"marked_as_phantom": True}, {"trigger_events": ()}
+
+def spawn_wave(resolve):
+	"""Resolve the components of each spawn of a wave. Returns the resolved components."""
+	rng = random.Random(1)
+	lots = list(COMPONENTS_REGISTRY)
+	resolved = []
+	for _ in range(SPAWNS):
+		lot = rng.choice(lots)
+		# most spawns have no modifiers
+		set_vars = rng.choice(SET_VARS) if rng.random() < 0.2 else SET_VARS[0]
+		resolved.append(resolve(lot, set_vars))
+	return resolved
+
+def main():
+	static = SimpleNamespace(version=1, components_registry=COMPONENTS_REGISTRY, script_component=SCRIPTS)
+	luserver.world._server = SimpleNamespace(static=static)
+
+	start = time.perf_counter()
+	old_resolved = spawn_wave(_build_blueprint)
+	old_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	new_resolved = spawn_wave(_blueprint)
+	new_time = time.perf_counter() - start
+
+	assert old_resolved == new_resolved
+	print("%i spawns of %i LOTs" % (SPAWNS, len(COMPONENTS_REGISTRY)))
+	print("registry: %.3f s, %.0f spawns/s" % (old_time, SPAWNS / old_time))
+	print("blueprint: %.3f s, %.0f spawns/s" % (new_time, SPAWNS / new_time))
+	print("speedup: %.1fx" % (old_time / new_time))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,84 @@
+"""
+Scans a zone's objects for targets like combat AI does, comparing the special object isinstance checks that look up each annotated attribute with the capability bitmask.
+Run with luserver on PYTHONPATH: python benchmarks/special_object_checks.py
+"""
+import random
+import time
+
+import luserver.world
+from luserver.game_object import _SpecialObjectMeta, DestructibleObject, GameObject, PhysicsObject, Player, ScriptObject, SpawnerObject
+
+AI_COUNT = 40
+TICKS = 20
+# (count, component attributes) of the objects in the zone
+ZONE = (
+	(4, ("physics", "render", "stats", "destructible", "char", "inventory", "skill")),
+	(60, ("physics", "render", "stats", "destructible", "skill")),
+	(150, ("physics", "render")),
+	(60, ("physics", "render", "script")),
+	(20, ("spawner",)),
+)
+
+def old_instancecheck(self, instance):
+	if not isinstance(instance, GameObject):
+		return False
+	for attr in self.__annotations__:
+			if not hasattr(instance, attr):
+				return False
+	return True
+
+def gen_zone():
+	objects = []
+	for count, attrs in ZONE:
+		for _ in range(count):
+			cls = Player if "char" in attrs else GameObject
+			obj = cls.__new__(cls)
+			for attr in attrs:
+				obj.__dict__[attr] = object()
+			objects.append(obj)
+	random.Random(1).shuffle(objects)
+	return objects
+
+def scan(objects):
+	"""Every AI checks every object each tick. Returns the number of matches per check."""
+	counts = [0, 0, 0, 0, 0]
+	for _ in range(TICKS):
+		for _ in range(AI_COUNT):
+			for obj in objects:
+				if isinstance(obj, DestructibleObject):
+					counts[0] += 1
+				if isinstance(obj, Player):
+					counts[1] += 1
+				if isinstance(obj, PhysicsObject):
+					counts[2] += 1
+				if isinstance(obj, ScriptObject):
+					counts[3] += 1
+				if isinstance(obj, SpawnerObject):
+					counts[4] += 1
+	return counts
+
+def main():
+	objects = gen_zone()
+	new_instancecheck = _SpecialObjectMeta.__instancecheck__
+
+	_SpecialObjectMeta.__instancecheck__ = old_instancecheck
+	try:
+		start = time.perf_counter()
+		old_counts = scan(objects)
+		old_time = time.perf_counter() - start
+	finally:
+		_SpecialObjectMeta.__instancecheck__ = new_instancecheck
+
+	start = time.perf_counter()
+	new_counts = scan(objects)
+	new_time = time.perf_counter() - start
+
+	assert old_counts == new_counts
+	checks = TICKS * AI_COUNT * len(objects) * len(old_counts)
+	print("%i objects, %i AIs, %i ticks, %i checks" % (len(objects), AI_COUNT, TICKS, checks))
+	print("annotations: %.3f s, %.0f ns per check" % (old_time, old_time / checks * 1e9))
+	print("bitmask:     %.3f s, %.0f ns per check" % (new_time, new_time / checks * 1e9))
+	print("speedup: %.1fx" % (old_time / new_time))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+class CommitStats:
+	"""Latency, size and conflict counts of the commits of an instance."""
+
+	def __init__(self) -> None:
+		self.reset()
+
+	def reset(self) -> None:
+		self.commits = 0
+		self.requests = 0
+		self.conflicts = 0
+		self.total_latency = 0.0
+		self.max_latency = 0.0
+		self.total_objects = 0
+		self.max_objects = 0
+
+	def record(self, latency: float, objects: int, conflict: bool) -> None:
+		self.commits += 1
+		self.total_latency += latency
+		self.max_latency = max(self.max_latency, latency)
+		self.total_objects += objects
+		self.max_objects = max(self.max_objects, objects)
+		if conflict:
+			self.conflicts += 1
+
+	def __str__(self) -> str:
+		if self.commits == 0:
+			return "No commits recorded, %i requests pending" % self.requests
+		return "%i commits for %i requests, latency avg %.2f ms max %.2f ms, objects avg %.1f max %i, %i conflicts" % (self.commits, self.requests, self.total_latency/self.commits*1000, self.max_latency*1000, self.total_objects/self.commits, self.max_objects, self.conflicts)
+
+class CommitScheduler:
+	"""
+	Coalesces commit requests into batches, so that non-critical changes don't each cause a round trip to the database.
+	A requested commit happens at most max_delay seconds later, or at the next loop iteration if max_pending requests have piled up.
+	Critical sections that need their changes to be visible to other instances right away should call flush instead.
+	flush raises CommitConflict if the commit was aborted, so that critical sections know their changes weren't stored. Conflicts of requested commits are only counted.
+	"""
+
+	def __init__(self, commit: Callable[[], int], max_delay: float=1.0, max_pending: int=100):
+		"""commit does the actual commit and returns the number of objects it wrote."""
+		self._commit = commit
+		self.max_delay = max_delay
+		self.max_pending = max_pending
+		self.stats = CommitStats()
+		self._pending = 0
+		self._handle: Optional[asyncio.Handle] = None
+
+	def request(self) -> None:
+		self._pending += 1
+		self.stats.requests += 1
+		if self._pending >= self.max_pending:
+			if self._handle is not None:
+				self._handle.cancel()
+			self._handle = asyncio.get_event_loop().call_soon(self._flush_requested)
+		elif self._handle is None:
+			self._handle = asyncio.get_event_loop().call_later(self.max_delay, self._flush_requested)
+
+	def _flush_requested(self) -> None:
+		try:
+			self.flush()
+		except CommitConflict:
+			# already logged by the commit function, nobody is waiting for this commit
+			pass
+
+	def flush(self) -> None:
+		"""Commit now, including all pending requests. Raises CommitConflict if the commit was aborted."""
+		if self._handle is not None:
+			self._handle.cancel()
+			self._handle = None
+		self._pending = 0
+		start = time.perf_counter()
+		try:
+			objects = self._commit()
+		except CommitConflict as e:
+			self.stats.record(time.perf_counter() - start, e.objects, True)
+			raise
+		self.stats.record(time.perf_counter() - start, objects, False)
+
+class CommitConflict(Exception):
+	"""Raised by the commit function if the commit was aborted because of a conflict."""
+
+	def __init__(self, objects: int):
+		super().__init__()
+		self.objects = objects
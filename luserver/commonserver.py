@@ -22,8 +22,12 @@ import os
 import subprocess
 from abc import ABC, abstractmethod
 from ssl import SSLContext
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 
+from BTrees.IOBTree import IOBTree
+from BTrees.OOBTree import OOBTree
+from persistent.mapping import PersistentMapping
 from ZODB.Connection import Connection
 
 from bitstream import c_ubyte, c_uint, c_ushort, ReadStream
@@ -32,10 +36,13 @@ from pyraknet.transports.abc import Connection, ConnectionType
 from .auth import Account
 from .bitstream import WriteStream
 if TYPE_CHECKING:
-	from .game_object import ObjectID, GameObject
+	from .game_object import ObjectID, GameObject, Player
 	from .components.behaviors import Behavior
+	from .ids import IDCounter
 from .messages import GeneralMsg, MessageType, WorldServerMsg
 from .server import Server as _Server
+from .loot import LootMatrix, LootSampler
+from .snapshot import Snapshot
 from .math.vector import Vector3
 from .math.quaternion import Quaternion
 
@@ -48,16 +55,13 @@ class WorldData:
 		self.paths = paths
 		self.spawnpoint = spawnpoint
 
-class ServerDB:
-	accounts: Dict[str, Account]
+class StaticDB:
+	"""Read-only tables generated by runtime/db/init.py."""
 	activities: Dict[int, Tuple[int]]
 	activity_rewards: Dict[int, Sequence[Tuple[int, Tuple[Optional[int], Optional[int], Optional[int]]]]]
 	behavior: Dict[int, Any]
-	config: Dict[str, object]
 	colors: Dict[int, bool]
 	components_registry: Dict[int, Sequence[Tuple[int, int]]]
-	current_clone_id: int
-	current_instance_id: int
 	destructible_component: Dict[int, Tuple[int, Tuple[Optional[int], Optional[int], Optional[int]], int, Optional[int], int, bool]]
 	inventory_component: Dict[int, Sequence[Tuple[int, bool]]]
 	item_component: Dict[int, Tuple[int, int, int, Sequence[int]]]
@@ -74,15 +78,85 @@ class ServerDB:
 	object_skills: Dict[int, Sequence[Tuple[int, int]]]
 	package_component: Dict[int, LootTableEntry]
 	property_template: Sequence[Tuple[float, float, float]]
-	properties: Dict[int, Dict[int, Dict[int, Tuple[int, Vector3, Quaternion]]]]
 	rebuild_component: Dict[int, Tuple[float, float, float, int, int]]
 	script_component: Dict[int, str]
-	servers: Dict[Address, Tuple[int, int, int]]
 	skill_behavior: Dict[int, Tuple["Behavior", int]]
 	vendor_component: Dict[int, LootTableEntry]
-	world_data: Dict[int, WorldData]
 	world_info: Dict[int, Tuple[str, int]]
 
+class ServerDB(StaticDB):
+	accounts: Dict[str, Account]
+	characters_by_name: Dict[str, "Player"]
+	config: Dict[str, object]
+	current_clone_id: "IDCounter"
+	current_instance_id: "IDCounter"
+	properties: Dict[int, Dict[int, Dict[int, Tuple[int, Vector3, Quaternion]]]]
+	servers: Dict[Address, Tuple[int, int, int]]
+	# bumped by runtime/db/init.py whenever it regenerates the tables of StaticDB
+	static_version: int
+	world_data: Dict[int, WorldData]
+
+_MAPPINGS = dict, IOBTree, OOBTree, PersistentMapping
+
+def _freeze(value: Any) -> Any:
+	if isinstance(value, _MAPPINGS):
+		return MappingProxyType({key: _freeze(val) for key, val in value.items()})
+	if isinstance(value, (list, tuple)):
+		return tuple(_freeze(item) for item in value)
+	return value
+
+class StaticCache(StaticDB):
+	"""
+	Snapshot of the read-only tables as plain frozen Python structures.
+	Hot paths read from this instead of the DB, where each lookup can miss the ZEO client cache and cost a round trip.
+	If runtime/db/init.py has written a memory-mapped snapshot file of the same version, the tables and world data are read from it instead, so that instances on the same machine share them.
+	"""
+	world_data: Dict[int, WorldData]
+
+	def __init__(self, snapshot_path: Optional[str]=None):
+		self.version: Optional[int] = None
+		self.snapshot_path = snapshot_path
+		self._snapshot: Optional[Snapshot] = None
+		self._loot_samplers: Dict[LootMatrix, LootSampler] = {}
+
+	def refresh(self, db: ServerDB) -> bool:
+		"""Rebuild the snapshot if the tables in the DB have been regenerated since the last refresh."""
+		version = getattr(db, "static_version", 0)
+		if version == self.version:
+			return False
+		self._snapshot = self._open_snapshot(version)
+		for name in StaticDB.__annotations__:
+			if self._snapshot is not None and name in self._snapshot:
+				setattr(self, name, self._snapshot.table(name, _freeze))
+			elif hasattr(db, name):
+				setattr(self, name, _freeze(getattr(db, name)))
+		if self._snapshot is not None and "world_data" in self._snapshot:
+			self.world_data = self._snapshot.table("world_data")
+		else:
+			self.world_data = db.world_data
+		self._loot_samplers.clear()
+		self.version = version
+		log.info("Loaded static tables version %i from %s", version, "snapshot" if self._snapshot is not None else "DB")
+		return True
+
+	def loot_sampler(self, loot_matrix: LootMatrix) -> LootSampler:
+		if loot_matrix not in self._loot_samplers:
+			self._loot_samplers[loot_matrix] = LootSampler(loot_matrix, self.loot_table)
+		return self._loot_samplers[loot_matrix]
+
+	def _open_snapshot(self, version: int) -> Optional[Snapshot]:
+		if self.snapshot_path is None or not os.path.exists(self.snapshot_path):
+			return None
+		try:
+			snapshot = Snapshot(self.snapshot_path)
+		except (OSError, ValueError) as e:
+			log.warning("Can't use static data snapshot: %s", e)
+			return None
+		if snapshot.version != version:
+			log.warning("Static data snapshot has version %i, but the DB has version %i, rerun init to update it", snapshot.version, version)
+			return None
+		return snapshot
+
 log = logging.getLogger(__name__)
 
 class Server(_Server, ABC):
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from bitstream import c_bit, WriteStream
-from ..game_object import CallbackID, Config, GameObject, Player, StatsObject
+from ..game_object import CallbackID, Config, Field, Flag, GameObject, Player
 from ..world import server
 from ..math.quaternion import Quaternion
 from .behaviors import NPCCombatSkill
@@ -10,10 +10,12 @@ from .component import Component
 UPDATE_INTERVAL = 1 # todo: make interval skill-dependent
 
 class BaseCombatAIComponent(Component):
+	ai_flag = Flag()
+	target = Field(ai_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.ai = self
-		self._flags["target"] = "ai_flag"
 		self.skill_range = 7
 		self.target = None
 		self._enabled = False
@@ -23,7 +25,7 @@ class BaseCombatAIComponent(Component):
 		if not hasattr(self.object, "skill"):
 			return
 		if self.object.skill.skills:
-			behavior = server.db.skill_behavior[self.object.skill.skills[0]][0]
+			behavior = server.static.skill_behavior[self.object.skill.skills[0]][0]
 			assert isinstance(behavior, NPCCombatSkill)
 			self.skill_range = min(behavior.max_range, 10)
 		self.object.physics.proximity_radius(self.skill_range)
@@ -58,16 +60,8 @@ class BaseCombatAIComponent(Component):
 
 	def _update(self) -> None:
 		# todo: move some targeting logic to TacArc
-		self.target = None
-		enemy_factions = server.db.factions.get(self.object.stats.faction, ())
 		# todo: make distance skill-dependent
-		nearest_dist = self.skill_range**2 # starting distance is maximum distance
-		for obj in server.game_objects.values():
-			if isinstance(obj, StatsObject) and obj.stats.faction in enemy_factions:
-				dist = self.object.physics.position.sq_distance(obj.physics.position)
-				if dist < nearest_dist:
-					self.target = obj
-					nearest_dist = dist
+		self.target = server.faction_index.nearest_enemy(self.object, self.skill_range)
 		if self.target is not None:
 			pos_diff = self.target.physics.position - self.object.physics.position
 			pos_diff.y = 0
@@ -1,6 +1,8 @@
 import logging
 import pprint
-from typing import Iterable, Optional, Sequence, Tuple
+import struct
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from bitstream import c_bit, c_float, c_int64, c_ubyte, c_uint, c_ushort, ReadStream, WriteStream
 from ..game_object import GameObject
@@ -9,43 +11,128 @@ from ..math.vector import Vector3
 
 log = logging.getLogger("luserver.components.skill")
 
+Deserializer = Callable[[ReadStream, GameObject, GameObject], Any]
+SlotValue = Callable[[GameObject, GameObject], int]
+
+_BITS = {c_bit: 1, c_ubyte: 8, c_ushort: 16, c_uint: 32, c_float: 32, c_int64: 64}
+_SLOT_FORMATS = {c_ubyte: "<B", c_ushort: "<H", c_uint: "<I", c_int64: "<q"}
+
+def _no_log(*args: Any) -> None:
+	pass
+
+def _target_id(caster: GameObject, target: GameObject) -> int:
+	return target.object_id
+
+class PayloadTemplate:
+	"""
+	Serialized behavior payload with slots for the values that change between casts.
+	The slots are zeroed in the data and are patched in by bit offset, relying on the bitstream writing bits MSB first and values little endian.
+	"""
+
+	def __init__(self, data: bytes, slots: Sequence[Tuple[int, type, SlotValue]]):
+		self.data = data
+		self._data_int = int.from_bytes(data, "big")
+		total_bits = len(data)*8
+		self._slots = tuple((total_bits - offset - _BITS[type_], _SLOT_FORMATS[type_], value) for offset, type_, value in slots)
+
+	def render(self, caster: GameObject, target: GameObject) -> bytes:
+		if not self._slots:
+			return self.data
+		payload = self._data_int
+		for shift, format, value in self._slots:
+			payload |= int.from_bytes(struct.pack(format, value(caster, target)), "big") << shift
+		return payload.to_bytes(len(self.data), "big")
+
+class PayloadWriter:
+	"""
+	Stream that behaviors are serialized to.
+	When recording, values written with write_slot are left as zeroes and their positions are remembered, so that the payload can be reused as a PayloadTemplate.
+	"""
+
+	def __init__(self, record: bool=False):
+		self.stream = WriteStream()
+		self.recording = record
+		self.cacheable = record
+		self._bits = 0
+		self._slots: List[Tuple[int, type, SlotValue]] = []
+
+	def __bytes__(self) -> bytes:
+		return bytes(self.stream)
+
+	def write(self, value: Any) -> None:
+		self.stream.write(value)
+		if self.cacheable:
+			if type(value) in _BITS:
+				self._bits += _BITS[type(value)]
+			else:
+				self.cacheable = False
+
+	def align_write(self) -> None:
+		self.stream.align_write()
+		self._bits += -self._bits % 8
+
+	def write_slot(self, type_: type, value: SlotValue, caster: GameObject, target: GameObject) -> None:
+		"""
+		Write a value that changes between casts, like the target's object ID or a handle.
+		When recording, value isn't called until the template is rendered, and then with the caster and target of the cast, so it may have side effects.
+		"""
+		if not self.recording:
+			self.write(type_(value(caster, target)))
+			return
+		if type_ in _SLOT_FORMATS:
+			self._slots.append((self._bits, type_, value))
+		else:
+			self.cacheable = False
+		self.write(type_(0))
+
+	def template(self) -> Optional[PayloadTemplate]:
+		if not self.cacheable:
+			return None
+		return PayloadTemplate(bytes(self.stream), self._slots)
+
 class Behavior:
 	def __init__(self, id: int):
 		self.id = id
 
-	def serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
-		log.debug("  " * level + type(self).__name__ + " %i", self.id)
+	def serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
+		if log.isEnabledFor(logging.DEBUG):
+			log.debug("%s%s %i", "  " * level, type(self).__name__, self.id)
 		self._serialize(bitstream, caster, target, level)
 
-	def deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		log.debug("  " * level + type(self).__name__ + " %i", self.id)
-		if not isinstance(self, (DummyBehavior, BasicAttack, TacArc, And, Heal, MovementSwitch, AreaOfEffect, Imagination, TargetCaster, Stun, Duration, Knockback, AttackDelay, RepairArmor, Switch, SkillCastFailed, Chain, ForceMovement, ChargeUp, SwitchMultiple, Start, NPCCombatSkill, AirMovement)):
-			log.debug(pprint.pformat(vars(self), indent=level))
-		self._deserialize(bitstream, caster, target, level)
+	def deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject) -> Any:
+		"""Run the compiled form of this behavior, see BehaviorCompiler."""
+		return behavior_compiler.compile(self)(bitstream, caster, target)
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		raise NotImplementedError
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		raise NotImplementedError
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		"""Return a function that reads this behavior from a bitstream and applies it. Child behaviors are compiled with c.compile, and logging goes through c.debug, which only logs when the skill is traced."""
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			raise NotImplementedError
+		return deserialize
 
 class DummyBehavior(Behavior):
 	def __init__(self, id: int, template_id: int):
 		super().__init__(id)
 		self.template_id = template_id
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		log.debug("Template %i not implemented", self.template_id)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		log.debug("Template %i not implemented", self.template_id)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		template_id = self.template_id
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			debug("Template %i not implemented", template_id)
+		return deserialize
 
 class BasicAttack(Behavior):
 	def __init__(self, id: int, on_success: Optional[Behavior]):
 		super().__init__(id)
 		self.on_success = on_success
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		bitstream.align_write()
 		bitstream.write(c_ushort(0))
 		bitstream.write(c_bit(False))
@@ -61,26 +148,30 @@ class BasicAttack(Behavior):
 		if self.on_success is not None:
 			self.on_success.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		bitstream.align_read()
-		bitstream.read(c_ushort) # "padding", unused
-		if target == caster:
-			return
-		assert not bitstream.read(c_bit)
-		assert not bitstream.read(c_bit)
-		bitstream.read(c_bit) # usually False, but is True when using whirlwind scythe offhand skill (todo: investigate)
-		log.debug(bitstream.read(c_uint))
-		damage = bitstream.read(c_uint)
-		log.debug(damage)
-		log.debug("AoE? %s", bitstream.read(c_bit))
-		enemy_type = bitstream.read(c_ubyte) # ?
-		if enemy_type != 1:
-			log.debug(enemy_type)
-		log.debug(target)
-		if target is not None:
-			target.destructible.deal_damage(damage, caster)
-		if self.on_success is not None:
-			self.on_success.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		on_success = c.compile(self.on_success)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			bitstream.align_read()
+			bitstream.read(c_ushort) # "padding", unused
+			if target == caster:
+				return
+			assert not bitstream.read(c_bit)
+			assert not bitstream.read(c_bit)
+			bitstream.read(c_bit) # usually False, but is True when using whirlwind scythe offhand skill (todo: investigate)
+			debug(bitstream.read(c_uint))
+			damage = bitstream.read(c_uint)
+			debug(damage)
+			debug("AoE? %s", bitstream.read(c_bit))
+			enemy_type = bitstream.read(c_ubyte) # ?
+			if enemy_type != 1:
+				debug(enemy_type)
+			debug(target)
+			if target is not None:
+				target.destructible.deal_damage(damage, caster)
+			if on_success is not None:
+				on_success(bitstream, caster, target)
+		return deserialize
 
 class TacArc(Behavior):
 	def __init__(self, id: int, action: Optional[Behavior], blocked_action: Optional[Behavior], miss_action: Optional[Behavior], check_env: bool, use_picked_target: bool):
@@ -91,71 +182,79 @@ class TacArc(Behavior):
 		self.check_env = check_env
 		self.use_picked_target = use_picked_target
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		is_hit = True
 		bitstream.write(c_bit(is_hit))
 		if self.check_env:
 			is_blocked = False
 			bitstream.write(c_bit(is_blocked))
-		targets = [target]
-		bitstream.write(c_uint(len(targets)))
-		for target in targets:
-			bitstream.write(c_int64(target.object_id))
-		for target in targets:
-			log.debug("Target %s", target)
-			self.action.serialize(bitstream, caster, target, level+1)
+		bitstream.write(c_uint(1)) # number of targets
+		bitstream.write_slot(c_int64, _target_id, caster, target)
+		log.debug("Target %s", target)
+		self.action.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		if self.use_picked_target and caster.skill.picked_target_id != 0 and caster.skill.picked_target_id in server.game_objects:
-			target = server.game_objects[caster.skill.picked_target_id]
-			# todo: there seems to be a skill where this doesn't work and where the rest of the code should be executed as if the following lines weren't there?
-			log.debug("using picked target, not completely working")
-			self.action.deserialize(bitstream, caster, target, level+1)
-			return
-			# end of lines
-		if bitstream.read(c_bit): # is hit
-			if self.check_env:
-				if bitstream.read(c_bit): # is blocked
-					log.debug("hit but blocked")
-					if self.blocked_action is not None:
-						self.blocked_action.deserialize(bitstream, caster, target, level+1)
-					return
-			targets = []
-			for _ in range(bitstream.read(c_uint)): # number of targets
-				target_id = bitstream.read(c_int64)
-				targets.append(server.game_objects.get(target_id))
-			for target in targets:
-				log.debug("Target %s", target)
-				if self.action is not None:
-					self.action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		action = c.compile(self.action)
+		blocked_action = c.compile(self.blocked_action)
+		miss_action = c.compile(self.miss_action)
+		check_env = self.check_env
+		use_picked_target = self.use_picked_target
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			if use_picked_target and caster.skill.picked_target_id != 0 and caster.skill.picked_target_id in server.game_objects:
+				target = server.game_objects[caster.skill.picked_target_id]
+				# todo: there seems to be a skill where this doesn't work and where the rest of the code should be executed as if the following lines weren't there?
+				debug("using picked target, not completely working")
+				action(bitstream, caster, target)
+				return
+				# end of lines
+			if bitstream.read(c_bit): # is hit
+				if check_env:
+					if bitstream.read(c_bit): # is blocked
+						debug("hit but blocked")
+						if blocked_action is not None:
+							blocked_action(bitstream, caster, target)
+						return
+				targets = []
+				for _ in range(bitstream.read(c_uint)): # number of targets
+					target_id = bitstream.read(c_int64)
+					targets.append(server.game_objects.get(target_id))
+				for target in targets:
+					debug("Target %s", target)
+					if action is not None:
+						action(bitstream, caster, target)
 
-		else:
-			if self.check_env:
-				is_blocked = bitstream.read(c_bit)
-				log.debug("blocked bit %s", is_blocked)
-				if is_blocked:
-					if self.blocked_action is None:
-						log.error("TacArc would be blocked but has no blocked action!")
+			else:
+				if check_env:
+					is_blocked = bitstream.read(c_bit)
+					debug("blocked bit %s", is_blocked)
+					if is_blocked:
+						if blocked_action is None:
+							log.error("TacArc would be blocked but has no blocked action!")
+							return
+						debug("blocked")
+						blocked_action(bitstream, caster, target)
 						return
-					log.debug("blocked")
-					self.blocked_action.deserialize(bitstream, caster, target, level+1)
-					return
-			if self.miss_action is not None:
-				log.debug("miss")
-				self.miss_action.deserialize(bitstream, caster, target, level+1)
+				if miss_action is not None:
+					debug("miss")
+					miss_action(bitstream, caster, target)
+		return deserialize
 
 class And(Behavior):
 	def __init__(self, id: int, behavs: Iterable[Behavior]):
 		super().__init__(id)
 		self.behaviors = behavs
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		for behav in self.behaviors:
 			behav.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		for behav in self.behaviors:
-			behav.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		behaviors = tuple(c.compile(behav) for behav in self.behaviors)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			for behav in behaviors:
+				behav(bitstream, caster, target)
+		return deserialize
 
 class ProjectileAttack(Behavior):
 	def __init__(self, id: int, projectile_lot: int, spread_count: int):
@@ -163,39 +262,48 @@ class ProjectileAttack(Behavior):
 		self.projectile_lot = projectile_lot
 		self.spread_count = spread_count
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
-		bitstream.write(c_int64(target.object_id))
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
+		bitstream.write_slot(c_int64, _target_id, caster, target)
 
 		proj_behavs = []
-		for skill_id, _ in server.db.object_skills[int(self.projectile_lot)]:
-			proj_behavs.append(server.db.skill_behavior[skill_id][0])
+		for skill_id, _ in server.static.object_skills[int(self.projectile_lot)]:
+			proj_behavs.append(server.static.skill_behavior[skill_id][0])
+		cast_projectile = lambda caster, target: caster.skill.cast_projectile(proj_behavs, target)
 		for _ in range(self.spread_count):
-			bitstream.write(c_int64(caster.skill.cast_projectile(proj_behavs, target)))
+			bitstream.write_slot(c_int64, cast_projectile, caster, target)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		target_id = bitstream.read(c_int64)
-		if target_id != 0 and target_id in server.game_objects:
-			target = server.game_objects[target_id]
-			log.debug("target %s", target)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		projectile_lot = int(self.projectile_lot)
+		spread_count = self.spread_count
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			target_id = bitstream.read(c_int64)
+			if target_id != 0 and target_id in server.game_objects:
+				target = server.game_objects[target_id]
+				debug("target %s", target)
 
-		proj_behavs = []
-		for skill_id, _ in server.db.object_skills[int(self.projectile_lot)]:
-			proj_behavs.append(server.db.skill_behavior[skill_id][0])
+			proj_behavs = []
+			for skill_id, _ in server.static.object_skills[projectile_lot]:
+				proj_behavs.append(server.static.skill_behavior[skill_id][0])
 
-		for _ in range(self.spread_count):
-			local_id = bitstream.read(c_int64)
-			caster.skill.projectile_behaviors[local_id] = proj_behavs
+			for _ in range(spread_count):
+				local_id = bitstream.read(c_int64)
+				caster.skill.projectile_behaviors[local_id] = proj_behavs
+		return deserialize
 
 class Heal(Behavior):
 	def __init__(self, id: int, life: int):
 		super().__init__(id)
 		self.life = life
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		target.stats.life += self.life
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		life = self.life
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			target.stats.life += life
+		return deserialize
 
 class MovementType:
 	Ground = 1
@@ -217,51 +325,57 @@ class MovementSwitch(Behavior):
 		self.double_jump_action = double_jump_action
 		self.jetpack_action = jetpack_action
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		bitstream.write(c_uint(1))
 		return
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		movement_type = bitstream.read(c_uint)
-		log.debug("Movement type %i", movement_type)
-		if movement_type in (MovementType.Ground, MovementType.Seven, MovementType.Nine, MovementType.Rail):
-			action = self.ground_action
-		elif movement_type == MovementType.Jump:
-			action = self.jump_action
-		elif movement_type in (MovementType.Falling, MovementType.FallingAfterDoubleJumpAttack):
-			if self.falling_action is not None:
-				action = self.falling_action
-			else:
-				action = self.ground_action
-		elif movement_type == MovementType.DoubleJump:
-			action = self.double_jump_action
-		elif movement_type == MovementType.Jetpack:
-			if self.jetpack_action is not None:
-				action = self.jetpack_action
-			else:
-				action = self.ground_action
-		else:
-			raise NotImplementedError("Behavior", self.id, ": Movement type", movement_type)
-		if action is not None:
-			action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		behavior_id = self.id
+		ground_action = c.compile(self.ground_action)
+		falling_action = c.compile(self.falling_action) if self.falling_action is not None else ground_action
+		jetpack_action = c.compile(self.jetpack_action) if self.jetpack_action is not None else ground_action
+		actions = {
+			MovementType.Ground: ground_action,
+			MovementType.Seven: ground_action,
+			MovementType.Nine: ground_action,
+			MovementType.Rail: ground_action,
+			MovementType.Jump: c.compile(self.jump_action),
+			MovementType.Falling: falling_action,
+			MovementType.FallingAfterDoubleJumpAttack: falling_action,
+			MovementType.DoubleJump: c.compile(self.double_jump_action),
+			MovementType.Jetpack: jetpack_action}
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			movement_type = bitstream.read(c_uint)
+			debug("Movement type %i", movement_type)
+			if movement_type not in actions:
+				raise NotImplementedError("Behavior", behavior_id, ": Movement type", movement_type)
+			action = actions[movement_type]
+			if action is not None:
+				action(bitstream, caster, target)
+		return deserialize
 
 class AreaOfEffect(Behavior):
 	def __init__(self, id: int, action: Optional[Behavior]):
 		super().__init__(id)
 		self.action = action
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		bitstream.write(c_uint(0)) # number of targets
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		targets = []
-		for _ in range(bitstream.read(c_uint)): # number of targets
-			target_id = bitstream.read(c_int64)
-			targets.append(server.game_objects[target_id])
-		log.debug("targets: %s", targets)
-		if self.action is not None:
-			for target in targets:
-				self.action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		action = c.compile(self.action)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			targets = []
+			for _ in range(bitstream.read(c_uint)): # number of targets
+				target_id = bitstream.read(c_int64)
+				targets.append(server.game_objects[target_id])
+			debug("targets: %s", targets)
+			if action is not None:
+				for target in targets:
+					action(bitstream, caster, target)
+		return deserialize
 
 class OverTime(Behavior):
 	def __init__(self, id: int, action: Behavior, num_intervals: int, delay: float):
@@ -270,43 +384,53 @@ class OverTime(Behavior):
 		self.num_intervals = num_intervals
 		self.delay = delay
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		for interval in range(self.num_intervals):
-			caster.call_later(interval * self.delay, self.action.deserialize, b"", caster, target, 0)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		action = c.compile(self.action)
+		num_intervals = self.num_intervals
+		delay = self.delay
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			for interval in range(num_intervals):
+				caster.call_later(interval * delay, action, b"", caster, target)
+		return deserialize
 
 class Imagination(Behavior):
 	def __init__(self, id: int, imag: int):
 		super().__init__(id)
 		self.imagination = imag
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		target.stats.imagination += self.imagination
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		imagination = self.imagination
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			target.stats.imagination += imagination
+		return deserialize
 
 class TargetCaster(Behavior):
 	def __init__(self, id: int, action: Behavior):
 		super().__init__(id)
 		self.action = action
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		self.action.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		self.action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		return c.compile(self.action)
 
 class Stun(Behavior):
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		# needs to be researched more
 		if False:#target.object_id != self.original_target_id:
 			log.debug("Stun writing bit")
 			bitstream.write(c_bit(False))
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		if False:#target and target.object_id != self.original_target_id:
-			log.debug("Stun reading bit")
-			assert not bitstream.read(c_bit)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			if False:#target and target.object_id != self.original_target_id:
+				log.debug("Stun reading bit")
+				assert not bitstream.read(c_bit)
+		return deserialize
 
 class Duration(Behavior):
 	def __init__(self, id: int, action: Optional[Behavior], duration: float):
@@ -314,21 +438,28 @@ class Duration(Behavior):
 		self.action = action
 		self.duration = duration
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		if self.action is not None:
 			self.action.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		if self.action is not None:
-			params = self.action.deserialize(bitstream, caster, target, level+1)
-			caster.call_later(self.duration, caster.skill.undo_behavior, self.action, params)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		action_behavior = self.action
+		action = c.compile(self.action)
+		duration = self.duration
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			if action is not None:
+				params = action(bitstream, caster, target)
+				caster.call_later(duration, caster.skill.undo_behavior, action_behavior, params)
+		return deserialize
 
 class Knockback(Behavior):
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		bitstream.write(c_bit(False))
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		assert not bitstream.read(c_bit)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			assert not bitstream.read(c_bit)
+		return deserialize
 
 class AttackDelay(Behavior):
 	def __init__(self, id: int, action: Optional[Behavior], delay: float):
@@ -336,15 +467,22 @@ class AttackDelay(Behavior):
 		self.action = action
 		self.delay = delay
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
+		bitstream.write_slot(c_uint, self._cast_sync_skill, caster, target)
+
+	def _cast_sync_skill(self, caster: GameObject, target: GameObject) -> int:
 		handle = caster.skill.cast_sync_skill(self.delay, self.action, target)
 		log.debug("write handle %s", handle)
-		bitstream.write(c_uint(handle))
+		return handle
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		handle = bitstream.read(c_uint)
-		log.debug("read handle %s", handle)
-		caster.skill.delayed_behaviors[handle] = self.action
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		action = self.action
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			handle = bitstream.read(c_uint)
+			debug("read handle %s", handle)
+			caster.skill.delayed_behaviors[handle] = action
+		return deserialize
 
 ChargeUp = AttackDelay # works the same
 
@@ -353,11 +491,14 @@ class RepairArmor(Behavior):
 		super().__init__(id)
 		self.armor = armor
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		target.stats.armor += self.armor
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		armor = self.armor
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			target.stats.armor += armor
+		return deserialize
 
 class SpawnObject(Behavior):
 	def __init__(self, id: int, lot: int, distance: int):
@@ -365,9 +506,13 @@ class SpawnObject(Behavior):
 		self.lot = lot
 		self.distance = distance
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		position = caster.physics.position + caster.physics.rotation.rotate(Vector3.forward)*self.distance
-		return server.spawn_object(self.lot, {"parent": caster, "position": position})
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		lot = self.lot
+		distance = self.distance
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> GameObject:
+			position = caster.physics.position + caster.physics.rotation.rotate(Vector3.forward)*distance
+			return server.spawn_object(lot, {"parent": caster, "position": position})
+		return deserialize
 
 SpawnQuickbuild = SpawnObject # works the same
 
@@ -379,7 +524,7 @@ class Switch(Behavior):
 		self.imagination = imagination
 		self.is_enemy_faction = is_enemy_faction
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		switch = True
 		if self.imagination > 0 or not self.is_enemy_faction:
 			log.debug("Switch writing bit")
@@ -391,17 +536,23 @@ class Switch(Behavior):
 			if self.action_false is not None:
 				self.action_false.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		switch = True
-		if self.imagination > 0 or not self.is_enemy_faction:
-			log.debug("Switch reading bit")
-			switch = bitstream.read(c_bit)
-		if switch:
-			if self.action_true is not None:
-				self.action_true.deserialize(bitstream, caster, target, level+1)
-		else:
-			if self.action_false is not None:
-				self.action_false.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		action_false = c.compile(self.action_false)
+		action_true = c.compile(self.action_true)
+		reads_bit = self.imagination > 0 or not self.is_enemy_faction
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			switch = True
+			if reads_bit:
+				debug("Switch reading bit")
+				switch = bitstream.read(c_bit)
+			if switch:
+				if action_true is not None:
+					action_true(bitstream, caster, target)
+			else:
+				if action_false is not None:
+					action_false(bitstream, caster, target)
+		return deserialize
 
 class Buff(Behavior):
 	def __init__(self, id: int, life: int, armor: int, imagination: int):
@@ -410,13 +561,18 @@ class Buff(Behavior):
 		self.armor = armor
 		self.imagination = imagination
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		caster.stats.max_life += self.life
-		caster.stats.max_armor += self.armor
-		caster.stats.max_imagination += self.imagination
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		life = self.life
+		armor = self.armor
+		imagination = self.imagination
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			caster.stats.max_life += life
+			caster.stats.max_armor += armor
+			caster.stats.max_imagination += imagination
+		return deserialize
 
 class Jetpack(Behavior):
 	def __init__(self, id: int, bypass_checks: bool, enable_hover: bool, air_speed: float, max_air_speed: float, vertical_velocity: float, warning_effect_id: int):
@@ -428,49 +584,61 @@ class Jetpack(Behavior):
 		self.vertical_velocity = vertical_velocity
 		self.warning_effect_id = warning_effect_id
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		caster.char.set_jet_pack_mode(self.bypass_checks, self.enable_hover, True, 167, self.air_speed, self.max_air_speed, self.vertical_velocity, self.warning_effect_id)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		args = self.bypass_checks, self.enable_hover, True, 167, self.air_speed, self.max_air_speed, self.vertical_velocity, self.warning_effect_id
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			caster.char.set_jet_pack_mode(*args)
+		return deserialize
 
 class SkillEvent(Behavior):
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
 		if self.id == 14211:
 			event_name = "waterspray"
 		elif self.id == 27031:
 			event_name = "spinjitzu"
 		else:
 			event_name = None
-
-		target.handle("skill_event", caster, event_name, silent=True)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			target.handle("skill_event", caster, event_name, silent=True)
+		return deserialize
 
 class SkillCastFailed(Behavior):
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		caster.skill.skill_cast_failed = True
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			caster.skill.skill_cast_failed = True
+		return deserialize
 
 class ApplyBuff(Behavior):
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		pass
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		pass
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			pass
+		return deserialize
 
 class Chain(Behavior):
 	def __init__(self, id: int, behaviors: Sequence[Behavior]):
 		super().__init__(id)
 		self.behaviors = behaviors
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		chain_index = bitstream.read(c_uint)
-		log.debug("chain index %i", chain_index)
-		self.behaviors[chain_index-1].deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		behaviors = tuple(c.compile(behav) for behav in self.behaviors)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			chain_index = bitstream.read(c_uint)
+			debug("chain index %i", chain_index)
+			behaviors[chain_index-1](bitstream, caster, target)
+		return deserialize
 
 class ForceMovement(Behavior):
 	def __init__(self, id: int, hit_action: Optional[Behavior], hit_action_enemy: Optional[Behavior], hit_action_faction: Optional[Behavior]):
@@ -479,20 +647,24 @@ class ForceMovement(Behavior):
 		self.hit_action_enemy = hit_action_enemy
 		self.hit_action_faction = hit_action_faction
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		if self.hit_action is not None or \
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		has_action = self.hit_action is not None or \
 			 self.hit_action_enemy is not None or \
-			 self.hit_action_faction is not None:
-			handle = bitstream.read(c_uint)
-			log.debug("move handle %s", handle)
-			caster.skill.delayed_behaviors[handle] = None # not known yet
+			 self.hit_action_faction is not None
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			if has_action:
+				handle = bitstream.read(c_uint)
+				debug("move handle %s", handle)
+				caster.skill.delayed_behaviors[handle] = None # not known yet
+		return deserialize
 
 class Interrupt(Behavior):
 	def __init__(self, id: int, interrupt_block: bool):
 		super().__init__(id)
 		self.interrupt_block = interrupt_block
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		if target != caster:
 			log.debug("Interrupt: target != self, writing bit")
 			bitstream.write(c_bit(False))
@@ -500,35 +672,45 @@ class Interrupt(Behavior):
 			bitstream.write(c_bit(False))
 		bitstream.write(c_bit(False))
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		if target != caster:
-			log.debug("Interrupt: target != self, reading bit")
-			assert not bitstream.read(c_bit)
-		if not self.interrupt_block:
-			log.debug("Interrupt: not block, reading bit")
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		interrupt_block = self.interrupt_block
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			if target != caster:
+				debug("Interrupt: target != self, reading bit")
+				assert not bitstream.read(c_bit)
+			if not interrupt_block:
+				debug("Interrupt: not block, reading bit")
+				assert not bitstream.read(c_bit)
 			assert not bitstream.read(c_bit)
-		assert not bitstream.read(c_bit)
+		return deserialize
 
 class SwitchMultiple(Behavior):
 	def __init__(self, id: int, behavs: Iterable[Tuple[Behavior, float]]):
 		super().__init__(id)
 		self.behaviors = behavs
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		charge_time = bitstream.read(c_float)
-		for behav, value in self.behaviors:
-			if charge_time <= value:
-				behav.deserialize(bitstream, caster, target, level+1)
-				break
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		behaviors = tuple((c.compile(behav), value) for behav, value in self.behaviors)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			charge_time = bitstream.read(c_float)
+			for behav, value in behaviors:
+				if charge_time <= value:
+					behav(bitstream, caster, target)
+					break
+		return deserialize
 
 class Start(Behavior):
 	def __init__(self, id: int, action: Optional[Behavior]):
 		super().__init__(id)
 		self.action = action
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		if self.action is not None:
-			self.action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		action = c.compile(self.action)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			if action is not None:
+				action(bitstream, caster, target)
+		return deserialize
 
 class NPCCombatSkill(Behavior):
 	def __init__(self, id: int, behavior: Behavior, min_range: int, max_range: int):
@@ -537,41 +719,156 @@ class NPCCombatSkill(Behavior):
 		self.min_range = min_range
 		self.max_range = max_range
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		self.behavior.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		self.behavior.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		return c.compile(self.behavior)
 
 class Verify(Behavior):
 	def __init__(self, id: int, action: Behavior):
 		super().__init__(id)
 		self.action = action
 
-	def _serialize(self, bitstream: WriteStream, caster: GameObject, target: GameObject, level: int) -> None:
+	def _serialize(self, bitstream: PayloadWriter, caster: GameObject, target: GameObject, level: int) -> None:
 		bitstream.write(c_bit(False))
 		bitstream.write(c_uint(0))
 		bitstream.write(c_bit(False)) # blocking
 		bitstream.write(c_bit(False)) # charging
 		self.action.serialize(bitstream, caster, target, level+1)
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		assert not bitstream.read(c_bit)
-		assert bitstream.read(c_uint) == 0
-		assert not bitstream.read(c_bit)
-		assert not bitstream.read(c_bit)
-		self.action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		action = c.compile(self.action)
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			assert not bitstream.read(c_bit)
+			assert bitstream.read(c_uint) == 0
+			assert not bitstream.read(c_bit)
+			assert not bitstream.read(c_bit)
+			action(bitstream, caster, target)
+		return deserialize
 
 class AirMovement(Behavior):
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		handle = bitstream.read(c_uint)
-		log.debug("move handle %s", handle)
-		caster.skill.delayed_behaviors[handle] = None # not known yet
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		debug = c.debug
+		def deserialize(bitstream: ReadStream, caster: GameObject, target: GameObject) -> None:
+			handle = bitstream.read(c_uint)
+			debug("move handle %s", handle)
+			caster.skill.delayed_behaviors[handle] = None # not known yet
+		return deserialize
 
 class ClearTarget(Behavior):
 	def __init__(self, id: int, action: Behavior):
 		super().__init__(id)
 		self.action = action
 
-	def _deserialize(self, bitstream: ReadStream, caster: GameObject, target: GameObject, level: int) -> None:
-		self.action.deserialize(bitstream, caster, target, level+1)
+	def _compile(self, c: "BehaviorCompiler") -> Deserializer:
+		return c.compile(self.action)
+
+# behaviors that are understood well enough that tracing doesn't need to dump their attributes
+_TRACE_WITHOUT_VARS = DummyBehavior, BasicAttack, TacArc, And, Heal, MovementSwitch, AreaOfEffect, Imagination, TargetCaster, Stun, Duration, Knockback, AttackDelay, RepairArmor, Switch, SkillCastFailed, Chain, ForceMovement, ChargeUp, SwitchMultiple, Start, NPCCombatSkill, AirMovement
+
+class BehaviorCompiler:
+	"""
+	Compiles behavior trees into nested closures, so that reading a skill from a bitstream doesn't walk the behavior objects or build log messages.
+	Behaviors are compiled once per behavior ID, so subtrees shared between skills are reused. Compiled behaviors are dropped when the static tables are reloaded.
+	Skills in traced_skills are compiled separately with debug logging of every behavior.
+	"""
+
+	def __init__(self) -> None:
+		self.traced_skills: Set[int] = set()
+		self.trace = False
+		self._compiled: Dict[Tuple[int, bool], Deserializer] = {}
+		self._compiling: Set[Tuple[int, bool]] = set()
+		self._version: Optional[int] = None
+		self._depth = 0
+
+	@property
+	def debug(self) -> Callable[..., None]:
+		if self.trace:
+			return log.debug
+		return _no_log
+
+	def compile_all(self) -> None:
+		"""Compile all skills in advance."""
+		start = time.perf_counter()
+		for skill_id in server.static.skill_behavior:
+			self.compile_skill(skill_id)
+		log.info("Compiled %i skills into %i behaviors in %.2f s", len(server.static.skill_behavior), len(self._compiled), time.perf_counter() - start)
+
+	def compile_skill(self, skill_id: int) -> Optional[Deserializer]:
+		self.trace = skill_id in self.traced_skills
+		try:
+			return self.compile(server.static.skill_behavior[skill_id][0])
+		finally:
+			self.trace = False
+
+	def compile(self, behavior: Optional[Behavior]) -> Optional[Deserializer]:
+		if behavior is None:
+			return None
+		if self._version != server.static.version:
+			self._compiled.clear()
+			self._version = server.static.version
+		key = behavior.id, self.trace
+		if key in self._compiled:
+			return self._compiled[key]
+		if key in self._compiling:
+			# cycle in the behavior graph, look the compiled behavior up when it's run
+			compiled = self._compiled
+			return lambda bitstream, caster, target: compiled[key](bitstream, caster, target)
+		self._compiling.add(key)
+		try:
+			deserialize = behavior._compile(self)
+			if self.trace:
+				deserialize = self._traced(behavior, deserialize)
+		finally:
+			self._compiling.discard(key)
+		self._compiled[key] = deserialize
+		return deserialize
+
+	def _traced(self, behavior: Behavior, deserialize: Deserializer) -> Deserializer:
+		name = type(behavior).__name__
+		dump_vars = not isinstance(behavior, _TRACE_WITHOUT_VARS)
+		def traced(bitstream: ReadStream, caster: GameObject, target: GameObject) -> Any:
+			log.debug("%s%s %i", "  " * self._depth, name, behavior.id)
+			if dump_vars:
+				log.debug(pprint.pformat(vars(behavior), indent=self._depth))
+			self._depth += 1
+			try:
+				return deserialize(bitstream, caster, target)
+			finally:
+				self._depth -= 1
+		return traced
+
+behavior_compiler = BehaviorCompiler()
+
+class PayloadCache:
+	"""
+	Payloads of skills cast by the server, serialized once per behaviors, caster LOT and whether the caster targets itself.
+	Casts after the first only patch the target and handles into the cached payload instead of serializing the behaviors again.
+	"""
+
+	def __init__(self) -> None:
+		self._templates: Dict[Tuple[Tuple[int, ...], int, bool], Optional[PayloadTemplate]] = {}
+		self._version: Optional[int] = None
+
+	def payload(self, behaviors: Sequence[Behavior], caster: GameObject, target: GameObject) -> bytes:
+		if self._version != server.static.version:
+			self._templates.clear()
+			self._version = server.static.version
+		key = tuple(behavior.id for behavior in behaviors), caster.lot, target == caster
+		if key in self._templates:
+			template = self._templates[key]
+		else:
+			writer = PayloadWriter(record=True)
+			for behavior in behaviors:
+				behavior.serialize(writer, caster, target, 0)
+			template = writer.template()
+			self._templates[key] = template
+		if template is not None:
+			return template.render(caster, target)
+		writer = PayloadWriter()
+		for behavior in behaviors:
+			behavior.serialize(writer, caster, target, 0)
+		return bytes(writer)
+
+skill_payloads = PayloadCache()
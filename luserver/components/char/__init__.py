@@ -1,6 +1,5 @@
 import asyncio
 import logging
-import random
 from collections import Counter
 from typing import Dict, List, Optional, Tuple
 
@@ -11,7 +10,7 @@ from bitstream import c_bit, c_bool, c_int, c_int64, c_ubyte, c_uint, c_uint64,
 from ...amf3 import AMF3
 from ...auth import GMLevel
 from ...bitstream import WriteStream as WriteStream_
-from ...game_object import broadcast, Config, EA, EB, EBY, EF, EI, EO, ES, EV, GameObject, ObjectID, OBJ_NONE, Player, single
+from ...game_object import broadcast, Config, EA, EB, EBY, EF, EI, EO, ES, EV, Field, Flag, GameObject, ObjectID, OBJ_NONE, Player, single
 from ...game_object import c_int as c_int_
 from ...game_object import c_int64 as c_int64_
 from ...game_object import c_uint as c_uint_
@@ -23,7 +22,7 @@ from ...modules.mail import Mail
 from ...modules.social import FriendUpdateType
 from ..component import Component
 from ..inventory import InventoryType
-from ..mission import MissionState, TaskType
+from ..mission import TaskType
 from .activity import CharActivity
 from .camera import CharCamera
 from .mission import CharMission
@@ -63,6 +62,18 @@ class RewardType:
 
 class CharacterComponent(Component):
 	object: Player
+	vehicle_flag = Flag()
+	vehicle_id_flag = Flag(vehicle_flag)
+	vehicle_id = Field(vehicle_id_flag)
+	level_flag = Flag()
+	level = Field(level_flag)
+	gm_flag = Flag()
+	pvp_enabled = Field(gm_flag)
+	show_gm_status = Field(gm_flag)
+	rebuilding_flag = Flag()
+	rebuilding = Field(rebuilding_flag)
+	guild_flag = Flag()
+	tags = Field(guild_flag)
 
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
@@ -84,9 +95,6 @@ class CharacterComponent(Component):
 		for world in (World.BlockYard, World.AvantGrove, World.NimbusRock, World.NimbusIsle, World.ChanteyShanty, World.RavenBluff):
 			server.db.properties[world.value][self.clone_id] = PersistentMapping()
 
-		self.dropped_loot: Dict[ObjectID, int] = {}
-		self.last_collisions: List[ObjectID] = []
-
 		self.activity = CharActivity(self.object)
 		self.camera = CharCamera(self.object)
 		self.mission = CharMission(self.object)
@@ -97,11 +105,7 @@ class CharacterComponent(Component):
 
 		# Component stuff
 
-		self._flags["vehicle_id"] = "vehicle_id_flag"
-		self._flags["vehicle_id_flag"] = "vehicle_flag"
 		self.vehicle_id = 0
-
-		self._flags["level"] = "level_flag"
 		self.level = 1
 
 		self.flags = 0
@@ -147,15 +151,11 @@ class CharacterComponent(Component):
 
 		self.traveling_rocket = None
 
-		self._flags["pvp_enabled"] = "gm_flag"
-		self._flags["show_gm_status"] = "gm_flag"
 		self.pvp_enabled = False
 		self.show_gm_status = False
 
-		self._flags["rebuilding"] = "rebuilding_flag"
 		self.rebuilding = 0
 
-		self._flags["tags"] = "guild_flag"
 		self.tags = PersistentList()
 
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
@@ -280,6 +280,22 @@ class CharacterComponent(Component):
 	def data(self):
 		return server.player_data[self.object]
 
+	# session state, kept in the player data instead of the stored character
+
+	@property
+	def dropped_loot(self) -> Dict[ObjectID, int]:
+		"""LOTs of the loot dropped for the player that hasn't been picked up yet, by loot object ID."""
+		return self.data().setdefault("dropped_loot", {})
+
+	@property
+	def last_collisions(self) -> List[ObjectID]:
+		"""Objects the player collided with at the last position update."""
+		return self.data().get("last_collisions", [])
+
+	@last_collisions.setter
+	def last_collisions(self, value: List[ObjectID]) -> None:
+		self.data()["last_collisions"] = value
+
 	def send_friend_update_notify(self, update_type: int) -> None:
 		update_notify = WriteStream_()
 		update_notify.write_header(WorldClientMsg.FriendUpdateNotify)
@@ -297,7 +313,7 @@ class CharacterComponent(Component):
 				outdated_refs.insert(0, index)
 			else:
 				if friend_ref() in server.player_data:
-					friend_ref().char.data()["conn"].send(update_notify)
+					server.send(update_notify, friend_ref().char.data()["conn"])
 
 		for index in outdated_refs:
 			del self.friends[index]
@@ -306,8 +322,6 @@ class CharacterComponent(Component):
 		#self.object._handlers.clear()
 		self.vehicle_id = 0
 		self.online = False
-		self.dropped_loot.clear()
-		self.last_collisions.clear()
 		if self.object in server.player_data:
 			del server.player_data[self.object]
 		self.check_for_leaks()
@@ -360,47 +374,38 @@ class CharacterComponent(Component):
 			return SENTINEL_TOKEN
 		return None
 
-	def random_loot(self, loot_matrix) -> Counter:
+	def random_loot(self, loot_matrix, count: int=1) -> Counter:
+		"""Roll the loot of count smashables at once."""
 		loot = Counter()
-		roll = random.random()
-		for table_index, percent, min_to_drop, max_to_drop in loot_matrix:
-			if roll < percent:
-				for _ in range(random.randint(min_to_drop, max_to_drop)):
-					lot, mission_drop, _ = random.choice(server.db.loot_table[table_index])
-					if lot == FACTION_TOKEN_PROXY:
-						lot = self.faction_token_lot()
-						if lot is None:
-							continue
-					if mission_drop and not self.should_be_dropped(lot):
-						continue
-					loot[lot] += 1
+		for (lot, mission_drop), num_drops in server.static.loot_sampler(loot_matrix).roll(count).items():
+			if lot == FACTION_TOKEN_PROXY:
+				lot = self.faction_token_lot()
+				if lot is None:
+					continue
+			if mission_drop and not self.should_be_dropped(lot):
+				continue
+			loot[lot] += num_drops
 		return loot
 
 	def should_be_dropped(self, lot: int) -> bool:
-		for mission in self.mission.missions.values():
-			if mission.state == MissionState.Active:
-				for task in mission.tasks:
-					if task.type == TaskType.ObtainItem and lot in task.target and task.value < task.target_value:
-						return True
-		return False
+		return self.mission.needs_item(lot)
 
 	async def transfer_to_world(self, world: Tuple[int, int, int], respawn_point_name: str=None, include_self: bool=False) -> None:
-		server.commit()
-		# needed for ZODB to pick up the changes to the components
-		# normally not needed because a replica serialization autotriggers this
-		self.object._p_changed = True
+		server.commit_pending()
 
-		if respawn_point_name is not None and world[0] in server.db.world_data:
-			for lot, obj_id, config in server.db.world_data[world[0]].objects.values():
+		if respawn_point_name is not None and world[0] in server.static.world_data:
+			for lot, obj_id, config in server.static.world_data[world[0]].objects.values():
 				if lot == 4945 and ("respawn_name" not in config or respawn_point_name == "" or config["respawn_name"] == respawn_point_name): # respawn point lot
 					self.object.physics.position.update(config["position"])
 					self.object.physics.rotation.update(config["rotation"])
 					break
 			else:
-				self.object.physics.position.update(server.db.world_data[world[0]].spawnpoint[0])
-				self.object.physics.rotation.update(server.db.world_data[world[0]].spawnpoint[1])
+				self.object.physics.position.update(server.static.world_data[world[0]].spawnpoint[0])
+				self.object.physics.rotation.update(server.static.world_data[world[0]].spawnpoint[1])
 			self.object.physics.attr_changed("position")
 			self.object.physics.attr_changed("rotation")
+		# the destination instance loads the character from the DB
+		self.object.checkpoint()
 		server.commit()
 
 		server_address = await server.address_for_world(world, self.data()["conn"].get_type(), include_self)
@@ -410,7 +415,7 @@ class CharacterComponent(Component):
 		redirect.write(server_address[0].encode("latin1"), allocated_length=33)
 		redirect.write(c_ushort(server_address[1]))
 		redirect.write(c_bool(False))
-		self.data()["conn"].send(redirect)
+		server.send(redirect, self.data()["conn"])
 
 	async def transfer_to_last_non_instance(self, position: Vector3=None, rotation: Quaternion=None) -> None:
 		if position is not None:
@@ -449,6 +454,8 @@ class CharacterComponent(Component):
 	@single
 	def set_currency(self, currency:c_int64_=EI, loot_type:c_int_=0, position:Vector3=EV, source_lot:c_int_=-1, source_object:GameObject=OBJ_NONE, source_trade:GameObject=OBJ_NONE, source_type:c_int_=0) -> None:
 		self.currency = currency
+		# stored together with the item changes of purchases, trades and mail
+		self.object.register_change()
 
 	def on_pickup_currency(self, currency:c_uint_=EI, position:Vector3=EV) -> None:
 		self.set_currency(currency=self.currency + currency, position=Vector3.zero)
@@ -459,7 +466,7 @@ class CharacterComponent(Component):
 			return
 		lot = self.dropped_loot[loot_object_id]
 		if lot in (177, 935, 4035, 6431, 7230, 8200, 8208, 11910, 11911, 11912, 11913, 11914, 11915, 11916, 11917, 11918, 11919, 11920): # powerup
-			for skill_id, _ in server.db.object_skills[lot]:
+			for skill_id, _ in server.static.object_skills[lot]:
 				self.object.skill.cast_skill(skill_id)
 				self.mission.update_mission_task(TaskType.CollectPowerup, skill_id)
 		else:
@@ -544,10 +551,10 @@ class CharacterComponent(Component):
 
 	def on_use_non_equipment_item(self, item_to_use:c_int64_=EI) -> None:
 		item = self.object.inventory.get_stack(InventoryType.Items, item_to_use)
-		for component_type, component_id in server.db.components_registry[item.lot]:
+		for component_type, component_id in server.static.components_registry[item.lot]:
 			if component_type == 53: # PackageComponent, make an enum for this somewhen
 				self.object.inventory.remove_item(InventoryType.Items, item)
-				for lot, count in self.random_loot(server.db.package_component[component_id]).items():
+				for lot, count in self.random_loot(server.static.package_component[component_id]).items():
 					asyncio.get_event_loop().call_soon(self.object.inventory.add_item, lot, count)
 				return
 
@@ -611,11 +618,11 @@ class CharacterComponent(Component):
 	@single
 	def modify_lego_score(self, score:c_int64_=EI, source_type:c_int_=0) -> None:
 		self.universe_score += score
-		if self.level < len(server.db.level_scores) and self.universe_score > server.db.level_scores[self.level]:
+		if self.level < len(server.static.level_scores) and self.universe_score > server.static.level_scores[self.level]:
 			self.level += 1
-			if self.level in server.db.level_rewards:
+			if self.level in server.static.level_rewards:
 				self.notify_level_rewards(self.level, sending_rewards=True)
-				for reward_type, value in server.db.level_rewards[self.level]:
+				for reward_type, value in server.static.level_rewards[self.level]:
 					if reward_type == RewardType.Item:
 						self.object.inventory.add_item(value, source_type=source_type)
 					elif reward_type == RewardType.InventorySpace:
@@ -2,6 +2,7 @@ from ...amf3 import AMF3
 from ...game_object import broadcast, c_int, c_uint, EF, EL, ES, EO, EV, GameObject, single
 from ...ldf import LDF
 from ...math.vector import Vector3
+from ...world import server
 from .subcomponent import CharSubcomponent
 
 class EndBehavior:
@@ -36,10 +37,15 @@ class CharCamera(CharSubcomponent):
 			self.object.char.u_i_message_server_to_single_client(message_name=b"popGameState", args=AMF3({"state": "front_end"}))
 
 	def on_toggle_ghost_reference_override(self, override:bool=False) -> None:
-		pass
+		data = self.object.char.data()
+		data["ghost_reference_override"] = override
+		if not override:
+			server.replica_manager.set_ghost_reference(data["conn"], None)
 
 	def on_set_ghost_reference_position(self, position:Vector3=EV) -> None:
-		pass
+		data = self.object.char.data()
+		if data.get("ghost_reference_override"):
+			server.replica_manager.set_ghost_reference(data["conn"], position)
 
 	@single
 	def add_camera_effect(self, config:LDF=EL, duration:float=-1, effect_id:str=ES, effect_type:str=ES) -> None:
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from persistent.mapping import PersistentMapping
 
@@ -7,23 +7,122 @@ from ...game_object import c_int, c_int64, E, EI, EO, GameObject, Player, Sequen
 from ...world import server
 from ...math.vector import Vector3
 from ..inventory import InventoryType, LootType, Stack
-from ..mission import check_prereqs, MissionProgress, MissionState, ObtainItemType, TaskType
+from ..mission import achievements, achievements_with_task, check_prereqs, dependents, evaluate_prereqs, is_achievement, MissionProgress, MissionState, MissionTask, ObtainItemType, TaskKey, task_keys, TaskType
 from .subcomponent import CharSubcomponent
 
 class CharMission(CharSubcomponent):
 	def __init__(self, player: Player) -> None:
 		super().__init__(player)
 		self.object = player
+		# achievements are only stored once they get progress, see pristine_achievements
 		self.missions: Dict[int, MissionProgress] = PersistentMapping()
-		# add achievements
-		for mission_id, data in server.db.missions.items():
-			is_mission = data[3] # if False, it's an achievement (internally works the same as missions, that's why the naming is weird)
-			if not is_mission:
-				self.missions[mission_id] = MissionProgress(mission_id, data)
+
+	def state(self, mission_id: int) -> Optional[int]:
+		"""State of the mission, including achievements without progress. None if the player doesn't have the mission."""
+		if mission_id in self.missions:
+			return self.missions[mission_id].state
+		if is_achievement(mission_id):
+			return MissionState.Active
+		return None
+
+	def get_progress(self, mission_id: int) -> Optional[MissionProgress]:
+		"""Progress of the mission, created from static data for achievements without progress. None if the player doesn't have the mission."""
+		if mission_id not in self.missions:
+			if not is_achievement(mission_id):
+				return None
+			self._store(mission_id, MissionProgress(mission_id, server.static.missions[mission_id]))
+		return self.missions[mission_id]
+
+	def prereqs_met(self, mission_id: int) -> bool:
+		"""
+		Whether the prereqs of the mission are satisfied.
+		Cached, and invalidated for the dependent missions whenever the state of a mission changes, so that mission givers don't need to walk the prereqs on every interaction.
+		"""
+		try:
+			cache = self._v_prereqs_met
+		except AttributeError:
+			cache = self._v_prereqs_met = {}
+		if mission_id not in cache:
+			cache[mission_id] = evaluate_prereqs(mission_id, self.object)
+		return cache[mission_id]
+
+	def _state_changed(self, mission_id: int) -> None:
+		cache = getattr(self, "_v_prereqs_met", None)
+		if cache:
+			for dependent in dependents(mission_id):
+				cache.pop(dependent, None)
+
+	def pristine_achievements(self) -> Iterator[int]:
+		"""Achievements without progress. These don't have a MissionProgress until their first update."""
+		for mission_id in achievements():
+			if mission_id not in self.missions:
+				yield mission_id
+
+	def _task_index(self) -> Dict[TaskKey, Dict[Tuple[int, int], None]]:
+		"""
+		Index from (task type, target) to the (mission id, task index) of the stored tasks that can still progress.
+		Volatile, so it's rebuilt when the character is loaded.
+		"""
+		try:
+			return self._v_task_index
+		except AttributeError:
+			self._v_task_index = {}
+			for mission_id, mission in self.missions.items():
+				self._index_mission(mission_id, mission)
+			return self._v_task_index
+
+	def _index_mission(self, mission_id: int, mission: MissionProgress) -> None:
+		if mission.state != MissionState.Active:
+			return
+		index = self._task_index()
+		for task_index, task in enumerate(mission.tasks):
+			if task.value < task.target_value:
+				for key in task_keys(task.type, task.target):
+					index.setdefault(key, {})[mission_id, task_index] = None
+
+	def _unindex_mission(self, mission_id: int, mission: MissionProgress) -> None:
+		if mission.state != MissionState.Active:
+			return
+		for task_index, task in enumerate(mission.tasks):
+			self._unindex_task(mission_id, task_index, task)
+
+	def _unindex_task(self, mission_id: int, task_index: int, task: MissionTask) -> None:
+		index = self._task_index()
+		for key in task_keys(task.type, task.target):
+			if key in index:
+				index[key].pop((mission_id, task_index), None)
+				if not index[key]:
+					del index[key]
+
+	def _store(self, mission_id: int, mission: MissionProgress) -> None:
+		if mission_id in self.missions:
+			self._unindex_mission(mission_id, self.missions[mission_id])
+		self.missions[mission_id] = mission
+		self._index_mission(mission_id, mission)
+		self._state_changed(mission_id)
+
+	def remove_mission(self, mission_id: int) -> None:
+		self._unindex_mission(mission_id, self.missions.pop(mission_id))
+		self._state_changed(mission_id)
+
+	def reset_missions(self) -> None:
+		self.missions.clear()
+		self._v_task_index = {}
+		self._v_prereqs_met = {}
+
+	def needs_item(self, lot: int) -> bool:
+		"""Whether an active task of any mission, including achievements without progress, still needs the item."""
+		for mission_id, _ in self._task_index().get((TaskType.ObtainItem, lot), ()):
+			if self.missions[mission_id].state == MissionState.Active:
+				return True
+		for mission_id in achievements_with_task(TaskType.ObtainItem, lot):
+			if mission_id not in self.missions:
+				return True
+		return False
 
 	def add_mission(self, mission_id: int) -> MissionProgress:
-		mission_progress = MissionProgress(mission_id, server.db.missions[mission_id])
-		self.missions[mission_id] = mission_progress
+		mission_progress = MissionProgress(mission_id, server.static.missions[mission_id])
+		self._store(mission_id, mission_progress)
 		self.notify_mission(mission_id, mission_state=mission_progress.state, sending_rewards=False)
 		# obtain item task: update according to items already in inventory
 		for task in mission_progress.tasks:
@@ -38,11 +137,20 @@ class CharMission(CharSubcomponent):
 
 	def update_mission_task(self, task_type: int, target: int, parameter: int=None, increment: int=1, mission_id: int=None) -> None:
 		if mission_id is not None:
-			if mission_id not in self.missions:
+			if mission_id in self.missions:
+				missions = [(mission_id, self.missions[mission_id])]
+			elif is_achievement(mission_id):
+				missions = [(mission_id, MissionProgress(mission_id, server.static.missions[mission_id]))]
+			else:
 				return
-			missions = (mission_id, self.missions[mission_id]),
 		else:
-			missions = self.missions.items()
+			missions: List[Tuple[int, MissionProgress]] = []
+			stored_ids = dict.fromkeys(stored_id for stored_id, _ in self._task_index().get((task_type, target), ()))
+			for stored_id in stored_ids:
+				missions.append((stored_id, self.missions[stored_id]))
+			for achievement_id in achievements_with_task(task_type, target):
+				if achievement_id not in self.missions:
+					missions.append((achievement_id, MissionProgress(achievement_id, server.static.missions[achievement_id])))
 		for mission_id, mission in missions:
 			if mission.state == MissionState.Active:
 				for task in mission.tasks:
@@ -67,6 +175,9 @@ class CharMission(CharSubcomponent):
 							continue
 
 						task_index = mission.tasks.index(task)
+						if mission_id not in self.missions:
+							# first progress of an achievement, store it from now on
+							self._store(mission_id, mission)
 
 						if task.type == TaskType.Collect:
 							task.parameter.add(increment)
@@ -78,6 +189,8 @@ class CharMission(CharSubcomponent):
 						else:
 							task.value = min(task.value+increment, task.target_value)
 							update = task.value
+						if task.value >= task.target_value:
+							self._unindex_task(mission_id, task_index, task)
 						self.notify_mission_task(mission_id, task_mask=1<<(task_index+1), updates=[update])
 
 						# complete achievements that have all tasks complete
@@ -92,7 +205,9 @@ class CharMission(CharSubcomponent):
 		mission = self.missions[mission_id]
 		if mission.state == MissionState.Completed:
 			return
+		self._unindex_mission(mission_id, mission)
 		mission.state = MissionState.Completed
+		self._state_changed(mission_id)
 
 		if mission.is_mission:
 			source_type = LootType.Mission
@@ -137,11 +252,11 @@ class CharMission(CharSubcomponent):
 
 		self.update_mission_task(TaskType.MissionComplete, mission_id)
 
-		if mission_id in server.db.mission_mail:
-			for id, attachment_lot in server.db.mission_mail[mission_id]:
+		if mission_id in server.static.mission_mail:
+			for id, attachment_lot in server.static.mission_mail[mission_id]:
 				if attachment_lot is not None:
 					object_id = server.new_object_id()
-					attachment = Stack(server.db, object_id, attachment_lot)
+					attachment = Stack(server.static, object_id, attachment_lot)
 				else:
 					attachment = None
 				server.mail.send_mail("%[MissionEmail_{id}_senderName]".format(id=id), "%[MissionEmail_{id}_subjectText]".format(id=id), "%[MissionEmail_{id}_bodyText]".format(id=id), self.object, attachment)
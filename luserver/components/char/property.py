@@ -75,7 +75,7 @@ class CharProperty(CharSubcomponent):
 		save_response.write(c_uint(1))
 		save_response.write(c_int64(server.new_object_id()))
 		save_response.write(lxfml_data_compressed, length_type=c_uint)
-		self.object.char.conn.send(save_response)
+		server.send(save_response, self.object.char.conn)
 
 	@single
 	def handle_u_g_c_equip_post_delete_based_on_edit_mode(self, inv_item:c_int64_=EI, items_total:c_int=0) -> None:
@@ -1,18 +1,19 @@
 from typing import cast, Optional
 
 from bitstream import c_bit, c_int64, WriteStream
-from ..game_object import c_int, Config, DestructibleObject, EB, EF, ES, EO, EP, GameObject, Player
+from ..game_object import c_int, Config, DestructibleObject, EB, EF, ES, EO, EP, Field, Flag, GameObject, Player
 from ..world import server
 from .component import Component
 
 class Comp108Component(Component):
 	object: DestructibleObject
+	comp108_main_flag = Flag()
+	driver_id_flag = Flag(comp108_main_flag)
+	driver_id = Field(driver_id_flag)
 
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.comp_108 = self
-		self._flags["driver_id"] = "driver_id_flag"
-		self._flags["driver_id_flag"] = "comp108_main_flag"
 		self.driver_id = 0
 
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
@@ -1,20 +1,38 @@
+import copy
 from abc import ABC, abstractmethod
+from typing import Any, Dict
 
 from bitstream import WriteStream
-from ..game_object import Config, FlagObject, GameObject
+from ..game_object import Config, FlagObject, GameObject, session_fields
 
 class Component(FlagObject, ABC):
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__()
 		self.object = obj
-		for name in dir(self):
-			if name.startswith("on_"):
-				self.object.add_handler(name[3:], getattr(self, name))
+		self.object.add_handlers(self)
 
-	def attr_changed(self, name: str) -> None:
-		if hasattr(self, "_flags") and name in self._flags:
-			setattr(self, self._flags[name], hasattr(self, name))
-			self.object.signal_serialize()
+	def __getstate__(self) -> Dict[str, Any]:
+		state = self.__dict__.copy()
+		state.pop("_session", None)
+		return state
+
+	def signal_serialize(self) -> None:
+		if not session_fields(type(self)):
+			self.object.register_change()
+		self.object.signal_serialize()
+
+	def attach_session(self, state: Dict[str, Any]) -> None:
+		"""Keep the session fields in state instead of the component. An empty state is filled with copies of the current values."""
+		if not state:
+			for name in session_fields(type(self)):
+				if name in self.__dict__:
+					state[name] = copy.copy(self.__dict__[name])
+		self._session = state
+
+	def store_session(self) -> None:
+		"""Copy the session fields into the component, so that they're stored with the object."""
+		for name, value in self.__dict__.get("_session", {}).items():
+			self.__dict__[name] = copy.copy(value)
 
 	@abstractmethod
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
@@ -20,7 +20,7 @@ class DestructibleComponent(Component):
 		self.object.destructible = self
 
 	def init(self, set_vars: Dict[str, object]) -> None:
-		comp = server.db.destructible_component[self.comp_id]
+		comp = server.static.destructible_component[self.comp_id]
 		self.object.stats.faction = comp[0]
 		self.death_rewards = comp[1]
 		self.object.stats._max_life = comp[2]
@@ -1,15 +1,17 @@
 import random
 
 from bitstream import c_int, WriteStream
-from ..game_object import Config, GameObject
+from ..game_object import Config, Field, Flag, GameObject
 from .component import Component
 
 _CYCLE_INTERVAL = 10
 
 class ExhibitComponent(Component):
+	_exhibit_flag = Flag()
+	_exhibited_lot = Field(_exhibit_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
-		self._flags["_exhibited_lot"] = "_exhibit_flag"
 		self._random_exhibit()
 
 	def _random_exhibit(self) -> None:
@@ -47,8 +47,8 @@ from persistent import Persistent
 from persistent.list import PersistentList
 
 from bitstream import c_bit, c_int, c_int64, c_uint, c_ushort, ReadStream, Serializable, WriteStream
-from ..commonserver import ServerDB
-from ..game_object import broadcast, Config, EI, EL, EV, GameObject, ObjectID, single
+from ..commonserver import StaticDB
+from ..game_object import broadcast, Config, EI, EL, EV, Field, Flag, GameObject, ObjectID, single
 from ..game_object import c_int as c_int_
 from ..game_object import c_int64 as c_int64_
 from ..game_object import c_uint as c_uint_
@@ -61,7 +61,7 @@ from .mission import TaskType
 log = logging.getLogger(__name__)
 
 class Stack(Persistent, Serializable):
-	def __init__(self, db: ServerDB, object_id: ObjectID, lot: int, count: int=1):
+	def __init__(self, db: StaticDB, object_id: ObjectID, lot: int, count: int=1):
 		self.object_id = object_id
 		self.lot = lot
 		self.count = count
@@ -123,10 +123,12 @@ class ItemComponent(Component):
 		out.write(c_bit(False))
 
 class InventoryComponent(Component):
+	equipped_items_flag = Flag()
+	equipped = Field(equipped_items_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.inventory = self
-		self._flags["equipped"] = "equipped_items_flag"
 		self.equipped: List[List[Stack]] = PersistentList()
 		self.equipped.append(PersistentList()) # current equip state
 		self.attr_changed("equipped")
@@ -139,8 +141,8 @@ class InventoryComponent(Component):
 		self.mission_objects: List[Stack] = PersistentList()
 		self.consumable_slot_lot = -1
 
-		if comp_id in server.db.inventory_component:
-			for item_lot, equip in server.db.inventory_component[comp_id]:
+		if comp_id in server.static.inventory_component:
+			for item_lot, equip in server.static.inventory_component[comp_id]:
 				item = self.add_item(item_lot, persistent=False, notify_client=False)
 				if equip:
 					self.on_equip_inventory(item_to_equip=item.object_id)
@@ -220,9 +222,9 @@ class InventoryComponent(Component):
 				break
 
 	def add_item(self, lot: int, count: int=1, module_lots: Tuple[int, int, int]=None, inventory_type: int=None, source_type: int=0, show_flying_loot: bool=True, persistent: bool=True, notify_client: bool=True) -> Stack:
-		for component_type, component_id in server.db.components_registry[lot]:
+		for component_type, component_id in server.static.components_registry[lot]:
 			if component_type == 11: # ItemComponent, make an enum for this somewhen
-				item_type, stack_size = server.db.item_component[component_id][1:3]
+				item_type, stack_size = server.static.item_component[component_id][1:3]
 				break
 		else:
 			raise ValueError("lot", lot)
@@ -277,7 +279,7 @@ class InventoryComponent(Component):
 				else:
 					added_count = min(stack_size, count)
 				count -= added_count
-				stack = Stack(server.db, object_id, lot, added_count)
+				stack = Stack(server.static, object_id, lot, added_count)
 				if module_lots:
 					stack.module_lots = module_lots
 
@@ -376,7 +378,7 @@ class InventoryComponent(Component):
 					if hasattr(self.object, "char"):
 						self.object.skill.add_skill_for_item(item)
 
-						for set_items, skill_set_with_2, skill_set_with_3, skill_set_with_4, skill_set_with_5, skill_set_with_6 in server.db.item_sets:
+						for set_items, skill_set_with_2, skill_set_with_3, skill_set_with_4, skill_set_with_5, skill_set_with_6 in server.static.item_sets:
 							if item.lot in set_items:
 								set_items_equipped = 0
 								for eq_item in self.equipped[-1]:
@@ -427,7 +429,7 @@ class InventoryComponent(Component):
 				if hasattr(self.object, "char"):
 					self.object.skill.remove_skill_for_item(item)
 
-					for set_items, skill_set_with_2, skill_set_with_3, skill_set_with_4, skill_set_with_5, skill_set_with_6 in server.db.item_sets:
+					for set_items, skill_set_with_2, skill_set_with_3, skill_set_with_4, skill_set_with_5, skill_set_with_6 in server.static.item_sets:
 						if item.lot in set_items:
 							set_items_equipped = 1
 							for eq_item in self.equipped[-1]:
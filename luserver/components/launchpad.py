@@ -14,9 +14,9 @@ class LaunchpadComponent(Component):
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.launchpad = self
-		self._target_world = server.db.launchpad_component[comp_id][0]
-		self._default_world_id = server.db.launchpad_component[comp_id][1]
-		self._respawn_point_name = server.db.launchpad_component[comp_id][2]
+		self._target_world = server.static.launchpad_component[comp_id][0]
+		self._default_world_id = server.static.launchpad_component[comp_id][1]
+		self._respawn_point_name = server.static.launchpad_component[comp_id][2]
 		if "respawn_point_name" in set_vars:
 			self._respawn_point_name = set_vars["respawn_point_name"]
 
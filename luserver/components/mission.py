@@ -65,7 +65,7 @@ class MissionProgress(Persistent):
 
 import logging
 import random
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from bitstream import WriteStream
 from ..game_object import c_int, Config, EB, EI, EO, EP, GameObject, ObjectID, Player, single
@@ -74,15 +74,82 @@ from .component import Component
 
 log = logging.getLogger(__name__)
 
+TaskKey = Tuple[int, object]
+
+def task_keys(task_type: int, target: object) -> Iterator[TaskKey]:
+	"""Keys of a task for indexing by (task type, target). Tasks with multiple targets have one key per target."""
+	if isinstance(target, tuple):
+		for target_id in target:
+			yield task_type, target_id
+	else:
+		yield task_type, target
+
+_index_version: Optional[int] = None
+_achievements: Tuple[int, ...] = ()
+_achievements_by_task: Dict[TaskKey, Tuple[int, ...]] = {}
+_dependents: Dict[int, Tuple[int, ...]] = {}
+
+def _index_missions() -> None:
+	global _index_version, _achievements, _achievements_by_task, _dependents
+	achievements = []
+	by_task: Dict[TaskKey, List[int]] = {}
+	dependents: Dict[int, List[int]] = {}
+	for mission_id, data in server.static.missions.items():
+		for prereq_ors in data[1]:
+			for prereq_mission in prereq_ors:
+				if isinstance(prereq_mission, tuple):
+					prereq_mission = prereq_mission[0]
+				ids = dependents.setdefault(prereq_mission, [])
+				if mission_id not in ids:
+					ids.append(mission_id)
+		is_mission = data[3] # if False, it's an achievement (internally works the same as missions, that's why the naming is weird)
+		if not is_mission:
+			achievements.append(mission_id)
+			for task_type, target, target_value, _ in data[2]:
+				if target_value > 0:
+					for key in task_keys(task_type, target):
+						ids = by_task.setdefault(key, [])
+						if mission_id not in ids:
+							ids.append(mission_id)
+	_achievements = tuple(achievements)
+	_achievements_by_task = {key: tuple(ids) for key, ids in by_task.items()}
+	_dependents = {mission_id: tuple(ids) for mission_id, ids in dependents.items()}
+	_index_version = server.static.version
+
+def achievements() -> Sequence[int]:
+	"""IDs of all achievements, derived from the static mission table."""
+	if _index_version != server.static.version:
+		_index_missions()
+	return _achievements
+
+def achievements_with_task(task_type: int, target: object) -> Sequence[int]:
+	"""IDs of the achievements with a task of task_type for target, derived from the static mission table."""
+	if _index_version != server.static.version:
+		_index_missions()
+	return _achievements_by_task.get((task_type, target), ())
+
+def dependents(mission_id: int) -> Sequence[int]:
+	"""IDs of the missions that have mission_id in their prereqs."""
+	if _index_version != server.static.version:
+		_index_missions()
+	return _dependents.get(mission_id, ())
+
+def is_achievement(mission_id: int) -> bool:
+	return mission_id in server.static.missions and not server.static.missions[mission_id][3]
+
 def check_prereqs(mission_id: int, player: Player) -> bool:
-	prereqs = server.db.missions[mission_id][1]
+	"""Cached per player, see CharMission.prereqs_met."""
+	return player.char.mission.prereqs_met(mission_id)
+
+def evaluate_prereqs(mission_id: int, player: Player) -> bool:
+	prereqs = server.static.missions[mission_id][1]
 	for prereq_ors in prereqs:
 		for prereq_mission in prereq_ors:
 			if isinstance(prereq_mission, tuple): # prereq requires special mission state
 				prereq_mission, prereq_mission_state = prereq_mission
 			else:
 				prereq_mission_state = MissionState.Completed
-			if prereq_mission in player.char.mission.missions and player.char.mission.missions[prereq_mission].state == prereq_mission_state:
+			if player.char.mission.state(prereq_mission) == prereq_mission_state:
 				break # an element was found, this prereq_ors is satisfied
 		else:
 			break # no elements found, not satisfied, checking further prereq_ors unnecessary
@@ -94,7 +161,7 @@ class MissionNPCComponent(Component):
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.mission = self
-		self.missions = server.db.mission_npc_component[comp_id]
+		self.missions = server.static.mission_npc_component[comp_id]
 		self.random_mission_choices: Dict[ObjectID, int] = {}
 
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
@@ -113,8 +180,8 @@ class MissionNPCComponent(Component):
 						break
 				elif offers_mission:
 					log.debug("assessing %i", mission_id)
-					is_random = server.db.missions[mission_id][4]
-					random_pool = server.db.missions[mission_id][5]
+					is_random = server.static.missions[mission_id][4]
+					random_pool = server.static.missions[mission_id][5]
 					if is_random:
 						if random_pool and check_prereqs(mission_id, player):
 							if player.object_id not in self.random_mission_choices:
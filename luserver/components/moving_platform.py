@@ -1,7 +1,7 @@
 from typing import List, Tuple
 
 from bitstream import c_bit, c_float, c_int, c_uint, WriteStream
-from ..game_object import CallbackID, Config, GameObject, Player
+from ..game_object import CallbackID, Config, Field, Flag, GameObject, Player
 from ..world import server
 from ..math.vector import Vector3
 from .component import Component
@@ -24,17 +24,18 @@ class MovementState:
 	Stopped = 28
 
 class MovingPlatformComponent(Component):
+	moving_platform_flag = Flag()
+	movement_state = Field(moving_platform_flag)
+	desired_waypoint_index = Field(moving_platform_flag)
+	unknown_bool = Field(moving_platform_flag)
+	in_reverse = Field(moving_platform_flag)
+	current_position = Field(moving_platform_flag)
+	current_waypoint_index = Field(moving_platform_flag)
+	next_waypoint_index = Field(moving_platform_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.moving_platform = self
-		self._flags["movement_state"] = "moving_platform_flag"
-		self._flags["desired_waypoint_index"] = "moving_platform_flag"
-		self._flags["unknown_bool"] = "moving_platform_flag"
-		self._flags["in_reverse"] = "moving_platform_flag"
-		self._flags["current_position"] = "moving_platform_flag"
-		self._flags["current_waypoint_index"] = "moving_platform_flag"
-		self._flags["next_waypoint_index"] = "moving_platform_flag"
-		self.moving_platform_flag = False
 		self.movement_state = MovementState.Stopped
 		self.desired_waypoint_index = -1
 		self.unknown_bool = False # possibly "stop on reaching desired waypoint"
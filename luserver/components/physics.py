@@ -1,21 +1,24 @@
 import enum
 import random
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Dict, ItemsView, Iterator, List, Optional, Set, Tuple
 
 from bitstream import c_bit, c_float, c_int64, c_ubyte, c_uint, WriteStream
-from ..game_object import Config, broadcast, EBY, GameObject, PhysicsObject, Player
+from ..game_object import Config, broadcast, EBY, Field, Flag, GameObject, PhysicsObject, Player, SessionField
 from ..world import Event, server
 from ..math.quaternion import Quaternion
+from ..math.spatial import SpatialHash
 from ..math.vector import Vector3
 from .component import Component
 
 class PhysicsComponent(Component):
+	physics_data_flag = Flag()
+	position = SessionField(physics_data_flag)
+	rotation = SessionField(physics_data_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.physics = self
-		self._flags["position"] = "physics_data_flag"
-		self._flags["rotation"] = "physics_data_flag"
 		self.position = Vector3()
 		self.rotation = Quaternion()
 
@@ -28,6 +31,12 @@ class PhysicsComponent(Component):
 		elif "parent" in set_vars and isinstance(set_vars["parent"], PhysicsObject):
 			self.rotation.update(set_vars["parent"].physics.rotation)
 
+	def attr_changed(self, name: str) -> None:
+		super().attr_changed(name)
+		if name == "position":
+			server.general.tracked_objects.moved(self.object)
+			server.faction_index.changed(self.object)
+
 	def on_destruction(self) -> None:
 		if self.object in server.general.tracked_objects:
 			del server.general.tracked_objects[self.object]
@@ -58,19 +67,20 @@ class PhysicsComponent(Component):
 		owner.char.drop_client_loot(spawn_position=self.position, final_position=loot_position, currency=0, item_template=lot, loot_id=object_id, owner=owner, source_obj=self.object)
 
 class Controllable(PhysicsComponent):
+	on_ground = SessionField(PhysicsComponent.physics_data_flag)
+	unknown_bool = SessionField(PhysicsComponent.physics_data_flag)
+	velocity_flag = Flag(PhysicsComponent.physics_data_flag)
+	velocity = SessionField(velocity_flag)
+	angular_velocity_flag = Flag(PhysicsComponent.physics_data_flag)
+	angular_velocity = SessionField(angular_velocity_flag)
+	unknown_flag = Flag(PhysicsComponent.physics_data_flag)
+	unknown_object_id = SessionField(unknown_flag)
+	unknown_float3 = SessionField(unknown_flag)
+	deeper_unknown_flag = Flag(unknown_flag)
+	deeper_unknown_float3 = SessionField(deeper_unknown_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
-		self._flags["on_ground"] = "physics_data_flag"
-		self._flags["unknown_bool"] = "physics_data_flag"
-		self._flags["velocity_flag"] = "physics_data_flag"
-		self._flags["velocity"] = "velocity_flag"
-		self._flags["angular_velocity_flag"] = "physics_data_flag"
-		self._flags["angular_velocity"] = "angular_velocity_flag"
-		self._flags["unknown_flag"] = "physics_data_flag"
-		self._flags["unknown_object_id"] = "unknown_flag"
-		self._flags["unknown_float3"] = "unknown_flag"
-		self._flags["deeper_unknown_flag"] = "unknown_flag"
-		self._flags["deeper_unknown_float3"] = "deeper_unknown_flag"
 		self.on_ground = True
 		self.unknown_bool = False
 		self.velocity = Vector3()
@@ -184,6 +194,10 @@ class Collider(ABC):
 	def is_point_within(self, point: Vector3) -> bool:
 		pass
 
+	@abstractmethod
+	def bounds(self) -> Tuple[Vector3, Vector3]:
+		"""Minimum and maximum corner of a box containing the collider."""
+
 # currently for static objects only, does not handle position/rotation updates
 class AABB(Collider): # axis aligned bounding box
 	def __init__(self, obj: PhysicsObject):
@@ -227,15 +241,85 @@ class AABB(Collider): # axis aligned bounding box
 		       self.min.y < point.y < self.max.y and \
 		       self.min.z < point.z < self.max.z
 
+	def bounds(self) -> Tuple[Vector3, Vector3]:
+		return self.min, self.max
+
 # for dynamic objects
 class CollisionSphere(Collider):
 	def __init__(self, obj: PhysicsObject, radius: int):
 		self.position = obj.physics.position
+		self.radius = radius
 		self.sq_radius = radius**2
 
 	def is_point_within(self, point: Vector3) -> bool:
 		return self.position.sq_distance(point) < self.sq_radius
 
+	def bounds(self) -> Tuple[Vector3, Vector3]:
+		return self.position - Vector3(self.radius, self.radius, self.radius), self.position + Vector3(self.radius, self.radius, self.radius)
+
+class ColliderIndex:
+	"""
+	Colliders of objects that have enter/exit handlers, bucketed in a spatial hash so that a point only needs to be checked against the colliders near it.
+	Supports the dict operations used on tracked_objects. Collision spheres of moving objects are re-bucketed before the next query after their object moved.
+	"""
+	CELL_SIZE = 32
+
+	def __init__(self) -> None:
+		self._colliders: Dict[GameObject, Collider] = {}
+		self._order: Dict[GameObject, int] = {}
+		self._next_order = 0
+		self._grid: SpatialHash[GameObject] = SpatialHash(self.CELL_SIZE)
+		self._moved: Set[GameObject] = set()
+
+	def __contains__(self, obj: GameObject) -> bool:
+		return obj in self._colliders
+
+	def __getitem__(self, obj: GameObject) -> Collider:
+		return self._colliders[obj]
+
+	def __setitem__(self, obj: GameObject, collider: Collider) -> None:
+		if obj in self._colliders:
+			del self[obj]
+		self._colliders[obj] = collider
+		self._order[obj] = self._next_order
+		self._next_order += 1
+		self._grid.insert_area(obj, *collider.bounds())
+
+	def __delitem__(self, obj: GameObject) -> None:
+		del self._colliders[obj]
+		del self._order[obj]
+		self._grid.remove(obj)
+		self._moved.discard(obj)
+
+	def __iter__(self) -> Iterator[GameObject]:
+		return iter(self._colliders)
+
+	def __len__(self) -> int:
+		return len(self._colliders)
+
+	def copy(self) -> Dict[GameObject, Collider]:
+		return self._colliders.copy()
+
+	def items(self) -> ItemsView[GameObject, Collider]:
+		return self._colliders.items()
+
+	def moved(self, obj: GameObject) -> None:
+		if obj in self._colliders and isinstance(self._colliders[obj], CollisionSphere):
+			self._moved.add(obj)
+
+	def colliding(self, point: Vector3) -> List[GameObject]:
+		"""Objects whose collider contains the point, in the order the colliders were added."""
+		if self._moved:
+			for obj in self._moved:
+				collider = self._colliders[obj]
+				# the position may have been replaced instead of updated in place
+				collider.position = obj.physics.position
+				self._grid.move_area(obj, *collider.bounds())
+			self._moved.clear()
+		hits = [obj for obj in self._grid.at(point) if self._colliders[obj].is_point_within(point)]
+		hits.sort(key=self._order.__getitem__)
+		return hits
+
 class PhysicsEffect(enum.IntEnum):
 	Push = 0
 	Attract = 1
@@ -244,12 +328,14 @@ class PhysicsEffect(enum.IntEnum):
 	Friction = 4
 
 class PhantomPhysicsComponent(PhysicsComponent):
+	physics_effect_flag = Flag()
+	physics_effect_active = Field(physics_effect_flag)
+	physics_effect_type = Field(physics_effect_flag)
+	physics_effect_amount = Field(physics_effect_flag)
+	physics_effect_direction = Field(physics_effect_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
-		self._flags["physics_effect_active"] = "physics_effect_flag"
-		self._flags["physics_effect_type"] = "physics_effect_flag"
-		self._flags["physics_effect_amount"] = "physics_effect_flag"
-		self._flags["physics_effect_direction"] = "physics_effect_flag"
 		self.physics_effect_active = False
 		self.physics_effect_type = 0
 		self.physics_effect_amount = 0
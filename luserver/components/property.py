@@ -199,11 +199,11 @@ class PropertyManagementComponent(Component):
 		pass
 
 	def on_query_property_data(self, player: Player) -> None:
-		if server.world_id[0] not in server.db.property_template:
+		if server.world_id[0] not in server.static.property_template:
 			return
 		property = PropertyData()
 		property.owner = player
-		property.path = server.db.property_template[server.world_id[0]]
+		property.path = server.static.property_template[server.world_id[0]]
 
 		self.download_property_data(property, player=player)
 
@@ -237,11 +237,11 @@ class PropertyVendorComponent(Component):
 		pass
 
 	def on_query_property_data(self, player: Player) -> None:
-		if server.world_id[0] not in server.db.property_template:
+		if server.world_id[0] not in server.static.property_template:
 			return
 		property = PropertyData()
 		property.owner = player
-		property.path = server.db.property_template[server.world_id[0]]
+		property.path = server.static.property_template[server.world_id[0]]
 
 		self.download_property_data(property, player=player)
 
@@ -1,7 +1,7 @@
 from typing import Dict
 
 from bitstream import c_bit, c_int64, c_uint, c_ushort, WriteStream
-from ..game_object import broadcast, c_int, Config, EI, ES, GameObject, Player
+from ..game_object import broadcast, c_int, Config, EI, ES, Field, Flag, GameObject, Player
 from ..game_object import c_int64 as c_int64_
 from ..game_object import c_uint as c_uint_
 from .scripted_activity import ScriptedActivityComponent
@@ -16,10 +16,12 @@ class RacingNotificationType:
 	LeaderboardUpdated = 6
 
 class RacingControlComponent(ScriptedActivityComponent):
+	player_data_flag = Flag()
+	player_data = Field(player_data_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.racing_control = self
-		self._flags["player_data"] = "player_data_flag"
 		self.player_data: Dict[Player, object] = {}
 
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
@@ -2,7 +2,7 @@ import time
 from typing import List, Optional
 
 from bitstream import c_bit, c_float, c_uint, WriteStream
-from ..game_object import broadcast, CallbackID, Config, EB, EF, EI, EO, EP, GameObject, OBJ_NONE, Player, StatsObject
+from ..game_object import broadcast, CallbackID, Config, EB, EF, EI, EO, EP, Field, Flag, GameObject, OBJ_NONE, Player, StatsObject
 from ..game_object import c_int as c_int_
 from ..game_object import c_uint as c_uint_
 from ..world import server
@@ -28,11 +28,15 @@ ACTIVATOR_LOT = 6604
 
 class RebuildComponent(ScriptedActivityComponent):
 	object: StatsObject
+	_rebuild_flag = Flag()
+	_rebuild_state = Field(_rebuild_flag)
+	success = Field(_rebuild_flag)
+	enabled = Field(_rebuild_flag)
 
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.rebuild = self
-		db_entry = server.db.rebuild_component[comp_id]
+		db_entry = server.static.rebuild_component[comp_id]
 		self.complete_time = set_vars.get("rebuild_complete_time", db_entry[0])
 		self.smash_time = set_vars.get("rebuild_smash_time", db_entry[1])
 		self.reset_time = db_entry[2]
@@ -40,15 +44,12 @@ class RebuildComponent(ScriptedActivityComponent):
 		self.callback_handles: List[CallbackID] = []
 		self.rebuild_start_time: float = 0
 		self.last_progress: float = 0
-		self._flags["_rebuild_state"] = "_rebuild_flag"
-		self._flags["success"] = "_rebuild_flag"
-		self._flags["enabled"] = "_rebuild_flag"
 		self._rebuild_state = RebuildState.Open
 		self.success = False
 		self.enabled = True
 		self.activity_id = set_vars.get("activity_id", db_entry[4])
-		if self.activity_id in server.db.activity_rewards:
-			self.completion_rewards = server.db.activity_rewards[self.activity_id][0][1]
+		if self.activity_id in server.static.activity_rewards:
+			self.completion_rewards = server.static.activity_rewards[self.activity_id][0][1]
 		else:
 			self.completion_rewards = None, None, None
 
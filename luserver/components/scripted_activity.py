@@ -2,22 +2,24 @@ import asyncio
 from typing import Dict, List
 
 from bitstream import c_float, c_int64, c_uint, WriteStream
-from ..game_object import broadcast, c_int, Config, EB, EBY, EI, EL, ES, EO, GameObject, ObjectID, Player, single
+from ..game_object import broadcast, c_int, Config, EB, EBY, EI, EL, ES, EO, Field, Flag, GameObject, ObjectID, Player, single
 from ..world import server
 from ..ldf import LDF
 from .component import Component
 
 class ScriptedActivityComponent(Component):
+	activity_flag = Flag()
+	activity_values = Field(activity_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.scripted_activity = self
-		self._flags["activity_values"] = "activity_flag"
 		self.activity_values: Dict[ObjectID, List[float]] = {}
 		self.activity_id = comp_id
 		if "transfer_world_id" in set_vars:
 			self.transfer_world_id = set_vars["transfer_world_id"]
-		elif self.activity_id in server.db.activities:
-			activity = server.db.activities[self.activity_id]
+		elif self.activity_id in server.static.activities:
+			activity = server.static.activities[self.activity_id]
 			self.transfer_world_id = activity[0]
 		else:
 			self.transfer_world_id = None
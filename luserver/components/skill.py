@@ -11,7 +11,7 @@ from ..math.vector import Vector3
 from .component import Component
 from .inventory import InventoryType, ItemType, Stack
 from .mission import TaskType
-from .behaviors import ApplyBuff, Behavior, Buff, Jetpack, SkillCastFailed, SpawnObject, TargetCaster
+from .behaviors import ApplyBuff, Behavior, behavior_compiler, Buff, Jetpack, skill_payloads, SkillCastFailed, SpawnObject, TargetCaster
 
 log = logging.getLogger(__name__)
 
@@ -108,7 +108,7 @@ class SkillComponent(Component):
 		self.last_ui_skill_handle = self.last_ui_handle
 		self.skill_cast_failed = False
 		self.everlasting = False
-		self.skills = [skill_id for skill_id, _ in server.db.object_skills.get(self.object.lot, [])]
+		self.skills = [skill_id for skill_id, _ in server.static.object_skills.get(self.object.lot, [])]
 
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
 		if is_creation:
@@ -126,30 +126,26 @@ class SkillComponent(Component):
 		self.last_ui_skill_handle = self.last_ui_handle
 		self.last_ui_handle += 1
 
-		bitstream = WriteStream()
-		behavior = server.db.skill_behavior[skill_id][0]
-		behavior.serialize(bitstream, self.object, target, 0)
-		self.on_start_skill(skill_id=skill_id, cast_type=cast_type, optional_target_id=target.object_id, ui_skill_handle=self.last_ui_skill_handle, optional_originator_id=0, originator_rot=Quaternion(0, 0, 0, 0), bitstream=bytes(bitstream))
+		behavior = server.static.skill_behavior[skill_id][0]
+		bitstream = skill_payloads.payload((behavior,), self.object, target)
+		self.on_start_skill(skill_id=skill_id, cast_type=cast_type, optional_target_id=target.object_id, ui_skill_handle=self.last_ui_skill_handle, optional_originator_id=0, originator_rot=Quaternion(0, 0, 0, 0), bitstream=bitstream)
 
 	def cast_sync_skill(self, delay: float, behavior: Behavior, target: GameObject) -> int:
 		ui_behavior_handle = self.last_ui_handle
 		self.last_ui_handle += 1
 		self.delayed_behaviors[ui_behavior_handle] = behavior
 
-		bitstream = WriteStream()
-		behavior.serialize(bitstream, self.object, target, 0)
+		bitstream = skill_payloads.payload((behavior,), self.object, target)
 
-		self.object.call_later(delay, lambda: self.on_sync_skill(bitstream=bytes(bitstream), ui_behavior_handle=ui_behavior_handle, ui_skill_handle=self.last_ui_skill_handle))
+		self.object.call_later(delay, lambda: self.on_sync_skill(bitstream=bitstream, ui_behavior_handle=ui_behavior_handle, ui_skill_handle=self.last_ui_skill_handle))
 		return ui_behavior_handle
 
 	def cast_projectile(self, proj_behavs: Iterable[Behavior], target: GameObject) -> ObjectID:
-		bitstream = WriteStream()
 		proj_id = server.new_spawned_id()
-		for behav in proj_behavs:
-			self.original_target_id = target.object_id
-			behav.serialize(bitstream, self.object, target, 0)
+		self.original_target_id = target.object_id
+		bitstream = skill_payloads.payload(proj_behavs, self.object, target)
 		delay = 1
-		self.object.call_later(delay, lambda: self.on_request_server_projectile_impact(proj_id, target.object_id, bytes(bitstream)))
+		self.object.call_later(delay, lambda: self.on_request_server_projectile_impact(proj_id, target.object_id, bitstream))
 		return proj_id
 
 	@broadcast
@@ -168,7 +164,7 @@ class SkillComponent(Component):
 		else:
 			player = self.object # exclude self
 
-		self.echo_start_skill(used_mouse, caster_latency, cast_type, last_clicked_posit, optional_originator_id, optional_target_id, originator_rot, bitstream, skill_id, ui_skill_handle, player=player)
+		self.echo_start_skill(used_mouse, caster_latency, cast_type, last_clicked_posit, optional_originator_id, optional_target_id, originator_rot, bitstream, skill_id, ui_skill_handle, player=player, near=self.object)
 
 		stream = ReadStream(bitstream)
 
@@ -182,10 +178,12 @@ class SkillComponent(Component):
 		else:
 			target = self.object
 		self.picked_target_id = optional_target_id
-		behavior, imagination_cost = server.db.skill_behavior[skill_id]
+		imagination_cost = server.static.skill_behavior[skill_id][1]
+		deserialize = behavior_compiler.compile_skill(skill_id)
 		self.original_target_id = target.object_id
 		self.skill_cast_failed = False
-		behavior.deserialize(stream, self.object, target, 0)
+		if deserialize is not None:
+			deserialize(stream, self.object, target)
 		if not self.skill_cast_failed:
 			self.object.stats.imagination -= imagination_cost
 
@@ -216,7 +214,7 @@ class SkillComponent(Component):
 			player = self.object
 		else:
 			player = None
-		self.echo_sync_skill(done, bitstream, ui_behavior_handle, ui_skill_handle, player=player) # don't send echo to self
+		self.echo_sync_skill(done, bitstream, ui_behavior_handle, ui_skill_handle, player=player, near=self.object) # don't send echo to self
 		if ui_behavior_handle not in self.delayed_behaviors:
 			log.error("Handle %i not handled!", ui_behavior_handle)
 			return
@@ -227,13 +225,13 @@ class SkillComponent(Component):
 			behavior_id = stream.read(c_uint)
 			target_id = stream.read(c_uint64)
 			if behavior_id != 0:
-				behavior = server.db.behavior[behavior_id]
+				behavior = server.static.behavior[behavior_id]
 			if target_id != 0:
 				target = server.game_objects[target_id]
 
 		if behavior is not None: # no, this is not an "else" from above
 			self.original_target_id = target.object_id
-			behavior.deserialize(stream, self.object, target, 0)
+			behavior.deserialize(stream, self.object, target)
 		if not stream.all_read():
 			log.warning("not all read, remaining: %s", stream.read_remaining())
 		if done:
@@ -255,7 +253,7 @@ class SkillComponent(Component):
 
 		for behav in self.projectile_behaviors[local_id]:
 			self.original_target_id = target.object_id
-			behav.deserialize(stream, self.object, target, 0)
+			behav.deserialize(stream, self.object, target)
 		del self.projectile_behaviors[local_id]
 		# todo: do client projectile impact
 
@@ -273,9 +271,9 @@ class SkillComponent(Component):
 			self.object.char.set_jet_pack_mode(enable=False)
 
 	def add_skill_for_item(self, item: Stack, add_buffs: bool=True) -> None:
-		if item.lot in server.db.object_skills:
-			for skill_id, cast_on_type in server.db.object_skills[item.lot]:
-				behavior = server.db.skill_behavior[skill_id][0]
+		if item.lot in server.static.object_skills:
+			for skill_id, cast_on_type in server.static.object_skills[item.lot]:
+				behavior = server.static.skill_behavior[skill_id][0]
 				if cast_on_type == CastType.AddSkill:
 					slot_id = SkillSlot.RightHand
 					if item.item_type == ItemType.Hat:
@@ -292,9 +290,9 @@ class SkillComponent(Component):
 		self.cast_skill(skill_id, cast_type=CastType.Cast)
 
 	def remove_skill_for_item(self, item: Stack) -> None:
-		if item.lot in server.db.object_skills:
-			for skill_id, cast_on_type in server.db.object_skills[item.lot]:
-				behavior = server.db.skill_behavior[skill_id][0]
+		if item.lot in server.static.object_skills:
+			for skill_id, cast_on_type in server.static.object_skills[item.lot]:
+				behavior = server.static.skill_behavior[skill_id][0]
 				if isinstance(behavior, PASSIVE_BEHAVIORS):
 					assert cast_on_type == 1
 					self.undo_behavior(behavior)
@@ -302,6 +300,6 @@ class SkillComponent(Component):
 					self.remove_skill(skill_id=skill_id)
 
 	def remove_skill_server(self, skill_id: int) -> None:
-		behavior = server.db.skill_behavior[skill_id][0]
+		behavior = server.static.skill_behavior[skill_id][0]
 		if isinstance(behavior, PASSIVE_BEHAVIORS):
 			self.undo_behavior(behavior)
@@ -1,23 +1,100 @@
 import logging
+from typing import Collection, Dict, List, Optional, Set
 
 from bitstream import c_bit, c_float, c_int, c_uint, WriteStream
-from ..game_object import broadcast, Config, EF, ES, EO, GameObject, OBJ_NONE, Player
+from ..game_object import broadcast, Config, EF, ES, EO, Flag, GameObject, OBJ_NONE, Player, SessionField
 from ..game_object import c_uint as c_uint_
+from ..world import server
+from ..math.spatial import SpatialHash
+from ..math.vector import Vector3
 from .component import Component
 
 log = logging.getLogger(__name__)
 
+class FactionIndex:
+	"""
+	Spawned objects with stats, bucketed by faction and then by position.
+	Used for finding targets of a set of factions near a position without going through all objects.
+	Faction and position changes are applied before the next query.
+	"""
+	CELL_SIZE = 16
+
+	def __init__(self) -> None:
+		self._grids: Dict[int, SpatialHash[GameObject]] = {}
+		self._factions: Dict[GameObject, Optional[int]] = {}
+		self._changed: Set[GameObject] = set()
+
+	def add(self, obj: GameObject) -> None:
+		if hasattr(obj, "stats") and hasattr(obj, "physics"):
+			self._factions[obj] = None
+			self._changed.add(obj)
+
+	def remove(self, obj: GameObject) -> None:
+		if obj in self._factions:
+			faction = self._factions.pop(obj)
+			if faction is not None:
+				self._grids[faction].remove(obj)
+			self._changed.discard(obj)
+
+	def changed(self, obj: GameObject) -> None:
+		"""Register a faction or position change of the object."""
+		if obj in self._factions:
+			self._changed.add(obj)
+
+	def _update(self) -> None:
+		for obj in self._changed:
+			old_faction = self._factions[obj]
+			new_faction = obj.stats.faction
+			if old_faction == new_faction:
+				self._grids[new_faction].move(obj, obj.physics.position)
+				continue
+			if old_faction is not None:
+				self._grids[old_faction].remove(obj)
+			self._grids.setdefault(new_faction, SpatialHash(self.CELL_SIZE)).insert(obj, obj.physics.position)
+			self._factions[obj] = new_faction
+		self._changed.clear()
+
+	def within(self, position: Vector3, radius: float, factions: Collection[int]) -> List[GameObject]:
+		"""Objects of any of the factions with a distance of less than radius to position."""
+		if self._changed:
+			self._update()
+		sq_radius = radius**2
+		result = []
+		for faction in factions:
+			if faction in self._grids:
+				for obj in self._grids[faction].query(position, radius):
+					if position.sq_distance(obj.physics.position) < sq_radius:
+						result.append(obj)
+		return result
+
+	def nearest(self, position: Vector3, radius: float, factions: Collection[int]) -> Optional[GameObject]:
+		"""The object of any of the factions that is closest to position, if it is closer than radius."""
+		nearest = None
+		nearest_dist = radius**2
+		for obj in self.within(position, radius, factions):
+			dist = position.sq_distance(obj.physics.position)
+			if dist < nearest_dist:
+				nearest = obj
+				nearest_dist = dist
+		return nearest
+
+	def nearest_enemy(self, obj: GameObject, radius: float) -> Optional[GameObject]:
+		"""The closest object with a faction that is an enemy of the object's faction, if it is closer than radius."""
+		return self.nearest(obj.physics.position, radius, server.static.factions.get(obj.stats.faction, ()))
+
 class StatsSubcomponent(Component):
+	stats_flag = Flag()
+	_max_life = SessionField(stats_flag)
+	_max_armor = SessionField(stats_flag)
+	_max_imagination = SessionField(stats_flag)
+	_life = SessionField(stats_flag)
+	_armor = SessionField(stats_flag)
+	_imagination = SessionField(stats_flag)
+	faction = SessionField(stats_flag)
+
 	def __init__(self, obj: GameObject, set_vars: Config, comp_id: int):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.stats = self
-		self._flags["_max_life"] = "stats_flag"
-		self._flags["_max_armor"] = "stats_flag"
-		self._flags["_max_imagination"] = "stats_flag"
-		self._flags["life"] = "stats_flag"
-		self._flags["armor"] = "stats_flag"
-		self._flags["imagination"] = "stats_flag"
-		self._flags["faction"] = "stats_flag"
 		if not hasattr(self.object, "destructible"):
 			self._max_life = 1
 			self._max_armor = 0
@@ -132,6 +209,11 @@ class StatsSubcomponent(Component):
 
 		out.write(c_bit(False))
 
+	def attr_changed(self, name: str) -> None:
+		super().attr_changed(name)
+		if name == "faction":
+			server.faction_index.changed(self.object)
+
 	def on_destruction(self) -> None:
 		if self.object.spawner_object is not None:
 			self.object.spawner_object.handle("spawned_destruction")
@@ -14,8 +14,8 @@ class VendorComponent(Component):
 		super().__init__(obj, set_vars, comp_id)
 		self.object.vendor = self
 		self.items_for_sale: List[Tuple[int, bool, int]] = []
-		for row in server.db.vendor_component[comp_id]:
-			self.items_for_sale.extend(server.db.loot_table[row[0]])
+		for row in server.static.vendor_component[comp_id]:
+			self.items_for_sale.extend(server.static.loot_table[row[0]])
 
 	def serialize(self, out: WriteStream, is_creation: bool) -> None:
 		out.write(c_bit(False))
@@ -97,43 +97,149 @@ class Config(TypedDict, total=False):
 	spawn_net_on_smash: str
 	transfer_world_id: int
 
-class FlagObject:
-	def __init__(self) -> None:
-		self._flags: Dict[str, str] = {}
+_handler_tables: Dict[type, Dict[str, str]] = {}
 
-	def __setattr__(self, name: str, value: object) -> None:
-		self.attr_changed(name)
-		super().__setattr__(name, value)
+def handler_table(cls: type) -> Dict[str, str]:
+	"""Map event names to the names of the on_* handler methods of a class. Computed once per class."""
+	if cls not in _handler_tables:
+		_handler_tables[cls] = {name[3:]: name for name in dir(cls) if name.startswith("on_") and callable(getattr(cls, name))}
+	return _handler_tables[cls]
+
+class Flag:
+	"""
+	A dirty flag of a FlagObject, declared in the class body. Each flag is a bit in the dirty mask of the object.
+	Flags can be nested in a parent flag, setting a flag also sets its parents.
+	Reading the attribute returns whether the flag is set, assigning to it sets or resets it.
+	"""
+	_next_bit = 1
+
+	def __init__(self, parent: "Flag"=None):
+		self.bit = Flag._next_bit
+		Flag._next_bit <<= 1
+		self.mask = self.bit
+		if parent is not None:
+			self.mask |= parent.mask
+
+	def __get__(self, instance: Optional["FlagObject"], owner: type) -> Any:
+		if instance is None:
+			return self
+		return bool(instance._dirty & self.bit)
+
+	def __set__(self, instance: "FlagObject", value: bool) -> None:
+		if value:
+			instance.set_dirty(self.mask)
+		elif instance._dirty & self.bit:
+			instance._dirty &= ~self.bit
+
+class Field:
+	"""
+	A serialized attribute of a FlagObject, declared in the class body with the flag it belongs to.
+	Assigning to the attribute sets the flag, except for the first assignment, which is part of the object's creation.
+	"""
+	def __init__(self, flag: Flag):
+		self.flag = flag
+
+	def __set_name__(self, owner: type, name: str) -> None:
+		self.name = name
+
+	def __get__(self, instance: Optional["FlagObject"], owner: type) -> Any:
+		if instance is None:
+			return self
+		try:
+			return instance.__dict__[self.name]
+		except KeyError:
+			raise AttributeError(self.name) from None
+
+	def __set__(self, instance: "FlagObject", value: object) -> None:
+		attrs = instance.__dict__
+		changed = self.name in attrs
+		attrs[self.name] = value
+		if changed:
+			instance.attr_changed(self.name)
+
+class SessionField(Field):
+	"""
+	A Field that is runtime state of a player's session, like the position or the life of a player.
+	While the player is in the world, the value is kept in the session state of the component instead of the component itself, and changes don't register the character as changed.
+	Player.checkpoint copies the session state into the components, so that it's stored with the character.
+	Changes to components with session fields don't register the character, so components of players should either have only session fields or none.
+	"""
+	def __get__(self, instance: Optional["FlagObject"], owner: type) -> Any:
+		if instance is None:
+			return self
+		attrs = instance.__dict__
+		try:
+			return attrs.get("_session", attrs)[self.name]
+		except KeyError:
+			raise AttributeError(self.name) from None
+
+	def __set__(self, instance: "FlagObject", value: object) -> None:
+		attrs = instance.__dict__
+		attrs = attrs.get("_session", attrs)
+		changed = self.name in attrs
+		attrs[self.name] = value
+		if changed:
+			instance.attr_changed(self.name)
+
+_session_fields: Dict[type, Tuple[str, ...]] = {}
+
+def session_fields(cls: type) -> Tuple[str, ...]:
+	"""Names of the session fields of a class. Computed once per class."""
+	if cls not in _session_fields:
+		_session_fields[cls] = tuple(name for name in dir(cls) if isinstance(getattr(cls, name), SessionField))
+	return _session_fields[cls]
+
+class FlagObject:
+	# objects stored before dirty masks have their flags in attributes, which are shadowed by the Flag descriptors
+	_dirty = 0
 
 	def attr_changed(self, name: str) -> None:
-		"""In case an attribute change is not registered by __setattr__ (like setting an attribute of an attribute), manually register the change by calling this. Without a registered change changes will not be broadcast to clients!"""
+		"""In case a change of a field is not an assignment (like setting an attribute of an attribute), manually register the change by calling this. Without a registered change changes will not be broadcast to clients!"""
+		field = getattr(type(self), name, None)
+		if isinstance(field, Field):
+			self.set_dirty(field.flag.mask)
+
+	def set_dirty(self, mask: int) -> None:
+		"""Set the flags of the mask and schedule a serialization."""
+		self._dirty |= mask
+		self.signal_serialize()
+
+	def signal_serialize(self) -> None:
+		raise NotImplementedError
 
 	def flag(self, name: str, stream: WriteStream, additional_condition: bool=False) -> bool:
 		"""
 		This function can be used to simplify common conditional bitstream writes.
-		Evaluate the expression of the attribute with the name "name" or the optional additional condition.
+		Evaluate the flag with the name "name" or the optional additional condition.
 		Write this value as a bit to the bitstream stream.
-		If the flag was True, set it to False.
+		If the flag was set, reset it. Its parent flags are not affected.
 		Return the expression.
 		"""
-		flag = getattr(self, name)
-		condition = flag or additional_condition
+		bit = getattr(type(self), name).bit
+		flag = self._dirty & bit
+		condition = bool(flag) or additional_condition
 		stream.write(c_bit(condition))
 		if flag:
-			setattr(self, name, False)
+			self._dirty &= ~bit
 		return condition
 
 class GameObject(Replica, FlagObject):
+	# objects stored before handlers were bound lazily have all their handlers in _handlers
+	_handler_sources: Optional[List[Any]] = None
+
+	related_objects_flag = Flag()
+	parent_flag = Flag(related_objects_flag)
+	children_flag = Flag(related_objects_flag)
+	parent = Field(parent_flag)
+	children = Field(children_flag)
+
 	def __init__(self, lot: int, object_id: ObjectID, set_vars: Config=None):
-		FlagObject.__init__(self)
 		if set_vars is None:
 			set_vars = {}
-		self._handlers: Dict[str, List[Callable[..., None]]] = {}
-		self._flags = {
-			"parent_flag": "related_objects_flag",
-			"children_flag": "related_objects_flag",
-			"parent": "parent_flag",
-			"children": "children_flag"}
+		# events whose handlers have been bound, the others are bound from _handler_sources when they're first handled
+		self._handlers: Dict[str, Sequence_[Callable[..., None]]] = {}
+		# components with on_* handlers and (event name, handler) pairs from add_handler, in the order they were added
+		self._handler_sources = []
 		self._serialize_scheduled = True
 		self.lot = lot
 		self.object_id = object_id
@@ -167,77 +273,22 @@ class GameObject(Replica, FlagObject):
 		if "primitive_model_scale" in set_vars:
 			self.primitive_model_scale = set_vars["primitive_model_scale"]
 		self.components: List[Component] = []
-
-		comps: Dict[Type[Component], int] = OrderedDict()
-
-		comp_ids: List[Tuple[int, Optional[int]]] = list(server.db.components_registry[self.lot])
-		if "custom_script" in set_vars:
-			# add custom script if no script is already there
-			for comp in comp_ids:
-				if comp[0] == 5:
-					break
-			else:
-				comp_ids.append((5, None))
-		if "render_disabled" in set_vars:
-			for comp in comp_ids.copy():
-				if comp[0] == 2:
-					comp_ids.remove(comp)
-		if "marked_as_phantom" in set_vars:
-			for comp in comp_ids.copy():
-				if comp[0] == 3:
-					comp_ids.remove(comp)
-			comp_ids.append((40, None))
-
-		for component_type, component_id in sorted(comp_ids, key=lambda x: _component_order.index(x[0]) if x[0] in _component_order else 99999):
-			if component_type == 5:
-				if "custom_script" in set_vars and set_vars["custom_script"] is not None:
-					try:
-						script = importlib.import_module("luserver.scripts."+set_vars["custom_script"])
-						if not hasattr(script, "ScriptComponent"):
-							raise RuntimeError("Scripts need to define a ScriptComponent")
-						comp = script.ScriptComponent,
-					except ModuleNotFoundError as e:
-						log.warning(str(e))
-						comp = ScriptComponent,
-				elif component_id is not None and component_id in server.db.script_component:
-					try:
-						script = importlib.import_module("luserver.scripts."+server.db.script_component[component_id])
-						if not hasattr(script, "ScriptComponent"):
-							raise RuntimeError("Scripts need to define a ScriptComponent")
-						comp = script.ScriptComponent,
-					except ModuleNotFoundError as e:
-						log.warning(str(e))
-						comp = ScriptComponent,
-				else:
-					comp = ScriptComponent,
-			elif component_type in _component:
-				comp = _component[component_type]
-			else:
-				#print("Component type %i has no class!" % component_type)
-				continue
-			for subcomp in comp:
-				if subcomp not in comps:
-					comps[subcomp] = component_id
-
-		if "trigger_events" in set_vars:
-			comps[TriggerComponent] = None
-
-		for comp, comp_id in comps.items():
+		for comp, comp_id in _blueprint(self.lot, set_vars):
 			self.components.append(comp(self, set_vars, comp_id))
+		self._v_capabilities = _capabilities(self)
 
 	def __repr__(self) -> str:
 		return "<GameObject \"%s\", %i, %i>" % (self.name, self.object_id, self.lot)
 
-	def attr_changed(self, name: str) -> None:
-		if hasattr(self, "_flags") and name in self._flags:
-			setattr(self, self._flags[name], hasattr(self, name))
-			self.signal_serialize()
-
 	def signal_serialize(self) -> None:
+		"""Mark the object as dirty, it will be serialized with all other dirty objects on the next world tick."""
 		if not self._serialize_scheduled:
-			self.call_later(0, self._do_serialize)
+			server.dirty_objects.add(self)
 			self._serialize_scheduled = True
 
+	def register_change(self) -> None:
+		"""Register a change to the state of a component that should be stored. Only players are stored, for other objects this does nothing."""
+
 	def _do_serialize(self) -> None:
 		server.replica_manager.serialize(self)
 		self._serialize_scheduled = False
@@ -287,6 +338,7 @@ class GameObject(Replica, FlagObject):
 
 	def on_destruction(self) -> None:
 		self._serialize_scheduled = True # prevent any serializations from now on
+		server.dirty_objects.discard(self)
 		if self.parent is not None:
 			server.game_objects[self.parent].children.remove(self.object_id)
 			server.game_objects[self.parent].attr_changed("children")
@@ -301,25 +353,65 @@ class GameObject(Replica, FlagObject):
 
 		self.handle("destruction", silent=True)
 
-		del server.game_objects[self.object_id]
+		server.remove_game_object(self)
+
+	def add_handlers(self, source: object) -> None:
+		"""Add the on_* methods of source as handlers for the events of their names. They're only bound when their event is first handled."""
+		if self._handler_sources is None:
+			for event_name, name in handler_table(type(source)).items():
+				self.add_handler(event_name, getattr(source, name))
+			return
+		self._handler_sources.append(source)
+		for event_name, name in handler_table(type(source)).items():
+			if event_name in self._handlers:
+				self._add_bound_handler(event_name, getattr(source, name))
+		self._v_message_plans = {}
 
 	def add_handler(self, event_name: str, handler: Callable[..., None]) -> None:
-		self._handlers.setdefault(event_name, []).append(handler)
+		if event_name not in self._handlers and self._handler_sources is not None:
+			self._handler_sources.append((event_name, handler))
+		else:
+			self._add_bound_handler(event_name, handler)
+		self._v_message_plans = {}
+
+	def _add_bound_handler(self, event_name: str, handler: Callable[..., None]) -> None:
+		handlers = self._handlers.get(event_name)
+		if handlers:
+			handlers.append(handler)
+		else:
+			self._handlers[event_name] = [handler]
 
 	def remove_handler(self, event_name: str, handler: Callable[..., None]) -> None:
-		if event_name not in self._handlers:
-			return
-		if handler in self._handlers[event_name]:
-			self._handlers[event_name].remove(handler)
+		handlers = self.handlers(event_name, silent=True)
+		if handler in handlers:
+			handlers.remove(handler)
+			self._v_message_plans = {}
 
 	def handlers(self, event_name: str, silent: bool=False) -> Sequence_[Callable]:
 		"""Return matching handlers for an event."""
-		if event_name not in self._handlers:
-			if not silent:
-				log.info("Object %s has no handlers for %s", self, event_name)
-			return []
+		if event_name in self._handlers:
+			handlers = self._handlers[event_name]
+		elif self._handler_sources is not None:
+			handlers = self._bind_handlers(event_name)
 		else:
-			return self._handlers[event_name]
+			handlers = ()
+		if not handlers and not silent:
+			log.info("Object %s has no handlers for %s", self, event_name)
+		return handlers
+
+	def _bind_handlers(self, event_name: str) -> Sequence_[Callable]:
+		handlers = []
+		for source in self._handler_sources:
+			if isinstance(source, tuple):
+				if source[0] == event_name:
+					handlers.append(source[1])
+			else:
+				name = handler_table(type(source)).get(event_name)
+				if name is not None:
+					handlers.append(getattr(source, name))
+		# events without handlers share an empty tuple
+		self._handlers[event_name] = handlers or ()
+		return self._handlers[event_name]
 
 	def handle(self, event_name: str, *args: Any, silent=False, **kwargs: Any) -> None:
 		"""
@@ -354,106 +446,67 @@ class GameObject(Replica, FlagObject):
 	def on_game_message(self, message: ReadStream, conn: Connection) -> None:
 		message_id = message.read(c_ushort)
 		try:
-			message_name = GameMessage(message_id).name
-		except ValueError:
-			return
-		event_name = re.sub("(?!^)([A-Z])", r"_\1", message_name).lower()
-
-		handlers = self.handlers(event_name)
+			plans = self._v_message_plans
+		except AttributeError:
+			plans = self._v_message_plans = {}
+		if message_id in plans:
+			plan, handlers = plans[message_id]
+		else:
+			try:
+				message_name = GameMessage(message_id).name
+			except ValueError:
+				return
+			event_name = re.sub("(?!^)([A-Z])", r"_\1", message_name).lower()
+			handlers = self.handlers(event_name)
+			plan = _GameMessageDecodePlan.for_handlers(message_name, handlers)
+			plans[message_id] = plan, handlers
 		if not handlers:
 			return
 
-		signature = inspect.signature(handlers[0])
-		kwargs = {}
-		params = list(signature.parameters.values())
-		if params and params[0].name == "player" and params[0].default == inspect.Parameter.empty:
-			params.pop(0)
-		for param in params:
-			if param.annotation == bool:
-				value = message.read(c_bit)
-				if param.default not in (param.empty, E) and value == param.default:
-					continue
-			else:
-				if param.default not in (param.empty, E):
-					is_not_default = message.read(c_bit)
-					if not is_not_default:
-						continue
-
-				value = self._game_message_deserialize(message, param.annotation)
-
-			kwargs[param.name] = value
-		assert message.all_read()
-
-		if message_name != "ReadyForUpdates": # todo: don't hardcode this
-			if kwargs:
-				log.debug(", ".join("%s=%s" % (key, value) for key, value in kwargs.items()))
+		kwargs = plan.decode(message)
+		if plan.log_args and kwargs and log.isEnabledFor(logging.DEBUG):
+			log.debug(", ".join("%s=%s" % (key, value) for key, value in kwargs.items()))
 
 		player = server.accounts[conn].selected_char()
-		for handler in handlers:
-			signature = inspect.signature(handler)
-			playerarg = "player" in signature.parameters
-			if playerarg:
-				it = iter(signature.parameters.keys())
-				playerarg = next(it) == "player"
-				if playerarg:
-					arg = signature.parameters["player"]
-					playerarg = arg.default == inspect.Parameter.empty
+		for handler, playerarg in zip(handlers, plan.player_args):
 			if playerarg:
 				handler(player, **kwargs)
 			else:
 				handler(**kwargs)
 
-	def _game_message_deserialize(self, message: ReadStream, type_: Type[W]) -> W:
-		value: Union[str, list, dict]
-		if type_ == float:
-			return message.read(c_float)
-		if type_ == bytes:
-			return message.read(bytes, length_type=c_uint_)
-		if type_ == str:
-			return message.read(str, length_type=c_uint_)
-		if type_ in (c_int_, c_int64_, c_ubyte, c_uint_, c_uint64_):
-			return message.read(type_)
-		if type_ == LDF:
-			value = message.read(str, length_type=c_uint_)
-			if value:
-				assert message.read(c_ushort) == 0  # for some reason has a null terminator
-			# todo: convert to LDF
-			return value
-		if issubclass(type_, GameObject) or issubclass(type_, Player):
-			obj_id = message.read(c_int64_)
-			if obj_id == 0:
-				return None
-			return server.get_object(obj_id)
-		if issubclass(type_, Serializable):
-			return type_.deserialize(message)
-		if issubclass(type_, Sequence):
-			length_type, value_type = type_.__args__
-			value = []
-			for _ in range(self._game_message_deserialize(message, length_type)):
-				value.append(self._game_message_deserialize(message, value_type))
-			return value
-		if issubclass(type_, Mapping):
-			length_type, key_type, value_type = type_.__args__
-			value = {}
-			for _ in range(self._game_message_deserialize(message, length_type)):
-				key = self._game_message_deserialize(message, key_type)
-				val = self._game_message_deserialize(message, value_type)
-				value[key] = val
-			return value
-		raise TypeError(type_)
-
 EO = cast(GameObject, E)
 
+# bit for each attribute that the special object classes check for
+_capability_bits: Dict[str, int] = {}
+
+def _capabilities(obj: GameObject) -> int:
+	"""Bitmask of the special object attributes that the object has. Components set these attributes when they're created, so this is computed once the components are attached."""
+	capabilities = 0
+	for attr, bit in _capability_bits.items():
+		if hasattr(obj, attr):
+			capabilities |= bit
+	return capabilities
+
 # these are for static typing and shouldn't actually be used
 
 class _SpecialObjectMeta(type):
+	def __init__(self, name: str, bases: Tuple[type, ...], namespace: Dict[str, Any]):
+		super().__init__(name, bases, namespace)
+		self._required_capabilities = 0
+		for attr in self.__annotations__:
+			if attr not in _capability_bits:
+				_capability_bits[attr] = 1 << len(_capability_bits)
+			self._required_capabilities |= _capability_bits[attr]
+
 	def __instancecheck__(self, instance: object) -> bool:
 		if not isinstance(instance, GameObject):
 			return False
-		for attr in self.__annotations__:
-				if not hasattr(instance, attr):
-					return False
-		return True
+		try:
+			capabilities = instance._v_capabilities
+		except AttributeError:
+			# objects loaded from the DB
+			capabilities = instance._v_capabilities = _capabilities(instance)
+		return capabilities & self._required_capabilities == self._required_capabilities
 
 class _SpecialObject(GameObject, metaclass=_SpecialObjectMeta):
 	pass
@@ -486,135 +539,348 @@ class Player(ControllableObject, DestructibleObject, Persistent):
 	char: "CharacterComponent"
 	inventory: "InventoryComponent"
 	skill: "SkillComponent"
+	# replication state, changed on every serialization, not part of the stored character
+	_volatile_attrs = frozenset(("_serialize_scheduled", "_dirty"))
+	# loaded characters are serialized once they have been constructed
+	_serialize_scheduled = True
 
 	def __init__(self, object_id: ObjectID):
 		GameObject.__init__(self, 1, object_id)
 		Persistent.__init__(self)
 
 	def __setattr__(self, name: str, value: object) -> None:
-		if not self._p_setattr(name, value):
+		if name in self._volatile_attrs:
+			# Persistent's __setattr__ would register the change
+			self._p_activate()
+			self.__dict__[name] = value
+		elif not self._p_setattr(name, value):
 			super().__setattr__(name, value)
-			self._p_changed = True
+			if not name.startswith("_v_"):
+				self._p_changed = True
+
+	def __getstate__(self) -> Dict[str, Any]:
+		state = super().__getstate__()
+		for name in self._volatile_attrs:
+			state.pop(name, None)
+		return state
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		super().__setstate__(state)
+		# reloaded after ghosting or an invalidation while in the world, the session state is more recent than the stored components
+		from .world import _server
+		if _server is not None and self in _server.player_data:
+			self.__dict__["_serialize_scheduled"] = self in _server.dirty_objects
+			self._attach_session()
+
+	def register_change(self) -> None:
+		self._p_changed = True
+
+	def start_session(self, conn: Connection) -> None:
+		"""Create the session data of the player in server.player_data and move the session fields of its components there."""
+		server.player_data[self] = {"conn": conn}
+		self._attach_session()
+
+	def _attach_session(self) -> None:
+		states = server.player_data[self].setdefault("component_state", {})
+		for comp in self.components:
+			if session_fields(type(comp)):
+				comp.attach_session(states.setdefault(type(comp), {}))
+
+	def checkpoint(self) -> None:
+		"""
+		Copy the session state into the components and register the character as changed, so that it's stored with the next commit.
+		Called at logout, zone transfer and autosave.
+		"""
+		for comp in self.components:
+			if session_fields(type(comp)):
+				comp.store_session()
+		self._p_changed = True
 
 EP = cast(Player, E)
 OBJ_NONE = cast(Player, None)
 
 X = TypeVar("X", bound=Callable)
 
+_Writer = Callable[[WriteStream, Any], None]
+
+def _compile_writer(type_: Type[W]) -> _Writer:
+	"""Return a function that serializes a value of the annotated type, resolving the type dispatch once instead of on every write."""
+	if type_ == float:
+		return lambda out, value: out.write(c_float(value))
+	if type_ in (bytes, str):
+		return lambda out, value: out.write(value, length_type=c_uint_)
+	if hasattr(type_, "__origin__") and type_.__origin__ is not None:
+		if type_.__origin__ == Sequence:
+			length_type, value_type = type_.__args__
+			write_value = _compile_writer(value_type)
+			def write_sequence(out: WriteStream, value: Sequence_) -> None:
+				out.write(length_type(len(value)))
+				for i in value:
+					write_value(out, i)
+			return write_sequence
+		if type_.__origin__ == Mapping:
+			length_type, key_type, value_type = type_.__args__
+			write_key = _compile_writer(key_type)
+			write_value = _compile_writer(value_type)
+			def write_mapping(out: WriteStream, value: Mapping_) -> None:
+				out.write(length_type(len(value)))
+				for k, v in value.items():
+					write_key(out, k)
+					write_value(out, v)
+			return write_mapping
+		raise TypeError(type_)
+	if issubclass(type_, (c_int_, c_int64_, c_ubyte, c_uint_, c_uint64_)):
+		return lambda out, value: out.write(type_(value))
+	if type_ == LDF:
+		def write_ldf(out: WriteStream, value: LDF) -> None:
+			ldf_text = value.to_str()
+			out.write(ldf_text, length_type=c_uint_)
+			if ldf_text:
+				out.write(bytes(2)) # for some reason has a null terminator
+		return write_ldf
+	if issubclass(type_, GameObject) or issubclass(type_, Player):
+		def write_object(out: WriteStream, value: GameObject) -> None:
+			if value is OBJ_NONE:
+				out.write(c_int64_(0))
+			else:
+				out.write(c_int64_(value.object_id))
+		return write_object
+	if inspect.isclass(type_) and issubclass(type_, Serializable):
+		return lambda out, value: type_.serialize(value, out)
+	raise TypeError(type_)
+
+_header = WriteStream_()
+_header.write_header(WorldClientMsg.GameMessage)
+_GAME_MESSAGE_HEADER = bytes(_header)
+del _header
+
+class _GameMessageEncoder:
+	"""
+	Serialization plan for an outgoing game message, compiled once when its function is decorated.
+	Holds the argument order, which arguments are wrapped in a default flag, and a writer for each argument type, so that sending doesn't need to inspect the function again.
+	"""
+	_BOOL = 0
+	_FLAGGED = 1
+	_REQUIRED = 2
+
+	def __init__(self, func: Callable) -> None:
+		self.func_name = func.__name__
+		self.message_name = re.sub("(^|_)(.)", lambda match: match.group(2).upper(), func.__name__)
+		self._message_id: Optional[int] = None
+		params = list(inspect.signature(func).parameters.values())[1:]
+		self.arg_names = tuple(param.name for param in params)
+		self.has_player_param = bool(params) and params[0].name == "player"
+		if self.has_player_param:
+			params.pop(0)
+		self.fields: List[Tuple[str, int, Any, Optional[_Writer]]] = []
+		for param in params:
+			if param.annotation == bool:
+				self.fields.append((param.name, _GameMessageEncoder._BOOL, param.default, None))
+				continue
+			if param.default not in (param.empty, E):
+				kind = _GameMessageEncoder._FLAGGED
+			else:
+				kind = _GameMessageEncoder._REQUIRED
+			self.fields.append((param.name, kind, param.default, _compile_writer(param.annotation)))
+
+	@property
+	def message_id(self) -> int:
+		# looked up on first use instead of at decoration, so that functions can be decorated before their message is registered
+		if self._message_id is None:
+			self._message_id = GameMessage[self.message_name].value
+		return self._message_id
+
+	def bind(self, args: Sequence_[Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+		"""Map the passed arguments to parameter names, with the same errors as inspect.Signature.bind."""
+		if len(args) > len(self.arg_names):
+			raise TypeError("%s() takes %i positional arguments but %i were given" % (self.func_name, len(self.arg_names)+1, len(args)+1))
+		arguments = dict(zip(self.arg_names, args))
+		for name, value in kwargs.items():
+			if name not in self.arg_names:
+				raise TypeError("%s() got an unexpected keyword argument '%s'" % (self.func_name, name))
+			if name in arguments:
+				raise TypeError("multiple values for argument '%s'" % name)
+			arguments[name] = value
+		return arguments
+
+	def encode(self, object_id: ObjectID, arguments: Dict[str, Any]) -> WriteStream_:
+		out = WriteStream_()
+		out.write(_GAME_MESSAGE_HEADER)
+		out.write(c_int64_(object_id))
+		out.write(c_ushort(self.message_id))
+		for name, kind, default, writer in self.fields:
+			if kind == _GameMessageEncoder._BOOL:
+				value = arguments.get(name, default)
+				assert value in (True, False)
+				out.write(c_bit(value))
+				continue
+			if kind == _GameMessageEncoder._FLAGGED:
+				is_not_default = name in arguments and arguments[name] != default
+				out.write(c_bit(is_not_default))
+				if not is_not_default:
+					continue
+			elif name not in arguments:
+				raise TypeError("\"%s\" needs to be specified" % name)
+			writer(out, arguments[name])
+		return out
+
+_Reader = Callable[[ReadStream], Any]
+
+def _compile_reader(type_: Type[W]) -> _Reader:
+	"""Return a function that deserializes a value of the annotated type, resolving the type dispatch once instead of on every read."""
+	if type_ == float:
+		return lambda message: message.read(c_float)
+	if type_ in (bytes, str):
+		return lambda message: message.read(type_, length_type=c_uint_)
+	if type_ in (c_int_, c_int64_, c_ubyte, c_uint_, c_uint64_):
+		return lambda message: message.read(type_)
+	if type_ == LDF:
+		def read_ldf(message: ReadStream) -> str:
+			value = message.read(str, length_type=c_uint_)
+			if value:
+				assert message.read(c_ushort) == 0  # for some reason has a null terminator
+			# todo: convert to LDF
+			return value
+		return read_ldf
+	if hasattr(type_, "__origin__") and type_.__origin__ is not None:
+		if type_.__origin__ == Sequence:
+			length_type, value_type = type_.__args__
+			read_length = _compile_reader(length_type)
+			read_value = _compile_reader(value_type)
+			return lambda message: [read_value(message) for _ in range(read_length(message))]
+		if type_.__origin__ == Mapping:
+			length_type, key_type, value_type = type_.__args__
+			read_length = _compile_reader(length_type)
+			read_key = _compile_reader(key_type)
+			read_value = _compile_reader(value_type)
+			def read_mapping(message: ReadStream) -> Dict:
+				value = {}
+				for _ in range(read_length(message)):
+					key = read_key(message)
+					value[key] = read_value(message)
+				return value
+			return read_mapping
+		raise TypeError(type_)
+	if issubclass(type_, GameObject) or issubclass(type_, Player):
+		def read_object(message: ReadStream) -> Optional[GameObject]:
+			obj_id = message.read(c_int64_)
+			if obj_id == 0:
+				return None
+			return server.get_object(obj_id)
+		return read_object
+	if issubclass(type_, Serializable):
+		return type_.deserialize
+	raise TypeError(type_)
+
+def _takes_player(handler: Callable) -> bool:
+	"""Whether the handler's first parameter is a "player" without default, which gets passed the player that sent the message."""
+	params = list(inspect.signature(handler).parameters.values())
+	return bool(params) and params[0].name == "player" and params[0].default == inspect.Parameter.empty
+
+class _GameMessageDecodePlan:
+	"""
+	Deserialization and dispatch plan for an incoming game message, compiled once per message and set of handler functions.
+	The parameter layout is taken from the first handler, like with outgoing messages. For every handler it's also recorded whether it takes the player as first argument.
+	"""
+	_BOOL = 0
+	_FLAGGED = 1
+	_REQUIRED = 2
+
+	_plans: Dict[Tuple, "_GameMessageDecodePlan"] = {}
+
+	@staticmethod
+	def for_handlers(message_name: str, handlers: Sequence_[Callable]) -> "_GameMessageDecodePlan":
+		"""
+		Return the plan for these handlers, shared with all other objects whose handlers are the same methods.
+		Plans for other handlers, like partials and closures added with add_handler, are specific to the object and not kept here, as there's a new one for every object.
+		"""
+		if not all(hasattr(handler, "__func__") for handler in handlers):
+			return _GameMessageDecodePlan(message_name, handlers)
+		key = (message_name,) + tuple(handler.__func__ for handler in handlers)
+		if key not in _GameMessageDecodePlan._plans:
+			_GameMessageDecodePlan._plans[key] = _GameMessageDecodePlan(message_name, handlers)
+		return _GameMessageDecodePlan._plans[key]
+
+	def __init__(self, message_name: str, handlers: Sequence_[Callable]):
+		self.log_args = message_name != "ReadyForUpdates" # todo: don't hardcode this
+		self.player_args = tuple(_takes_player(handler) for handler in handlers)
+		self.fields: List[Tuple[str, int, Any, Optional[_Reader]]] = []
+		if not handlers:
+			return
+		params = list(inspect.signature(handlers[0]).parameters.values())
+		if self.player_args[0]:
+			params.pop(0)
+		for param in params:
+			has_default = param.default not in (param.empty, E)
+			if param.annotation == bool:
+				self.fields.append((param.name, _GameMessageDecodePlan._BOOL, param.default if has_default else None, None))
+			elif has_default:
+				self.fields.append((param.name, _GameMessageDecodePlan._FLAGGED, param.default, _compile_reader(param.annotation)))
+			else:
+				self.fields.append((param.name, _GameMessageDecodePlan._REQUIRED, param.default, _compile_reader(param.annotation)))
+
+	def decode(self, message: ReadStream) -> Dict[str, Any]:
+		kwargs = {}
+		for name, kind, default, reader in self.fields:
+			if kind == _GameMessageDecodePlan._BOOL:
+				value = message.read(c_bit)
+				if default is not None and value == default:
+					continue
+			elif kind == _GameMessageDecodePlan._FLAGGED:
+				if not message.read(c_bit):
+					continue
+				value = reader(message)
+			else:
+				value = reader(message)
+			kwargs[name] = value
+		assert message.all_read()
+		return kwargs
+
 def _send_game_message(mode: str) -> Callable[[X], X]:
 	"""
 	Send a game message on calling its function.
 	Modes:
-		broadcast: The game message will be sent to all connected players. If "player" is specified, that player will be excluded.
+		broadcast: The game message will be sent to all connected players. If "player" is specified, that player will be excluded. If "near" is specified, the message will only be sent to the players that have that object constructed.
 		single: The game message will only be sent to the player this game message belongs to. If the object is not a player, specify "player" explicitly.
 	The serialization is handled as follows:
 		The Game Message ID is taken from the function name.
 		The argument serialization order is taken from the function definition.
 		Any arguments with defaults (a default of None is ignored)(also according to the function definition) will be wrapped in a flag and only serialized if the argument is not the default.
 		The serialization type (c_int, float, etc) is taken from the argument annotation.
+	All of this is compiled into an encoder once when the function is decorated, calling the function only binds the arguments and runs the encoder.
 
 	If the function has "player" as the first argument, the player that this message will be sent to will be passed to the function as that argument. Note that this only really makes sense to specify in "single" mode.
 	"""
 	def decorator(func: X) -> X:
 		from .world import server
+		encoder = _GameMessageEncoder(func)
+		log_args = func.__name__ not in ("drop_client_loot", "script_network_var_update") # todo: don't hardcode this
 
 		@wraps(func)
 		def wrapper(self, *args: Any, **kwargs: Any) -> Any:
-			game_message_id = GameMessage[re.sub("(^|_)(.)", lambda match: match.group(2).upper(), func.__name__)].value
-			out = WriteStream_()
-			out.write_header(WorldClientMsg.GameMessage)
-			object_id = self.object.object_id
-			out.write(c_int64_(object_id))
-			out.write(c_ushort(game_message_id))
-
-			signature = inspect.signature(func)
-			params = list(signature.parameters.values())[1:]
-
-			if "player" in kwargs:
-				player = kwargs["player"]
-			else:
-				player = None
-			if params and params[0].name == "player":
-				params.pop(0)
-			else:
-				if "player" in kwargs:
-					del kwargs["player"]
-
-			bound_args = signature.bind(self, *args, **kwargs)
-			for param in params:
-				if param.annotation == bool:
-					if param.name in bound_args.arguments:
-						value = bound_args.arguments[param.name]
-					else:
-						value = param.default
-					assert value in (True, False)
-					out.write(c_bit(value))
-				else:
-					if param.default not in (param.empty, E):
-						is_not_default = param.name in bound_args.arguments and bound_args.arguments[param.name] != param.default
-						out.write(c_bit(is_not_default))
-						if not is_not_default:
-							continue
-
-					if param.name not in bound_args.arguments:
-						raise TypeError("\"%s\" needs to be specified" % param.name)
-					value = bound_args.arguments[param.name]
-					_game_message_serialize(out, param.annotation, value)
+			player = kwargs.get("player")
+			if not encoder.has_player_param and "player" in kwargs:
+				del kwargs["player"]
+			near = kwargs.pop("near", None)
+
+			arguments = encoder.bind(args, kwargs)
+			out = encoder.encode(self.object.object_id, arguments)
 			if mode == "broadcast":
 				exclude = []
 				if player is not None:
 					exclude.append(player.char.data()["conn"])
-				server.broadcast(out, exclude=exclude)
+				server.broadcast(out, exclude=exclude, near=near)
 			elif mode == "single":
 				if player is None:
 					player = self.object
-				player.char.data()["conn"].send(out)
-			if func.__name__ not in ("drop_client_loot", "script_network_var_update"): # todo: don't hardcode this
-				if len(bound_args.arguments) > 1:
-					log.debug(", ".join("%s=%s" % (key, value) for key, value in list(bound_args.arguments.items())[1:]))
+				server.outbox.send(out, (player.char.data()["conn"],))
+			if log_args and arguments and log.isEnabledFor(logging.DEBUG):
+				log.debug(", ".join("%s=%s" % (key, value) for key, value in arguments.items()))
 			return func(self, *args, **kwargs)
+		wrapper.encoder = encoder
 		return wrapper
 	return decorator
 
-
-def _game_message_serialize(out: WriteStream, type_: Type[W], value: W) -> None:
-	if type_ == float:
-		out.write(c_float(value))
-	elif type_ == bytes:
-		out.write(value, length_type=c_uint_)
-	elif type_ == str:
-		out.write(value, length_type=c_uint_)
-	elif hasattr(type_, "__origin__") and type_.__origin__ is not None:
-		if type_.__origin__ == Sequence:
-			length_type, value_type = type_.__args__
-			out.write(length_type(len(value)))
-			for i in value:
-				_game_message_serialize(out, value_type, i)
-		elif type_.__origin__ == Mapping:
-			length_type, key_type, value_type = type_.__args__
-			out.write(length_type(len(value)))
-			for k, v in value.items():
-				_game_message_serialize(out, key_type, k)
-				_game_message_serialize(out, value_type, v)
-		else:
-			raise TypeError(type_)
-	elif issubclass(type_, (c_int_, c_int64_, c_ubyte, c_uint_, c_uint64_)):
-		out.write(type_(value))
-	elif type_ == LDF:
-		ldf_text = value.to_str()
-		out.write(ldf_text, length_type=c_uint_)
-		if ldf_text:
-			out.write(bytes(2)) # for some reason has a null terminator
-	elif issubclass(type_, GameObject) or issubclass(type_, Player):
-		if value is OBJ_NONE:
-			out.write(c_int64_(0))
-		else:
-			out.write(c_int64_(value.object_id))
-	elif inspect.isclass(type_) and issubclass(type_, Serializable):
-		type_.serialize(value, out)
-	else:
-		raise TypeError(type_)
-
 broadcast = _send_game_message("broadcast")
 single = _send_game_message("single")
 
@@ -691,3 +957,78 @@ _component[67] = LaunchpadComponent,
 _component[104] = RailActivatorComponent,
 
 _component_order = list(_component.keys())
+
+Blueprint = Tuple[Tuple[Type[Component], Optional[int]], ...]
+_blueprints: Dict[Tuple[int, bool, Optional[str], bool, bool, bool], Blueprint] = {}
+_blueprints_version: Optional[int] = None
+
+def _blueprint(lot: int, set_vars: Config) -> Blueprint:
+	"""
+	Get the component classes and component IDs for an object, in serialization order.
+	These only depend on the LOT and a few set_vars, so they're built once per combination and reused for every spawn until the static tables are reloaded.
+	"""
+	global _blueprints_version
+	if _blueprints_version != server.static.version:
+		_blueprints.clear()
+		_blueprints_version = server.static.version
+	key = lot, "custom_script" in set_vars, set_vars.get("custom_script"), "render_disabled" in set_vars, "marked_as_phantom" in set_vars, "trigger_events" in set_vars
+	if key not in _blueprints:
+		_blueprints[key] = _build_blueprint(lot, set_vars)
+	return _blueprints[key]
+
+def _build_blueprint(lot: int, set_vars: Config) -> Blueprint:
+	comps: Dict[Type[Component], int] = OrderedDict()
+
+	comp_ids: List[Tuple[int, Optional[int]]] = list(server.static.components_registry[lot])
+	if "custom_script" in set_vars:
+		# add custom script if no script is already there
+		for comp in comp_ids:
+			if comp[0] == 5:
+				break
+		else:
+			comp_ids.append((5, None))
+	if "render_disabled" in set_vars:
+		for comp in comp_ids.copy():
+			if comp[0] == 2:
+				comp_ids.remove(comp)
+	if "marked_as_phantom" in set_vars:
+		for comp in comp_ids.copy():
+			if comp[0] == 3:
+				comp_ids.remove(comp)
+		comp_ids.append((40, None))
+
+	for component_type, component_id in sorted(comp_ids, key=lambda x: _component_order.index(x[0]) if x[0] in _component_order else 99999):
+		if component_type == 5:
+			if "custom_script" in set_vars and set_vars["custom_script"] is not None:
+				try:
+					script = importlib.import_module("luserver.scripts."+set_vars["custom_script"])
+					if not hasattr(script, "ScriptComponent"):
+						raise RuntimeError("Scripts need to define a ScriptComponent")
+					comp = script.ScriptComponent,
+				except ModuleNotFoundError as e:
+					log.warning(str(e))
+					comp = ScriptComponent,
+			elif component_id is not None and component_id in server.static.script_component:
+				try:
+					script = importlib.import_module("luserver.scripts."+server.static.script_component[component_id])
+					if not hasattr(script, "ScriptComponent"):
+						raise RuntimeError("Scripts need to define a ScriptComponent")
+					comp = script.ScriptComponent,
+				except ModuleNotFoundError as e:
+					log.warning(str(e))
+					comp = ScriptComponent,
+			else:
+				comp = ScriptComponent,
+		elif component_type in _component:
+			comp = _component[component_type]
+		else:
+			#print("Component type %i has no class!" % component_type)
+			continue
+		for subcomp in comp:
+			if subcomp not in comps:
+				comps[subcomp] = component_id
+
+	if "trigger_events" in set_vars:
+		comps[TriggerComponent] = None
+
+	return tuple(comps.items())
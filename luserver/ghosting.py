@@ -0,0 +1,220 @@
+"""
+Replica manager with area of interest management ("ghosting").
+
+Objects with a physics position are only constructed for, serialized to and destructed for connections whose player is near them.
+Objects without a position (world control object, spawners etc) are relevant to everyone.
+With an interest radius of 0 all objects are relevant to everyone, which is the same behavior as the pyraknet replica manager.
+"""
+from typing import Dict, List, Optional, Sequence, Set
+
+from event_dispatcher import EventDispatcher
+
+from bitstream import c_bit, c_ubyte, c_ushort, WriteStream
+from pyraknet.messages import Message
+from pyraknet.replicamanager import Replica
+from pyraknet.transports.abc import Connection, ConnectionEvent
+from .math.spatial import Cell, SpatialHash
+from .math.vector import Vector3
+from .world import server
+
+class _Participant:
+	__slots__ = "viewpoint", "override_position", "cell", "visible"
+
+	def __init__(self, viewpoint: Optional[Replica]):
+		self.viewpoint = viewpoint
+		self.override_position: Optional[Vector3] = None
+		self.cell: Optional[Cell] = None
+		self.visible: Set[Replica] = set()
+
+class ReplicaManager:
+	def __init__(self, dispatcher: EventDispatcher, interest_radius: float=0):
+		self.interest_radius = interest_radius
+		self._network_ids: Dict[Replica, int] = {}
+		self._current_network_id = 0
+		self._participants: Dict[Connection, _Participant] = {}
+		self._global: Set[Replica] = set()
+		if interest_radius:
+			# objects within one cell of the viewpoint's cell are visible, which covers at least the interest radius
+			self._grid: Optional[SpatialHash[Replica]] = SpatialHash(interest_radius)
+		else:
+			self._grid = None
+		dispatcher.add_listener(ConnectionEvent.Close, self._on_conn_close)
+
+	def add_participant(self, conn: Connection, viewpoint: Replica=None) -> None:
+		"""
+		Start replicating to a connection and construct all currently relevant objects for it.
+		The viewpoint is the object whose position determines which objects are relevant, usually the player.
+		"""
+		participant = _Participant(viewpoint)
+		self._participants[conn] = participant
+		participant.cell = self._viewpoint_cell(participant)
+		for obj in list(self._network_ids):
+			if self._is_relevant(obj, participant):
+				self._construct_for(obj, conn, participant)
+
+	def _on_conn_close(self, conn: Connection) -> None:
+		self._participants.pop(conn, None)
+
+	def construct(self, obj: Replica, new: bool=True) -> None:
+		"""
+		Construct a new object for all connections it is relevant to.
+		With new=False, construct an already constructed object again for the connections that have it, for changes that can't be serialized.
+		"""
+		if not new:
+			recipients = self.recipients(obj)
+			if recipients:
+				self._send(self._construction(obj), recipients)
+			return
+		if obj in self._network_ids:
+			raise ValueError("object is already constructed")
+		self._network_ids[obj] = self._current_network_id
+		self._current_network_id += 1
+		position = self._position(obj)
+		if position is None:
+			self._global.add(obj)
+		else:
+			self._grid.insert(obj, position)
+
+		recipients = []
+		for conn, participant in self._participants.items():
+			if participant.viewpoint is obj:
+				participant.cell = self._viewpoint_cell(participant)
+			if self._is_relevant(obj, participant):
+				participant.visible.add(obj)
+				recipients.append(conn)
+		if recipients:
+			self._send(self._construction(obj), recipients)
+
+	def serialize(self, obj: Replica) -> None:
+		recipients = self.recipients(obj)
+		if not recipients:
+			# nobody has the object, the next construction will include the current state
+			return
+		out = WriteStream()
+		out.write(c_ubyte(Message.ReplicaManagerSerialize.value))
+		out.write(c_ushort(self._network_ids[obj]))
+		obj.serialize(out)
+		self._send(bytes(out), recipients)
+
+	def destruct(self, obj: Replica) -> None:
+		recipients = self.recipients(obj)
+		for participant in self._participants.values():
+			participant.visible.discard(obj)
+		if recipients:
+			self._send(self._destruction(obj), recipients)
+		del self._network_ids[obj]
+		if obj in self._global:
+			self._global.remove(obj)
+		else:
+			self._grid.remove(obj)
+		obj.on_destruction()
+
+	def recipients(self, obj: Replica) -> List[Connection]:
+		"""Connections that currently have the object constructed."""
+		if obj in self._global:
+			return list(self._participants)
+		return [conn for conn, participant in self._participants.items() if obj in participant.visible]
+
+	def is_scoped(self, obj: Replica) -> bool:
+		"""Whether the object is only relevant to some connections."""
+		return self._grid is not None and obj in self._grid
+
+	def set_ghost_reference(self, conn: Connection, position: Optional[Vector3]) -> None:
+		"""Use a position other than the viewpoint's for the connection's area of interest, or go back to the viewpoint's position if position is None."""
+		participant = self._participants.get(conn)
+		if participant is None:
+			return
+		participant.override_position = None if position is None else Vector3(position)
+		self._update_participant(conn, participant)
+
+	def update(self, obj: Replica) -> None:
+		"""Update the area of interest state after the object might have moved."""
+		if self._grid is None or obj not in self._grid:
+			return
+		if self._grid.move(obj, self._position(obj)):
+			for conn, participant in self._participants.items():
+				if participant.viewpoint is obj:
+					continue
+				relevant = self._is_relevant(obj, participant)
+				if relevant and obj not in participant.visible:
+					self._construct_for(obj, conn, participant)
+				elif not relevant and obj in participant.visible:
+					self._destruct_for(obj, conn, participant)
+
+		for conn, participant in self._participants.items():
+			if participant.viewpoint is obj:
+				self._update_participant(conn, participant)
+
+	def update_viewpoints(self) -> None:
+		"""Update the area of interest of all connections, for viewpoints that move without being marked as changed (players in vehicles)."""
+		if self._grid is None:
+			return
+		for participant in list(self._participants.values()):
+			if participant.viewpoint is not None and participant.viewpoint in self._grid:
+				self.update(participant.viewpoint)
+
+	def _update_participant(self, conn: Connection, participant: _Participant) -> None:
+		cell = self._viewpoint_cell(participant)
+		if cell == participant.cell:
+			return
+		participant.cell = cell
+		for obj in list(participant.visible):
+			if not self._is_relevant(obj, participant):
+				self._destruct_for(obj, conn, participant)
+		if cell is not None:
+			for obj in list(self._grid.near_cell(cell)):
+				if obj not in participant.visible:
+					self._construct_for(obj, conn, participant)
+
+	def _construct_for(self, obj: Replica, conn: Connection, participant: _Participant) -> None:
+		if obj._serialize_scheduled:
+			# bring everyone else up to date first, constructing resets the object's change flags
+			server.dirty_objects.discard(obj)
+			obj._do_serialize()
+		participant.visible.add(obj)
+		self._send(self._construction(obj), (conn,))
+
+	def _destruct_for(self, obj: Replica, conn: Connection, participant: _Participant) -> None:
+		participant.visible.remove(obj)
+		self._send(self._destruction(obj), (conn,))
+
+	def _is_relevant(self, obj: Replica, participant: _Participant) -> bool:
+		if obj in self._global or obj is participant.viewpoint:
+			return True
+		if participant.cell is None:
+			return False
+		return SpatialHash.cell_distance(self._grid.cell_of(obj), participant.cell) <= 1
+
+	def _viewpoint_cell(self, participant: _Participant) -> Optional[Cell]:
+		if self._grid is None:
+			return None
+		if participant.override_position is not None:
+			return self._grid.cell(participant.override_position)
+		if participant.viewpoint is None:
+			return None
+		position = self._position(participant.viewpoint)
+		if position is None:
+			return None
+		return self._grid.cell(position)
+
+	def _position(self, obj: Replica) -> Optional[Vector3]:
+		if self._grid is None or not hasattr(obj, "physics"):
+			return None
+		return obj.physics.position
+
+	def _construction(self, obj: Replica) -> bytes:
+		out = WriteStream()
+		out.write(c_ubyte(Message.ReplicaManagerConstruction.value))
+		out.write(c_bit(True))
+		out.write(c_ushort(self._network_ids[obj]))
+		obj.write_construction(out)
+		return bytes(out)
+
+	def _destruction(self, obj: Replica) -> bytes:
+		out = WriteStream()
+		out.write(c_ubyte(Message.ReplicaManagerDestruction.value))
+		out.write(c_ushort(self._network_ids[obj]))
+		return bytes(out)
+
+	def _send(self, data: bytes, recipients: Sequence[Connection]) -> None:
+		server.outbox.send(data, recipients)
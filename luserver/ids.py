@@ -0,0 +1,68 @@
+from typing import Callable, Union
+
+from persistent import Persistent
+from ZODB.Connection import Connection
+
+class IDCounter(Persistent):
+	"""
+	Counter that instances reserve ranges of IDs from.
+	This is its own persistent object instead of an int attribute of the DB root, so that reserving IDs only conflicts with other reservations and not with every other change to the root.
+	"""
+
+	def __init__(self, next_id: int):
+		self.next_id = next_id
+
+class IDLease:
+	"""
+	Range of IDs reserved from an IDCounter, handed out locally without touching the DB.
+	Reserving a new range retries on conflicts, so concurrent reservations by other instances can't end up with overlapping ranges.
+	Since a retry aborts the transaction, commit is called first to save any other pending changes.
+	"""
+
+	def __init__(self, conn: Connection, commit: Callable[[], None], name: str, size: int):
+		self._conn = conn
+		self._commit = commit
+		self._name = name
+		self.size = size
+		self._next = 0
+		self._stop = 0
+
+	def next(self) -> int:
+		if self._next == self._stop:
+			self._reserve()
+		current = self._next
+		self._next += 1
+		return current
+
+	def release(self) -> None:
+		"""Return the unused IDs if no other instance has reserved a range since, otherwise skip them."""
+		if self._next == self._stop:
+			return
+		self._commit()
+		for attempt in self._conn.transaction_manager.attempts():
+			with attempt:
+				counter = self._counter()
+				if counter.next_id == self._stop:
+					counter.next_id = self._next
+		self._stop = self._next
+
+	def _reserve(self) -> None:
+		# A _p_resolveConflict on IDCounter can't replace the retry loop: resolving to the max of the concurrent increments would hand out overlapping ranges,
+		# and resolving to the sum leaves the new value only in the storage, so this instance couldn't tell which range it got.
+		# The commit and the retries happen once per lease of size IDs, so their cost is spread over the whole range.
+		self._commit()
+		for attempt in self._conn.transaction_manager.attempts():
+			with attempt:
+				counter = self._counter()
+				start = counter.next_id
+				counter.next_id += self.size
+		self._next = start
+		self._stop = start + self.size
+
+	def _counter(self) -> IDCounter:
+		counter: Union[IDCounter, int] = getattr(self._conn.root, self._name)
+		if isinstance(counter, int):
+			# migrate DBs created before counters were their own objects
+			counter = IDCounter(counter)
+			setattr(self._conn.root, self._name, counter)
+		return counter
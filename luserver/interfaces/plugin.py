@@ -29,27 +29,22 @@ def normal_bool(str_: str) -> bool:
 	raise ValueError
 
 def object_selector(str_: str) -> List[GameObject]:
-	selected = []
-	for obj in server.game_objects.values():
-		if str_.startswith("!"):
-			if obj.name == str_[1:]:
-				selected.append(obj)
-	return selected
+	if not str_.startswith("!"):
+		return []
+	return [obj for obj in server.spawned_index.by_name_prefix(str_[1:]) if obj.name == str_[1:]]
 
 def instance_obj(name: str) -> GameObject:
 	if not name.startswith("!"):
 		return instance_player(name)
 	else:
 		name = name[1:]
-	name = name.lower()
-	for obj in server.game_objects.values():
-		if obj.name.lower().startswith(name):
-			return obj
+	matches = server.spawned_index.by_name_prefix(name)
+	if matches:
+		return matches[0]
 	raise ArgumentTypeError("Object not found in instance")
 
 def instance_player(name: str) -> Player:
-	name = name.lower()
-	for obj in server.game_objects.values():
-		if isinstance(obj, Player) and obj.name.lower().startswith(name):
+	for obj in server.spawned_index.by_name_prefix(name):
+		if isinstance(obj, Player):
 			return obj
 	raise ArgumentTypeError("Player not found in instance")
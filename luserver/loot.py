@@ -0,0 +1,38 @@
+import bisect
+import random
+from collections import Counter
+from typing import Any, Mapping, Sequence, Tuple
+
+LootMatrix = Sequence[Tuple[int, float, int, int]]
+LootTable = Mapping[int, Sequence[Tuple[int, bool, int]]]
+
+class LootSampler:
+	"""
+	Rolls the drops of a loot matrix, preprocessed from the static tables.
+	A loot matrix has rows of (loot table index, percent, min to drop, max to drop). A smashable makes one roll for the whole matrix, and each row with a percent above the roll drops between min and max items, chosen uniformly from the row's loot table.
+	The rows are sorted by percent, so the rows that drop are found by binary search, and the loot tables are looked up once here instead of for every item.
+	"""
+
+	def __init__(self, loot_matrix: LootMatrix, loot_table: LootTable):
+		rows = sorted(loot_matrix, key=lambda row: row[1])
+		self._percents = [percent for _, percent, _, _ in rows]
+		self._rows = [(tuple((lot, mission_drop) for lot, mission_drop, _ in loot_table[table_index]), min_to_drop, max_to_drop) for table_index, _, min_to_drop, max_to_drop in rows]
+
+	def roll(self, count: int=1, rng: Any=random) -> Counter:
+		"""Roll the drops of count smashables at once, using rng, the random module by default. Returns the number of drops for each (lot, mission drop) entry."""
+		drops = Counter()
+		if count == 1:
+			first = bisect.bisect_right(self._percents, rng.random())
+			for items, min_to_drop, max_to_drop in self._rows[first:]:
+				drops.update(rng.choices(items, k=rng.randint(min_to_drop, max_to_drop)))
+			return drops
+
+		rolls = sorted(rng.random() for _ in range(count))
+		for percent, (items, min_to_drop, max_to_drop) in zip(self._percents, self._rows):
+			dropping = bisect.bisect_left(rolls, percent)
+			if min_to_drop == max_to_drop:
+				num_items = dropping * min_to_drop
+			else:
+				num_items = sum(rng.randint(min_to_drop, max_to_drop) for _ in range(dropping))
+			drops.update(rng.choices(items, k=num_items))
+		return drops
@@ -0,0 +1,129 @@
+from typing import Dict, Generic, Iterator, Set, Tuple, TypeVar
+
+from .vector import Vector3
+
+T = TypeVar("T")
+Cell = Tuple[int, int]
+
+class SpatialHash(Generic[T]):
+	"""
+	Uniform grid over the XZ plane, bucketing items by position.
+	Used to find items near a position without having to look at every item.
+	Items are either points, which are in exactly one cell, or areas, which are in every cell they overlap.
+	Areas overlapping more than MAX_AREA_CELLS cells are not bucketed and are always included in query results instead.
+	"""
+	MAX_AREA_CELLS = 256
+
+	def __init__(self, cell_size: float):
+		self.cell_size = cell_size
+		self._cells: Dict[Cell, Set[T]] = {}
+		self._item_cells: Dict[T, Tuple[Cell, ...]] = {}
+		self._large: Set[T] = set()
+
+	def __contains__(self, item: T) -> bool:
+		return item in self._item_cells
+
+	def __len__(self) -> int:
+		return len(self._item_cells)
+
+	def cell(self, position: Vector3) -> Cell:
+		return int(position.x // self.cell_size), int(position.z // self.cell_size)
+
+	def cell_of(self, item: T) -> Cell:
+		"""The cell of a point item."""
+		return self._item_cells[item][0]
+
+	def insert(self, item: T, position: Vector3) -> None:
+		self._add(item, (self.cell(position),))
+
+	def insert_area(self, item: T, min: Vector3, max: Vector3) -> None:
+		self._add(item, self._area_cells(min, max))
+
+	def move(self, item: T, position: Vector3) -> bool:
+		"""Update the position of a point item. Returns whether the item changed cells."""
+		new_cells = (self.cell(position),)
+		if new_cells == self._item_cells[item]:
+			return False
+		self.remove(item)
+		self._add(item, new_cells)
+		return True
+
+	def move_area(self, item: T, min: Vector3, max: Vector3) -> bool:
+		"""Update the bounds of an area item. Returns whether the item changed cells."""
+		new_cells = self._area_cells(min, max)
+		if new_cells == self._item_cells[item]:
+			return False
+		self.remove(item)
+		self._add(item, new_cells)
+		return True
+
+	def remove(self, item: T) -> None:
+		cells = self._item_cells.pop(item)
+		if not cells:
+			self._large.remove(item)
+		for cell in cells:
+			items = self._cells[cell]
+			items.remove(item)
+			if not items:
+				del self._cells[cell]
+
+	def _add(self, item: T, cells: Tuple[Cell, ...]) -> None:
+		self._item_cells[item] = cells
+		if not cells:
+			self._large.add(item)
+		for cell in cells:
+			self._cells.setdefault(cell, set()).add(item)
+
+	def _area_cells(self, min: Vector3, max: Vector3) -> Tuple[Cell, ...]:
+		"""Cells overlapped by the area, or an empty tuple if there are too many."""
+		min_x, min_z = self.cell(min)
+		max_x, max_z = self.cell(max)
+		if (max_x - min_x + 1) * (max_z - min_z + 1) > self.MAX_AREA_CELLS:
+			return ()
+		return tuple((x, z) for x in range(min_x, max_x+1) for z in range(min_z, max_z+1))
+
+	def at(self, position: Vector3) -> Iterator[T]:
+		"""Items in the cell containing position. For area items this includes every item whose area contains position."""
+		yield from self._large
+		cell = self.cell(position)
+		if cell in self._cells:
+			yield from self._cells[cell]
+
+	def near_cell(self, cell: Cell, cell_radius: int=1) -> Iterator[T]:
+		"""
+		Items in the cells at most cell_radius cells away from the cell (including the cell itself).
+		Area items can be returned more than once.
+		"""
+		yield from self._large
+		x, z = cell
+		for cx in range(x-cell_radius, x+cell_radius+1):
+			for cz in range(z-cell_radius, z+cell_radius+1):
+				if (cx, cz) in self._cells:
+					yield from self._cells[(cx, cz)]
+
+	def query(self, position: Vector3, radius: float) -> Iterator[T]:
+		"""
+		Items in all cells overlapping the square around position with the given radius.
+		This is a superset of the items within the radius, callers need to check the exact distance if it matters.
+		Area items can be returned more than once.
+		"""
+		yield from self._large
+		min_x = int((position.x - radius) // self.cell_size)
+		max_x = int((position.x + radius) // self.cell_size)
+		min_z = int((position.z - radius) // self.cell_size)
+		max_z = int((position.z + radius) // self.cell_size)
+		if (max_x - min_x + 1) * (max_z - min_z + 1) > len(self._cells):
+			# fewer occupied cells than cells to check, go through the occupied ones instead
+			for (cx, cz), items in self._cells.items():
+				if min_x <= cx <= max_x and min_z <= cz <= max_z:
+					yield from items
+			return
+		for cx in range(min_x, max_x+1):
+			for cz in range(min_z, max_z+1):
+				if (cx, cz) in self._cells:
+					yield from self._cells[(cx, cz)]
+
+	@staticmethod
+	def cell_distance(a: Cell, b: Cell) -> int:
+		"""Number of cells between two cells, diagonal steps counting as one."""
+		return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
@@ -57,6 +57,7 @@ from typing import Tuple
 from bitstream import c_int64, c_bool, c_ubyte, c_uint, c_ushort, ReadStream
 from pyraknet.transports.abc import Connection
 from ..bitstream import WriteStream
+from ..commits import CommitConflict
 from ..game_object import Player
 from ..messages import WorldClientMsg, WorldServerMsg
 from ..world import server
@@ -98,12 +99,33 @@ class CharHandling:
 		server._dispatcher.add_listener(WorldServerMsg.CharacterDeleteRequest, self._on_character_delete_request)
 		server._dispatcher.add_listener(WorldServerMsg.EnterWorld, self._on_enter_world)
 
+	def rename(self, player: Player, name: str) -> None:
+		"""
+		Change the name of a character, keeping the name index up to date.
+		Raises ValueError if the name is taken, or CommitConflict if another instance changed the index at the same time, in which case the name is unchanged.
+		"""
+		if name == player.name:
+			return
+		with server.multi:
+			# see names claimed by other instances
+			server.conn.sync()
+			if name in server.db.characters_by_name:
+				raise ValueError("Name %s is already in use" % name)
+			if server.db.characters_by_name.get(player.name) is player:
+				del server.db.characters_by_name[player.name]
+			server.db.characters_by_name[name] = player
+			player.name = name
+		server.spawned_index.changed(player)
+
 	def _on_character_list_request(self, data: ReadStream, conn: Connection) -> None:
 		try:
 			selected_char = server.accounts[conn].selected_char()
 
 			if server.world_id[0] != 0:
 				server.replica_manager.destruct(selected_char)
+				# sync aborts the transaction and the character isn't in the world anymore, so save it now
+				selected_char.checkpoint()
+				server.commit_pending()
 		except KeyError:
 			pass
 
@@ -158,7 +180,7 @@ class CharHandling:
 			for item in char.inventory.equipped[-1]:
 				response.write(c_uint(item.lot))
 
-		conn.send(response)
+		server.send(response, conn)
 
 	def _on_character_create_request(self, request: ReadStream, conn: Connection) -> None:
 		account = server.accounts[conn]
@@ -170,11 +192,11 @@ class CharHandling:
 
 		return_code = _CharacterCreateReturnCode.Success
 
-		all_characters = [j for i in server.db.accounts.values() for j in i.characters.values()]
-		for char in all_characters:
-			if char.name == char_name:
-				return_code = _CharacterCreateReturnCode.CustomNameInUse
-				break
+		# sync aborts the transaction, so pending changes need to be committed first
+		server.commit_pending()
+		server.conn.sync()
+		if char_name in server.db.characters_by_name:
+			return_code = _CharacterCreateReturnCode.CustomNameInUse
 
 		try:
 			if return_code == _CharacterCreateReturnCode.Success:
@@ -201,8 +223,19 @@ class CharHandling:
 				characters = account.characters
 				characters[char_name] = new_char
 				account.selected_char_name = char_name
-				server.conn.transaction_manager.commit()
+				# if another instance claimed the name since the check above, this conflicts and the character isn't created
+				server.db.characters_by_name[char_name] = new_char
+				server.commit()
 				log.info("Creating new character %s", char_name)
+		except CommitConflict:
+			# the transaction has already been aborted
+			server.conn.sync()
+			if char_name in server.db.characters_by_name:
+				log.info("Character name %s was claimed by another instance", char_name)
+				return_code = _CharacterCreateReturnCode.CustomNameInUse
+			else:
+				log.error("Conflict error while creating character")
+				return_code = _CharacterCreateReturnCode.GeneralFailure
 		except Exception:
 			import traceback
 			traceback.print_exc()
@@ -212,7 +245,7 @@ class CharHandling:
 		response = WriteStream()
 		response.write_header(WorldClientMsg.CharacterCreateResponse)
 		response.write(c_ubyte(return_code))
-		conn.send(response)
+		server.send(response, conn)
 
 		if return_code == _CharacterCreateReturnCode.Success:
 			self._on_character_list_request(ReadStream(b""), conn)
@@ -224,14 +257,17 @@ class CharHandling:
 		for char in characters:
 			if characters[char].object_id == char_id:
 				log.info("Deleting character %s", char)
+				name = characters[char].name
+				if server.db.characters_by_name.get(name) is characters[char]:
+					del server.db.characters_by_name[name]
 				del characters[char]
-				server.conn.transaction_manager.commit()
+				server.commit()
 				break
 
 		response = WriteStream()
 		response.write_header(WorldClientMsg.CharacterDeleteResponse)
 		response.write(c_ubyte(_CharacterDeleteReturnCode.Success))
-		conn.send(response)
+		server.send(response, conn)
 
 		# todo: delete property
 
@@ -242,7 +278,7 @@ class CharHandling:
 		selected_char_name = [key for key, value in characters.items() if value.object_id == char_id][0]
 		server.accounts[conn].selected_char_name = selected_char_name
 		selected_char = server.accounts[conn].selected_char()
-		server.player_data[selected_char] = {"conn": conn}
+		selected_char.start_session(conn)
 		selected_char.char.online = True
 
 		if selected_char.char.world[0] == 0:
@@ -267,7 +303,7 @@ class CharHandling:
 
 	def _character_create_color_index(self, color: int) -> int:
 		index = 0
-		sorted_colors = [i for i in sorted(server.db.colors.items(), key=lambda x: x[0])]
+		sorted_colors = [i for i in sorted(server.static.colors.items(), key=lambda x: x[0])]
 		for col, valid_characters in sorted_colors:
 			if col == color:
 				break
@@ -278,6 +314,6 @@ class CharHandling:
 	def _predef_to_name(self, predef_name_ids: Tuple[int, int, int]) -> str:
 		name = ""
 		for name_type, name_id in enumerate(predef_name_ids):
-			name += server.db.predef_names[name_type][name_id]
+			name += server.static.predef_names[name_type][name_id]
 
 		return name
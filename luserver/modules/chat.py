@@ -98,7 +98,7 @@ class ChatHandling:
 		response.write(bytes(2))
 		response.write(c_ubyte(request_id))
 
-		conn.send(response)
+		server.send(response, conn)
 
 	def _on_general_chat_message(self, message: ReadStream, conn: Connection) -> None:
 		sender = server.accounts[conn].selected_char()
@@ -149,9 +149,9 @@ class ChatHandling:
 			message.write(bytes(2)) # null terminator
 
 			if broadcast:
-				conn.broadcast(message)
+				server.broadcast(message)
 			else:
-				conn.send(message)
+				server.send(message, conn)
 
 	def send_private_chat_message(self, sender: GameObject, text: str, recipient: GameObject) -> None:
 		participants = []
@@ -185,7 +185,7 @@ class ChatHandling:
 			message.write(c_ubyte(return_code))
 			message.write(text, allocated_length=(len(text)+1))
 
-			conn.send(message)
+			server.send(message, conn)
 
 	def _on_private_chat_message(self, message: ReadStream, conn: Connection) -> None:
 		assert message.read(c_int64) == 0 # unknown
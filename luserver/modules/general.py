@@ -3,22 +3,76 @@ For world server packet handling that is general enough not to be grouped in a s
 """
 import asyncio
 import logging
+import struct
 import xml.etree.ElementTree as ET
-from typing import cast, Dict, Tuple
+from typing import cast, Optional, Tuple
 
-from bitstream import c_bit, c_float, c_int64, c_uint, c_ushort, ReadStream
+from bitstream import c_bit, c_int64, c_uint, c_ushort, ReadStream
 from pyraknet.transports.abc import Connection
 from ..auth import GMLevel
 from ..bitstream import WriteStream
-from ..game_object import ControllableObject, GameObject, Player
+from ..game_object import ControllableObject, Player
 from ..ldf import LDF, LDFDataType
 from ..messages import WorldClientMsg, WorldServerMsg
 from ..world import server, World
 from ..components.mission import TaskType
-from ..components.physics import Collider
+from ..components.physics import ColliderIndex, Controllable
 
 log = logging.getLogger(__name__)
 
+_TRANSFORM = struct.Struct("<7f")
+_FLOAT3 = struct.Struct("<3f")
+
+PositionUpdate = Tuple[Tuple[float, float, float, float, float, float, float], bool, bool, Optional[Tuple[float, float, float]], Optional[Tuple[float, float, float]], Optional[int], Optional[Tuple[float, float, float]], Optional[Tuple[float, float, float]]]
+
+def decode_position_update(message: ReadStream) -> PositionUpdate:
+	"""
+	Decode a position update packet.
+	The position and rotation are always present and read in one go, the optional float triples are also read as one chunk each.
+	Returns (transform, on_ground, unknown_bool, velocity, angular_velocity, unknown_object_id, unknown_float3, deeper_unknown_float3), with None for absent values.
+	"""
+	transform = _TRANSFORM.unpack(message.read(bytes, length=_TRANSFORM.size))
+	on_ground = message.read(c_bit)
+	unknown_bool = message.read(c_bit)
+	velocity = None
+	angular_velocity = None
+	unknown_object_id = None
+	unknown_float3 = None
+	deeper_unknown_float3 = None
+	if message.read(c_bit):
+		velocity = _FLOAT3.unpack(message.read(bytes, length=_FLOAT3.size))
+	if message.read(c_bit):
+		angular_velocity = _FLOAT3.unpack(message.read(bytes, length=_FLOAT3.size))
+	if message.read(c_bit):
+		# apparently moving platform stuff
+		unknown_object_id = message.read(c_int64)
+		unknown_float3 = _FLOAT3.unpack(message.read(bytes, length=_FLOAT3.size))
+		if message.read(c_bit):
+			deeper_unknown_float3 = _FLOAT3.unpack(message.read(bytes, length=_FLOAT3.size))
+	return transform, on_ground, unknown_bool, velocity, angular_velocity, unknown_object_id, unknown_float3, deeper_unknown_float3
+
+def apply_position_update(physics: Controllable, update: PositionUpdate) -> None:
+	"""Apply a decoded position update to a physics component, updating the position, rotation and velocity vectors in place."""
+	transform, on_ground, unknown_bool, velocity, angular_velocity, unknown_object_id, unknown_float3, deeper_unknown_float3 = update
+	position = physics.position
+	rotation = physics.rotation
+	position.x, position.y, position.z, rotation.x, rotation.y, rotation.z, rotation.w = transform
+	# position and rotation are serialized under the same flag, one notification covers both
+	physics.attr_changed("position")
+	physics.on_ground = on_ground
+	physics.unknown_bool = unknown_bool
+	if velocity is not None:
+		vel = physics.velocity
+		vel.x, vel.y, vel.z = velocity
+		physics.attr_changed("velocity")
+	if angular_velocity is not None:
+		physics.angular_velocity = angular_velocity
+	if unknown_object_id is not None:
+		physics.unknown_object_id = unknown_object_id
+		physics.unknown_float3 = unknown_float3
+		if deeper_unknown_float3 is not None:
+			physics.deeper_unknown_float3 = deeper_unknown_float3
+
 # Constant checksums that the client expects to verify map version
 # (likely value of the last map revision)
 _CHECKSUMS = {
@@ -57,7 +111,7 @@ _CHECKSUMS = {
 
 class GeneralHandling:
 	def __init__(self) -> None:
-		self.tracked_objects: Dict[GameObject, Collider] = {}
+		self.tracked_objects = ColliderIndex()
 
 		server._dispatcher.add_listener(WorldServerMsg.LoadComplete, self._on_client_load_complete)
 		server._dispatcher.add_listener(WorldServerMsg.PositionUpdate, self._on_position_update)
@@ -66,8 +120,8 @@ class GeneralHandling:
 	def on_validated(self, conn: Connection) -> None:
 		if server.world_id[0] != 0:
 			player = server.accounts[conn].selected_char()
-			server.player_data[player] = {"conn": conn}
-			server.game_objects[player.object_id] = player
+			player.start_session(conn)
+			server.add_game_object(player)
 			player.parent = None
 			player.children = []
 			player.parent_flag = False
@@ -94,7 +148,7 @@ class GeneralHandling:
 		load_world.write(bytes(2))
 		load_world.write(player.physics.position)
 		load_world.write(bytes(4))
-		conn.send(load_world)
+		server.send(load_world, conn)
 
 	def _on_client_load_complete(self, data: ReadStream, conn: Connection) -> None:
 		player = server.accounts[conn].selected_char()
@@ -178,6 +232,10 @@ class GeneralHandling:
 								ET.SubElement(m, "sv", v=str(collectible_id))
 			elif mission.state == 8:
 				ET.SubElement(done, "m", id=str(mission_id))
+		for mission_id in player.char.mission.pristine_achievements():
+			m = ET.SubElement(cur, "m", id=str(mission_id))
+			for _ in server.static.missions[mission_id][2]:
+				ET.SubElement(m, "sv")
 
 		#import xml.dom.minidom
 		#xml = xml.dom.minidom.parseString((ET.tostring(root, encoding="unicode")))
@@ -191,68 +249,34 @@ class GeneralHandling:
 
 		encoded_ldf = chd_ldf.to_bytes()
 		chardata.write(encoded_ldf)
-		conn.send(chardata)
+		server.send(chardata, conn)
 
-		server.replica_manager.add_participant(conn)  # Add to replica manager sync list
+		server.replica_manager.add_participant(conn, player)  # Add to replica manager sync list
 		server.replica_manager.construct(player)
 		player.char.server_done_loading_all_objects()
 
 	def _on_position_update(self, message: ReadStream, conn: Connection) -> None:
 		player = server.accounts[conn].selected_char()
-		vehicle = None
+		update = decode_position_update(message)
+		unknown_bool = update[2]
+		if unknown_bool:
+			print("is on rail?", unknown_bool)
 		if player.char.vehicle_id != 0:
 			vehicle = cast(ControllableObject, server.game_objects[player.char.vehicle_id])
+			# the vehicle is serialized instead of the player
 			serialized = player._serialize_scheduled
 			player._serialize_scheduled = True
-		player.physics.position.update(message.read(c_float), message.read(c_float), message.read(c_float))
-		player.physics.attr_changed("position")
-		player.physics.rotation.update(message.read(c_float), message.read(c_float), message.read(c_float), message.read(c_float))
-		player.physics.attr_changed("rotation")
-		player.physics.on_ground = message.read(c_bit)
-		player.physics.unknown_bool = message.read(c_bit)
-		if player.physics.unknown_bool:
-			print("is on rail?", player.physics.unknown_bool)
-		if vehicle:
-			vehicle.physics.position.update(player.physics.position)
-			vehicle.physics.attr_changed("position")
-			vehicle.physics.rotation.update(player.physics.rotation)
-			vehicle.physics.attr_changed("rotation")
-			vehicle.physics.on_ground = player.physics.on_ground
-			vehicle.physics.unknown_bool = player.physics.unknown_bool
-		if message.read(c_bit):
-			player.physics.velocity.update(message.read(c_float), message.read(c_float), message.read(c_float))
-			player.physics.attr_changed("velocity")
-			if vehicle:
-				vehicle.physics.velocity.update(player.physics.velocity)
-				vehicle.physics.attr_changed("velocity")
-		if message.read(c_bit):
-			player.physics.angular_velocity = message.read(c_float), message.read(c_float), message.read(c_float)
-			if vehicle:
-				vehicle.physics.angular_velocity = player.physics.angular_velocity
-		if message.read(c_bit):
-			# apparently moving platform stuff
-			player.physics.unknown_object_id = message.read(c_int64)
-			player.physics.unknown_float3 = message.read(c_float), message.read(c_float), message.read(c_float)
-			#print("unknown_object_id", player.physics.unknown_object_id, "unknown_float3", player.physics.unknown_float3)
-			if vehicle:
-				vehicle.physics.unknown_object_id = player.physics.unknown_object_id
-				vehicle.physics.unknown_float3 = player.physics.unknown_float3
-			if message.read(c_bit):
-				player.physics.deeper_unknown_float3 = message.read(c_float), message.read(c_float), message.read(c_float)
-				#print("deeper_unknown_float3", player.deeper_unknown_float3)
-				if vehicle:
-					vehicle.physics.deeper_unknown_float3 = player.physics.deeper_unknown_float3
-		if vehicle:
+			apply_position_update(player.physics, update)
 			player._serialize_scheduled = serialized
+			apply_position_update(vehicle.physics, update)
+		else:
+			apply_position_update(player.physics, update)
 
 		if player.stats.life != 0:
 			self._check_collisions(player)
 
 	def _check_collisions(self, player: Player) -> None:
-		collisions = []
-		for obj, coll in self.tracked_objects.items():
-			if coll.is_point_within(player.physics.position):
-				collisions.append(obj.object_id)
+		collisions = [obj.object_id for obj in self.tracked_objects.colliding(player.physics.position)]
 
 		for object_id in collisions:
 			if object_id not in player.char.last_collisions:
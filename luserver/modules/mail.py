@@ -69,7 +69,7 @@ class MailHandling:
 			if attachment_item_count != 0:
 				removed_item = player.inventory.remove_item(InventoryType.Max, object_id=attachment_item_object_id, count=attachment_item_count)
 				object_id = server.new_object_id()
-				attachment = Stack(server.db, object_id, removed_item.lot, attachment_item_count)
+				attachment = Stack(server.static, object_id, removed_item.lot, attachment_item_count)
 				attachment_cost = (removed_item.base_value * attachment_item_count)//10
 			else:
 				attachment = None
@@ -93,7 +93,7 @@ class MailHandling:
 			out.write_header(WorldClientMsg.Mail)
 			out.write(c_uint(MailID.MailSendResponse))
 			out.write(c_uint(return_code))
-			player.char.data()["conn"].send(out)
+			server.send(out, player.char.data()["conn"])
 
 	def send_mail(self, sender_name: str, subject: str, body: str, recipient: Player, attachment: Stack=None) -> None:
 		mail = Mail(server.new_object_id(), sender_name, subject, body, attachment)
@@ -132,7 +132,7 @@ class MailHandling:
 			mails.write(bytes(1))
 			mails.write(bytes(2))
 			mails.write(bytes(4))
-		player.char.data()["conn"].send(mails)
+		server.send(mails, player.char.data()["conn"])
 
 	def _on_mail_attachment_collect(self, data: ReadStream, player: Player) -> None:
 		data.skip_read(4) # ???
@@ -146,7 +146,7 @@ class MailHandling:
 				out.write(c_uint(MailID.MailAttachmentCollectResponse))
 				out.write(bytes(4))
 				out.write(c_int64(mail_id))
-				player.char.data()["conn"].send(out)
+				server.send(out, player.char.data()["conn"])
 				break
 
 	def _on_mail_delete(self, data: ReadStream, player: Player) -> None:
@@ -160,7 +160,7 @@ class MailHandling:
 				out.write(c_uint(MailID.MailDeleteResponse))
 				out.write(bytes(4))
 				out.write(c_int64(mail_id))
-				player.char.data()["conn"].send(out)
+				server.send(out, player.char.data()["conn"])
 				break
 
 	def _on_mail_read(self, data: ReadStream, player: Player) -> None:
@@ -174,7 +174,7 @@ class MailHandling:
 				out.write(c_uint(MailID.MailReadResponse))
 				out.write(bytes(4))
 				out.write(c_int64(mail_id))
-				player.char.data()["conn"].send(out)
+				server.send(out, player.char.data()["conn"])
 				break
 
 	def _send_mail_notification(self, player: Player) -> None:
@@ -188,7 +188,7 @@ class MailHandling:
 		notification.write(bytes(32))
 		notification.write(c_uint(unread_mails_count))
 		notification.write(bytes(4))
-		player.char.data()["conn"].send(notification)
+		server.send(notification, player.char.data()["conn"])
 
 class Mail(persistent.Persistent):
 	def __init__(self, id: int, sender: str, subject: str, body: str, attachment: Stack=None):
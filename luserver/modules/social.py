@@ -51,7 +51,7 @@ class SocialHandling:
 			friends_list.write(c_int64(friend.object_id))
 			friends_list.write(friend.name, allocated_length=33)
 			friends_list.write(bytes(6)) # ???
-		conn.send(friends_list)
+		server.send(friends_list, conn)
 
 	def _on_add_friend_request(self, request: ReadStream, conn: Connection) -> None:
 		assert request.read(c_int64) == 0
@@ -65,7 +65,7 @@ class SocialHandling:
 			relayed_request.write_header(WorldClientMsg.AddFriendRequest)
 			relayed_request.write(server.accounts[conn].selected_char().name, allocated_length=33)
 			relayed_request.write(c_bool(is_best_friend_request))
-			requested_friend.char.data()["conn"].send(relayed_request)
+			server.send(relayed_request, requested_friend.char.data()["conn"])
 		except KeyError:
 			# friend cannot be found
 			self._send_add_friend_response(_AddFriendReturnCode.Failure, conn, requested_name=requested_friend_name)
@@ -88,7 +88,7 @@ class SocialHandling:
 
 		response.write(c_bool(False)) # is best friend (not implemented)
 		response.write(c_bool(False)) # is FTP
-		conn.send(response)
+		server.send(response, conn)
 
 	def _on_add_friend_response(self, response: ReadStream, conn: Connection) -> None:
 		assert response.read(c_int64) == 0
@@ -124,7 +124,7 @@ class SocialHandling:
 			remove_message.write_header(WorldClientMsg.RemoveFriendResponse)
 			remove_message.write(c_bool(True)) # Successful
 			remove_message.write(player2_ref().name, allocated_length=33)
-			player1_ref().char.data()["conn"].send(remove_message)
+			server.send(remove_message, player1_ref().char.data()["conn"])
 
 	def _on_team_invite(self, invite: ReadStream, conn: Connection) -> None:
 		assert invite.read(c_int64) == 0
@@ -137,7 +137,7 @@ class SocialHandling:
 		relayed_invite.write_header(WorldClientMsg.TeamInvite)
 		relayed_invite.write(sender.name, allocated_length=33)
 		relayed_invite.write(c_int64(sender.object_id))
-		invitee.char.data()["conn"].send(relayed_invite)
+		server.send(relayed_invite, invitee.char.data()["conn"])
 		# todo: error cases and response
 
 	def _on_team_invite_response(self, response: ReadStream, conn: Connection) -> None:
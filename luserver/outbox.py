@@ -0,0 +1,35 @@
+from typing import Sequence, SupportsBytes
+
+from pyraknet.transports.abc import Connection, Reliability
+
+class Outbox:
+	"""
+	Sends packets to one or more connections and counts the bytes built and sent.
+
+	Each packet is converted to bytes once, and the same buffer is passed to every recipient.
+	Packets are handed to the transport right away, so they stay in order with everything else sent to a connection.
+	LU messages can't be combined into one RakNet message, packing them into datagrams is left to the transport.
+	"""
+
+	def __init__(self) -> None:
+		self.reset_stats()
+
+	def reset_stats(self) -> None:
+		self.packets_built = 0
+		self.bytes_built = 0
+		self.packets_sent = 0
+		self.bytes_sent = 0
+
+	def send(self, data: SupportsBytes, recipients: Sequence[Connection], reliability: Reliability=Reliability.ReliableOrdered) -> None:
+		if not recipients:
+			return
+		data = bytes(data)
+		for conn in recipients:
+			conn.send(data, reliability)
+		self.packets_built += 1
+		self.bytes_built += len(data)
+		self.packets_sent += len(recipients)
+		self.bytes_sent += len(data) * len(recipients)
+
+	def __str__(self) -> str:
+		return "%i packets (%i bytes) built, %i packets (%i bytes) sent" % (self.packets_built, self.bytes_built, self.packets_sent, self.bytes_sent)
@@ -12,7 +12,7 @@ class ScriptComponent(script.ScriptComponent):
 	def on_use(self, player: Player, multi_interact_id: Optional[int]) -> None:
 		assert multi_interact_id is None
 		if player.inventory.has_item(InventoryType.Items, RED_IMAGINITE):
-			rewards = server.db.activity_rewards[self.object.scripted_activity.activity_id]
+			rewards = server.static.activity_rewards[self.object.scripted_activity.activity_id]
 			rating = random.randrange(1000)
 			chosen = None
 			for act_rating, rews in rewards:
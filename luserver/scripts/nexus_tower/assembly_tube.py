@@ -3,7 +3,7 @@ from luserver.world import server
 
 class ScriptComponent(script.ScriptComponent):
 	def on_enter(self, player):
-		for obj in server.world_data.objects.values():
-			if obj.lot == 4945 and self.script_vars["teleport_respawn_point_name"] in obj.groups: # respawn point lot
+		for obj in server.get_objects_in_group(self.script_vars["teleport_respawn_point_name"]):
+			if obj.lot == 4945: # respawn point lot
 				player.char.teleport(ignore_y=False, pos=obj.physics.position, set_rotation=True, x=obj.physics.rotation.x, y=obj.physics.rotation.y, z=obj.physics.rotation.z, w=obj.physics.rotation.w)
 				break
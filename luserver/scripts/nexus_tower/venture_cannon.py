@@ -7,9 +7,8 @@ from luserver.world import server
 class ScriptComponent(script.ScriptComponent):
 	def on_use(self, player: Player, multi_interact_id: Optional[int]) -> None:
 		assert multi_interact_id is None
-		for obj in server.world_data.objects.values():
-			if obj.lot == 4945:
-				print(obj.groups)
-			#if obj.lot == 4945 and self.script_vars["teleport_respawn_point_name"] in obj.groups: # respawn point lot
-				player.char.teleport(ignore_y=False, pos=obj.physics.position, set_rotation=True, x=obj.physics.rotation.x, y=obj.physics.rotation.y, z=obj.physics.rotation.z, w=obj.physics.rotation.w)
-				break
+		for obj in server.get_objects_by_lot(4945): # respawn point lot
+			print(obj.groups)
+			#if self.script_vars["teleport_respawn_point_name"] in obj.groups:
+			player.char.teleport(ignore_y=False, pos=obj.physics.position, set_rotation=True, x=obj.physics.rotation.x, y=obj.physics.rotation.y, z=obj.physics.rotation.z, w=obj.physics.rotation.w)
+			break
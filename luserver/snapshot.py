@@ -0,0 +1,135 @@
+"""
+Binary snapshot of the static tables, laid out to be memory-mapped read-only.
+Since the mapping is backed by the file, its pages are shared between all instance processes on a machine, and a new instance doesn't need to pull the tables out of ZEO.
+
+Layout (little endian):
+	header: magic, format version, static version, directory offset, directory length
+	tables, each 8-byte aligned:
+		mapping tables: sorted int64 keys, uint64 value offsets (one more than keys), pickled values
+		other tables: a single pickled value
+	directory: pickled dict of table name -> (kind, offset, count or length)
+Values are unpickled on first access and memoized per process.
+"""
+import bisect
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import Mapping
+from typing import Any, BinaryIO, Callable, Dict, Iterator
+
+MAGIC = b"LUSS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sIIQQ")
+_KIND_MAPPING = 0
+_KIND_VALUE = 1
+
+def _is_int_mapping(value: Any) -> bool:
+	if not hasattr(value, "items") or not hasattr(value, "keys"):
+		return False
+	return all(isinstance(key, int) and -2**63 <= key < 2**63 for key in value.keys())
+
+def _align(file: BinaryIO) -> int:
+	pos = file.tell()
+	padding = -pos % 8
+	file.write(bytes(padding))
+	return pos + padding
+
+def _plain(value: Any) -> Any:
+	"""Convert DB containers to builtins so that the snapshot doesn't depend on ZODB."""
+	if hasattr(value, "items") and hasattr(value, "keys"):
+		return {key: _plain(val) for key, val in value.items()}
+	if isinstance(value, (list, tuple)):
+		return tuple(_plain(item) for item in value)
+	return value
+
+def write_snapshot(path: str, version: int, tables: Dict[str, Any], plain: Callable[[Any], Any]=_plain) -> None:
+	"""
+	Write the tables to path.
+	The file is written next to it first and then moved in place, so that instances that have the old snapshot mapped keep working.
+	"""
+	directory = {}
+	tmp_path = path + ".tmp"
+	with open(tmp_path, "wb") as file:
+		file.write(bytes(_HEADER.size))
+		for name, table in tables.items():
+			offset = _align(file)
+			if _is_int_mapping(table):
+				keys = sorted(table.keys())
+				values = [pickle.dumps(plain(table[key]), pickle.HIGHEST_PROTOCOL) for key in keys]
+				file.write(struct.pack("<%iq" % len(keys), *keys))
+				value_offsets = [0]
+				for value in values:
+					value_offsets.append(value_offsets[-1] + len(value))
+				file.write(struct.pack("<%iQ" % len(value_offsets), *value_offsets))
+				for value in values:
+					file.write(value)
+				directory[name] = _KIND_MAPPING, offset, len(keys)
+			else:
+				value = pickle.dumps(plain(table), pickle.HIGHEST_PROTOCOL)
+				file.write(value)
+				directory[name] = _KIND_VALUE, offset, len(value)
+		directory_offset = _align(file)
+		directory_data = pickle.dumps(directory, pickle.HIGHEST_PROTOCOL)
+		file.write(directory_data)
+		file.seek(0)
+		file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, version, directory_offset, len(directory_data)))
+	os.replace(tmp_path, path)
+
+class SnapshotTable(Mapping):
+	"""Read-only int-keyed mapping backed by the snapshot. Lookups binary search the key array and only unpickle the requested value."""
+
+	def __init__(self, data: memoryview, offset: int, count: int, convert: Callable[[Any], Any]):
+		self._keys = data[offset:offset+8*count].cast("q")
+		offsets_start = offset+8*count
+		self._offsets = data[offsets_start:offsets_start+8*(count+1)].cast("Q")
+		self._values = data[offsets_start+8*(count+1):]
+		self._convert = convert
+		self._memo: Dict[int, Any] = {}
+
+	def _index(self, key: Any) -> int:
+		if not isinstance(key, int):
+			return -1
+		index = bisect.bisect_left(self._keys, key)
+		if index == len(self._keys) or self._keys[index] != key:
+			return -1
+		return index
+
+	def __getitem__(self, key: int) -> Any:
+		if key in self._memo:
+			return self._memo[key]
+		index = self._index(key)
+		if index == -1:
+			raise KeyError(key)
+		value = self._convert(pickle.loads(self._values[self._offsets[index]:self._offsets[index+1]]))
+		self._memo[key] = value
+		return value
+
+	def __contains__(self, key: object) -> bool:
+		return key in self._memo or self._index(key) != -1
+
+	def __iter__(self) -> Iterator[int]:
+		return iter(self._keys)
+
+	def __len__(self) -> int:
+		return len(self._keys)
+
+class Snapshot:
+	def __init__(self, path: str):
+		with open(path, "rb") as file:
+			self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		self._data = memoryview(self._mmap)
+		magic, format_version, self.version, directory_offset, directory_length = _HEADER.unpack_from(self._data)
+		if magic != MAGIC or format_version != FORMAT_VERSION:
+			raise ValueError("%s is not a static data snapshot of format version %i" % (path, FORMAT_VERSION))
+		self._directory: Dict[str, Any] = pickle.loads(self._data[directory_offset:directory_offset+directory_length])
+
+	def __contains__(self, name: str) -> bool:
+		return name in self._directory
+
+	def table(self, name: str, convert: Callable[[Any], Any]=lambda value: value) -> Any:
+		"""Get a table, as a SnapshotTable for int-keyed mappings, otherwise as the unpickled value. convert is applied to values after unpickling."""
+		kind, offset, size = self._directory[name]
+		if kind == _KIND_MAPPING:
+			return SnapshotTable(self._data, offset, size, convert)
+		return convert(pickle.loads(self._data[offset:offset+size]))
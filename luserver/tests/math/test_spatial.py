@@ -0,0 +1,60 @@
+import unittest
+from luserver.math.spatial import SpatialHash
+from luserver.math.vector import Vector3
+
+class SpatialHashTest(unittest.TestCase):
+	def setUp(self):
+		self.grid = SpatialHash(10)
+		self.grid.insert("a", Vector3(1, 0, 1))
+		self.grid.insert("b", Vector3(15, 0, 1))
+		self.grid.insert("c", Vector3(-25, 100, 40))
+
+	def test_cell(self):
+		self.assertEqual(self.grid.cell(Vector3(1, 0, 1)), (0, 0))
+		self.assertEqual(self.grid.cell(Vector3(-1, 0, 19)), (-1, 1))
+
+	def test_contains(self):
+		self.assertIn("a", self.grid)
+		self.assertNotIn("d", self.grid)
+		self.assertEqual(len(self.grid), 3)
+
+	def test_near_cell(self):
+		self.assertEqual(set(self.grid.near_cell((0, 0))), {"a", "b"})
+		self.assertEqual(set(self.grid.near_cell((-3, 4), 0)), {"c"})
+
+	def test_query(self):
+		self.assertEqual(set(self.grid.query(Vector3(0, 0, 0), 5)), {"a"})
+		self.assertEqual(set(self.grid.query(Vector3(0, 0, 0), 50)), {"a", "b", "c"})
+
+	def test_move(self):
+		self.assertFalse(self.grid.move("a", Vector3(2, 0, 2)))
+		self.assertTrue(self.grid.move("a", Vector3(-25, 0, 45)))
+		self.assertEqual(set(self.grid.near_cell((-3, 4), 0)), {"a", "c"})
+		self.assertEqual(set(self.grid.near_cell((0, 0), 0)), set())
+
+	def test_remove(self):
+		self.grid.remove("b")
+		self.assertNotIn("b", self.grid)
+		self.assertEqual(set(self.grid.query(Vector3(15, 0, 1), 1)), set())
+
+	def test_cell_distance(self):
+		self.assertEqual(SpatialHash.cell_distance((0, 0), (1, -1)), 1)
+		self.assertEqual(SpatialHash.cell_distance((0, 0), (3, 1)), 3)
+
+	def test_area(self):
+		self.grid.insert_area("box", Vector3(5, 0, 5), Vector3(25, 10, 12))
+		self.assertIn("box", set(self.grid.at(Vector3(22, 0, 11))))
+		self.assertIn("box", set(self.grid.at(Vector3(6, 0, 6))))
+		self.assertNotIn("box", set(self.grid.at(Vector3(35, 0, 11))))
+		self.assertTrue(self.grid.move_area("box", Vector3(30, 0, 5), Vector3(38, 10, 8)))
+		self.assertIn("box", set(self.grid.at(Vector3(35, 0, 6))))
+		self.assertNotIn("box", set(self.grid.at(Vector3(6, 0, 6))))
+		self.grid.remove("box")
+		self.assertNotIn("box", self.grid)
+
+	def test_large_area(self):
+		self.grid.insert_area("plane", Vector3(-1000, 0, -1000), Vector3(1000, 0, 1000))
+		self.assertIn("plane", set(self.grid.at(Vector3(500, 0, -500))))
+		self.assertIn("plane", set(self.grid.query(Vector3(0, 0, 0), 1)))
+		self.grid.remove("plane")
+		self.assertEqual(set(self.grid.at(Vector3(500, 0, -500))), set())
@@ -49,6 +49,44 @@ class GameObjectTest(SessionWorldTest):
 				self.player.on_game_message(ReadStream(data), self.ADDRESS)
 			self.mock.assert_called_once_with(self.player, 12345)
 
+	def test_on_game_message_after_add_handler(self):
+		self.mock = Mock()
+		stream = WriteStream()
+		stream.write(c_ushort(12345))
+		stream.write(c_int(12345))
+		data = bytes(stream)
+
+		with patch("luserver.game_object.GameMessage", Enum("GameMessage", {"SampleGameMessage": 12345})):
+			self.player.on_game_message(ReadStream(data), self.ADDRESS)
+			self.mock.assert_not_called()
+			self.player.add_handler("sample_game_message", self.sample_game_message_player)
+			self.player.on_game_message(ReadStream(data), self.ADDRESS)
+		self.mock.assert_called_once_with(self.player, 12345)
+
+	def test_handlers_keep_order_of_adding(self):
+		calls = []
+		class Source:
+			def on_sample_event(self):
+				calls.append("source")
+		source = Source()
+		self.player.add_handler("sample_event", lambda: calls.append("first"))
+		self.player.add_handlers(source)
+		self.player.add_handler("sample_event", lambda: calls.append("last"))
+		self.player.handle("sample_event")
+		self.assertEqual(calls, ["first", "source", "last"])
+		calls.clear()
+		self.player.remove_handler("sample_event", source.on_sample_event)
+		self.player.handle("sample_event")
+		self.assertEqual(calls, ["first", "last"])
+
+	def test_session_state_is_stored_at_checkpoint(self):
+		self.player.start_session(self.ADDRESS)
+		self.player.physics.position.x = 100
+		self.assertNotEqual(self.player.physics.__dict__["position"].x, 100)
+		self.player.checkpoint()
+		self.assertEqual(self.player.physics.__dict__["position"].x, 100)
+		self.assertEqual(self.player.physics.position.x, 100)
+
 	def test_send_game_message(self):
 		self.mock = Mock()
 		self.object = self.player
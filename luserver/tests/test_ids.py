@@ -0,0 +1,58 @@
+import unittest
+
+import transaction
+import ZODB
+
+from luserver.ids import IDCounter, IDLease
+
+class IDLeaseTest(unittest.TestCase):
+	def setUp(self):
+		self.db = ZODB.DB(None)
+		self.conn_a = self.db.open(transaction.TransactionManager())
+		self.conn_b = self.db.open(transaction.TransactionManager())
+		self.conn_a.root.ids = IDCounter(1)
+		self.conn_a.transaction_manager.commit()
+		self.conn_b.sync()
+
+	def tearDown(self):
+		self.conn_a.close()
+		self.conn_b.close()
+		self.db.close()
+
+	def lease(self, conn, size=10):
+		return IDLease(conn, conn.transaction_manager.commit, "ids", size)
+
+	def test_ids_from_one_range(self):
+		lease = self.lease(self.conn_a)
+		self.assertEqual([lease.next() for _ in range(12)], list(range(1, 13)))
+		self.assertEqual(self.conn_a.root.ids.next_id, 21)
+
+	def test_concurrent_reservations_dont_overlap(self):
+		lease_a = self.lease(self.conn_a)
+		lease_b = self.lease(self.conn_b)
+		ids_a = {lease_a.next() for _ in range(25)}
+		ids_b = {lease_b.next() for _ in range(25)}
+		self.assertFalse(ids_a & ids_b)
+
+	def test_release_returns_unused(self):
+		lease = self.lease(self.conn_a)
+		lease.next()
+		lease.next()
+		lease.release()
+		self.assertEqual(self.conn_a.root.ids.next_id, 3)
+
+	def test_release_skips_after_other_reservation(self):
+		lease_a = self.lease(self.conn_a)
+		lease_b = self.lease(self.conn_b)
+		lease_a.next()
+		lease_b.next()
+		lease_a.release()
+		self.conn_a.sync()
+		self.assertEqual(self.conn_a.root.ids.next_id, 21)
+
+	def test_migrate_int_counter(self):
+		self.conn_a.root.ids = 5
+		self.conn_a.transaction_manager.commit()
+		lease = self.lease(self.conn_a)
+		self.assertEqual(lease.next(), 5)
+		self.assertIsInstance(self.conn_a.root.ids, IDCounter)
@@ -0,0 +1,76 @@
+import math
+import random
+import unittest
+from collections import Counter
+
+from luserver.loot import LootSampler
+
+LOOT_TABLE = {
+	1: ((100, False, 0), (101, False, 0), (102, True, 0)),
+	2: ((200, False, 0), (201, False, 0)),
+	3: ((300, True, 0),),
+	4: ((100, False, 0), (400, False, 0), (401, False, 0), (402, False, 0)),
+}
+LOOT_MATRIX = (1, 0.9, 1, 2), (2, 0.5, 0, 3), (3, 0.1, 1, 1), (4, 0.5, 2, 2)
+TRIALS = 20000
+
+def reference_roll(rng):
+	"""The per-item loop that the sampler replaces."""
+	drops = Counter()
+	roll = rng.random()
+	for table_index, percent, min_to_drop, max_to_drop in LOOT_MATRIX:
+		if roll < percent:
+			for _ in range(rng.randint(min_to_drop, max_to_drop)):
+				lot, mission_drop, _ = rng.choice(LOOT_TABLE[table_index])
+				drops[lot, mission_drop] += 1
+	return drops
+
+class LootSamplerTest(unittest.TestCase):
+	def setUp(self):
+		self.sampler = LootSampler(LOOT_MATRIX, LOOT_TABLE)
+
+	def stats(self, rolls):
+		"""Mean and variance of the drop count per entry, and the distribution of the total number of drops."""
+		sums = Counter()
+		squares = Counter()
+		totals = Counter()
+		for drops in rolls:
+			for entry, count in drops.items():
+				sums[entry] += count
+				squares[entry] += count**2
+			totals[sum(drops.values())] += 1
+		means = {entry: sums[entry] / TRIALS for entry in sums}
+		variances = {entry: squares[entry] / TRIALS - means[entry]**2 for entry in sums}
+		return means, variances, totals
+
+	def assert_close(self, mean, expected_mean, variance, trials):
+		# 5 standard errors, with fixed seeds this doesn't flake
+		self.assertLess(abs(mean - expected_mean), 5 * math.sqrt(2 * variance / trials) + 1e-9)
+
+	def test_single_rolls_match_reference(self):
+		rng = random.Random(1)
+		expected_means, variances, expected_totals = self.stats(reference_roll(rng) for _ in range(TRIALS))
+		rng = random.Random(2)
+		means, _, totals = self.stats(self.sampler.roll(rng=rng) for _ in range(TRIALS))
+		self.assertEqual(means.keys(), expected_means.keys())
+		for entry in expected_means:
+			self.assert_close(means[entry], expected_means[entry], variances[entry], TRIALS)
+		for total in expected_totals.keys() | totals.keys():
+			self.assertAlmostEqual(totals[total] / TRIALS, expected_totals[total] / TRIALS, delta=0.015)
+
+	def test_batched_roll_matches_reference(self):
+		rng = random.Random(3)
+		expected_means, variances, _ = self.stats(reference_roll(rng) for _ in range(TRIALS))
+		batches = 200
+		batch_size = TRIALS // batches
+		drops = Counter()
+		rng = random.Random(4)
+		for _ in range(batches):
+			drops.update(self.sampler.roll(batch_size, rng))
+		for entry in expected_means:
+			self.assert_close(drops[entry] / TRIALS, expected_means[entry], variances[entry], TRIALS)
+
+	def test_roll_below_all_percents_drops_nothing(self):
+		sampler = LootSampler(((1, 0.0, 1, 1),), LOOT_TABLE)
+		self.assertEqual(sampler.roll(), Counter())
+		self.assertEqual(sampler.roll(50), Counter())
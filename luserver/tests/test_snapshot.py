@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from luserver.snapshot import Snapshot, write_snapshot
+
+class SnapshotTest(unittest.TestCase):
+	def setUp(self):
+		fd, self.path = tempfile.mkstemp()
+		os.close(fd)
+		write_snapshot(self.path, 3, {"missions": {5: (1, [2, 3]), -1: "neg", 1 << 40: {"a": 1}}, "level_scores": [0, 10, 30]})
+		self.snapshot = Snapshot(self.path)
+
+	def tearDown(self):
+		del self.snapshot
+		os.remove(self.path)
+
+	def test_version(self):
+		self.assertEqual(self.snapshot.version, 3)
+
+	def test_mapping_table(self):
+		missions = self.snapshot.table("missions")
+		self.assertEqual(len(missions), 3)
+		self.assertEqual(list(missions), [-1, 5, 1 << 40])
+		self.assertEqual(missions[5], (1, (2, 3)))
+		self.assertEqual(missions[1 << 40], {"a": 1})
+		self.assertIn(-1, missions)
+		self.assertNotIn(4, missions)
+		self.assertNotIn("5", missions)
+		with self.assertRaises(KeyError):
+			missions[6]
+
+	def test_value_table(self):
+		self.assertEqual(self.snapshot.table("level_scores"), (0, 10, 30))
+
+	def test_convert(self):
+		missions = self.snapshot.table("missions", lambda value: ("converted", value))
+		self.assertEqual(missions[-1], ("converted", "neg"))
+
+	def test_invalid_file(self):
+		with open(self.path, "wb") as file:
+			file.write(bytes(64))
+		with self.assertRaises(ValueError):
+			Snapshot(self.path)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import Mock
+
+from luserver.commonserver import StaticCache
+from luserver.snapshot import write_snapshot
+
+class StaticCacheTest(unittest.TestCase):
+	def setUp(self):
+		fd, self.path = tempfile.mkstemp()
+		os.close(fd)
+		os.remove(self.path)
+		self.db = SimpleNamespace(static_version=1, missions={5: [1, [2, 3]], 6: {"a": [4]}}, level_scores=[0, 10, 30], world_data={})
+		self.cache = StaticCache(self.path)
+
+	def tearDown(self):
+		del self.cache
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+	def test_freeze(self):
+		self.cache.refresh(self.db)
+		self.assertIsInstance(self.cache.missions, MappingProxyType)
+		self.assertEqual(self.cache.missions[5], (1, (2, 3)))
+		self.assertIsInstance(self.cache.missions[6], MappingProxyType)
+		self.assertEqual(self.cache.missions[6]["a"], (4,))
+		self.assertEqual(self.cache.level_scores, (0, 10, 30))
+		with self.assertRaises(TypeError):
+			self.cache.missions[7] = ()
+
+	def test_missing_table(self):
+		self.cache.refresh(self.db)
+		self.assertFalse(hasattr(self.cache, "factions"))
+
+	def test_same_version(self):
+		self.assertTrue(self.cache.refresh(self.db))
+		self.db.level_scores = [0, 20]
+		self.assertFalse(self.cache.refresh(self.db))
+		self.assertEqual(self.cache.level_scores, (0, 10, 30))
+
+	def test_new_version(self):
+		self.cache.refresh(self.db)
+		self.cache._loot_samplers["matrix"] = Mock()
+		self.db.static_version = 2
+		self.db.level_scores = [0, 20]
+		self.assertTrue(self.cache.refresh(self.db))
+		self.assertEqual(self.cache.version, 2)
+		self.assertEqual(self.cache.level_scores, (0, 20))
+		self.assertEqual(self.cache._loot_samplers, {})
+
+	def test_snapshot(self):
+		write_snapshot(self.path, 1, {"missions": {5: (7, [8])}})
+		self.cache.refresh(self.db)
+		self.assertEqual(self.cache.missions[5], (7, (8,)))
+		self.assertNotIn(6, self.cache.missions)
+		# tables that aren't in the snapshot are read from the DB
+		self.assertEqual(self.cache.level_scores, (0, 10, 30))
+		self.assertIs(self.cache.world_data, self.db.world_data)
+
+	def test_missing_snapshot(self):
+		self.cache.refresh(self.db)
+		self.assertEqual(self.cache.missions[5], (1, (2, 3)))
+
+	def test_stale_snapshot(self):
+		write_snapshot(self.path, 1, {"missions": {5: (7, [8])}})
+		self.db.static_version = 2
+		self.cache.refresh(self.db)
+		self.assertEqual(self.cache.missions[5], (1, (2, 3)))
+
+	def test_invalid_snapshot(self):
+		with open(self.path, "wb") as file:
+			file.write(bytes(64))
+		self.cache.refresh(self.db)
+		self.assertEqual(self.cache.missions[5], (1, (2, 3)))
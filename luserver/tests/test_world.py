@@ -6,6 +6,7 @@ import pyraknet.server
 from luserver.auth import Account
 from luserver.bitstream import WriteStream
 from luserver.game_object import Player
+from luserver.ids import IDCounter
 from luserver.messages import WorldServerMsg
 from luserver.tests.test_server import ServerTest
 
@@ -14,10 +15,13 @@ class WorldTest(ServerTest):
 
 	def set_up_db(self):
 		super().set_up_db()
+		self.conn.getTransferCounts.return_value = 0, 0
 		self.db.components_registry = {1: [(1, 1), (2, 0), (4, 0), (7, 4), (9, 0), (17, 0), (55, 0), (68, 0), (107, 0)], 2365: [(50, 0)], 1858: [(2, 1735), (3, 1046), (7, 811)]}
 		self.db.config = {"enabled_worlds": ()}
-		self.db.current_instance_id = 0
-		self.db.current_clone_id = 0
+		self.db.current_instance_id = IDCounter(0)
+		self.db.characters_by_name = {}
+		self.db.current_clone_id = IDCounter(0)
+		self.db.static_version = 0
 		self.db.destructible_component = {4: (1, (None, None, None), 4, 0, 0, 0), 811: (6, (None, None, None), 1, 0, 0, 1)}
 		self.db.inventory_component = {}
 		self.db.object_skills = {}
@@ -95,6 +99,11 @@ class NoAccountWorldTest(WorldTest):
 		get_objs = self.server.get_objects_in_group("test")
 		self.assertEqual(get_objs, objs)
 
+	def test_get_objs_by_lot(self):
+		objs = [self.server.spawn_object(1858), self.server.spawn_object(1858, {"groups": ("test",)})]
+		self.assertEqual(self.server.get_objects_by_lot(1858), objs)
+		self.assertEqual(self.server.get_objects_by_lot(12345), [])
+
 class ExistingAccountWorldTest(WorldTest):
 	CHAR_NAME = "char"
 
@@ -105,6 +114,7 @@ class ExistingAccountWorldTest(WorldTest):
 		self.db.accounts[self.USERNAME].selected_char_name = self.CHAR_NAME
 		self.player = self.db.accounts[self.USERNAME].characters[self.CHAR_NAME] = Player(123 | BITS_PERSISTENT)
 		self.player.name = self.CHAR_NAME
+		self.db.characters_by_name[self.CHAR_NAME] = self.player
 		self.player.char.account = self.db.accounts[self.USERNAME]
 
 class NoSessionWorldTest(ExistingAccountWorldTest):
@@ -125,6 +135,11 @@ class NoSessionWorldTest(ExistingAccountWorldTest):
 	def test_find_player_by_name(self):
 		self.assertIs(self.server.find_player_by_name(self.CHAR_NAME), self.db.accounts[self.USERNAME].characters[self.CHAR_NAME])
 
+	def test_missing_char_index(self):
+		del self.db.characters_by_name
+		with self.assertRaises(RuntimeError):
+			self.set_up_server()
+
 class SessionWorldTest(ExistingAccountWorldTest):
 	def setUp(self):
 		super().setUp()
@@ -68,13 +68,15 @@ class World(Enum):
 import __main__
 import asyncio
 import atexit
+import bisect
 import importlib.util
 import logging
 import os.path
+import time
 import urllib.request
 from contextlib import AbstractContextManager as ACM
 from ssl import SSLContext
-from typing import Any, Callable, cast, Dict, List, Optional, Tuple
+from typing import Any, Callable, cast, Container, Dict, List, Optional, Set, SupportsBytes, Tuple
 
 import BTrees
 import ZODB
@@ -84,10 +86,13 @@ from ZODB.Connection import Connection
 import pyraknet.server
 from bitstream import ReadStream
 from pyraknet.messages import Address
-from pyraknet.replicamanager import ReplicaManager
-from pyraknet.transports.abc import ConnectionEvent, ConnectionType, TransportEvent
+from pyraknet.transports.abc import ConnectionEvent, ConnectionType, Reliability, TransportEvent
 from .auth import Account
-from .commonserver import DisconnectReason, Server, WorldData
+from .commits import CommitConflict, CommitScheduler
+from .commonserver import DisconnectReason, Server, StaticCache, WorldData
+from .ids import IDLease
+from .ghosting import ReplicaManager
+from .outbox import Outbox
 from .game_object import CallbackID, Config, GameObject, ObjectID, Player, ScriptObject, SpawnerObject
 from .messages import MessageType, WorldServerMsg
 from .math.vector import Vector3
@@ -97,6 +102,8 @@ from .modules.chat import ChatHandling
 from .modules.general import GeneralHandling
 from .modules.mail import MailHandling
 from .modules.social import SocialHandling
+from .components.behaviors import behavior_compiler
+from .components.stats import FactionIndex
 
 log = logging.getLogger(__name__)
 
@@ -104,27 +111,148 @@ BITS_PERSISTENT = 1 << 60
 BITS_LOCAL = 1 << 46
 BITS_SPAWNED = 1 << 58 | BITS_LOCAL
 
+DEFAULT_TICK_RATE = 20
+DEFAULT_INTEREST_RADIUS = 0
+DEFAULT_COMMIT_MAX_DELAY = 1.0
+DEFAULT_COMMIT_MAX_PENDING = 100
+DEFAULT_CLONE_ID_LEASE_SIZE = 1000
+
 class MultiInstanceAccess(ACM):
 	"""
 	Context manager to safely modify objects that are modified by multiple instances.
 	Internally this means committing before and after, so that edits are immediately committed and the DB doesn't have conflicts.
+	If the commit after the section conflicts, its changes are aborted and CommitConflict is raised.
 	"""
 
 	def __enter__(self) -> None:
-		server.commit()
+		server.commit_pending()
 
 	def __exit__(self, exc_type, exc_value, traceback) -> None:
 		server.commit()
 
+class TickStats:
+	"""Duration and dirty object counts of the world tick, to be able to tune the tick rate under load."""
+
+	def __init__(self) -> None:
+		self.reset()
+
+	def reset(self) -> None:
+		self.ticks = 0
+		self.last_duration = 0.0
+		self.max_duration = 0.0
+		self.total_duration = 0.0
+		self.last_dirty = 0
+		self.max_dirty = 0
+		self.total_dirty = 0
+
+	def record(self, duration: float, dirty: int) -> None:
+		self.ticks += 1
+		self.last_duration = duration
+		self.max_duration = max(self.max_duration, duration)
+		self.total_duration += duration
+		self.last_dirty = dirty
+		self.max_dirty = max(self.max_dirty, dirty)
+		self.total_dirty += dirty
+
+	def __str__(self) -> str:
+		if self.ticks == 0:
+			return "No ticks recorded"
+		return "%i ticks, duration avg %.2f ms max %.2f ms, dirty objects avg %.1f max %i" % (self.ticks, self.total_duration/self.ticks*1000, self.max_duration*1000, self.total_dirty/self.ticks, self.max_dirty)
+
+class ObjectIndex:
+	"""Group, LOT and lowercase name lookups over a set of objects, maintained as objects are added and removed."""
+
+	def __init__(self) -> None:
+		self._groups: Dict[str, Dict[GameObject, None]] = {}
+		self._lots: Dict[int, Dict[GameObject, None]] = {}
+		# sorted by lowercase name, for prefix searches
+		self._names: List[Tuple[str, ObjectID]] = []
+		# groups, LOT, name key and the position in the order objects were added
+		self._entries: Dict[GameObject, Tuple[Tuple[str, ...], int, Tuple[str, ObjectID], int]] = {}
+		self._objects: Dict[ObjectID, GameObject] = {}
+		self._added = 0
+
+	def add(self, obj: GameObject) -> None:
+		if obj in self._entries:
+			self.remove(obj)
+		groups = tuple(obj.groups)
+		name_key = obj.name.lower(), obj.object_id
+		self._entries[obj] = groups, obj.lot, name_key, self._added
+		self._added += 1
+		for group in groups:
+			self._groups.setdefault(group, {})[obj] = None
+		self._lots.setdefault(obj.lot, {})[obj] = None
+		bisect.insort(self._names, name_key)
+		self._objects[obj.object_id] = obj
+
+	def changed(self, obj: GameObject) -> None:
+		"""Update the entries of the object after its name or groups changed."""
+		if obj not in self._entries:
+			return
+		old_groups, lot, old_name_key, order = self._entries[obj]
+		groups = tuple(obj.groups)
+		for group in old_groups:
+			if group not in groups:
+				self._remove_from(self._groups, group, obj)
+		for group in groups:
+			self._groups.setdefault(group, {})[obj] = None
+		name_key = obj.name.lower(), obj.object_id
+		if name_key != old_name_key:
+			del self._names[bisect.bisect_left(self._names, old_name_key)]
+			bisect.insort(self._names, name_key)
+		self._entries[obj] = groups, lot, name_key, order
+
+	def remove(self, obj: GameObject) -> None:
+		groups, lot, name_key, _ = self._entries.pop(obj)
+		for group in groups:
+			self._remove_from(self._groups, group, obj)
+		self._remove_from(self._lots, lot, obj)
+		del self._names[bisect.bisect_left(self._names, name_key)]
+		del self._objects[name_key[1]]
+
+	@staticmethod
+	def _remove_from(index: Dict[Any, Dict[GameObject, None]], key: Any, obj: GameObject) -> None:
+		objs = index[key]
+		del objs[obj]
+		if not objs:
+			del index[key]
+
+	def in_group(self, group: str) -> List[GameObject]:
+		return list(self._groups.get(group, ()))
+
+	def by_lot(self, lot: int) -> List[GameObject]:
+		return list(self._lots.get(lot, ()))
+
+	def by_name_prefix(self, prefix: str) -> List[GameObject]:
+		"""Objects whose name starts with prefix, case insensitive, in the order they were added."""
+		prefix = prefix.lower()
+		matches = []
+		for i in range(bisect.bisect_left(self._names, (prefix,)), len(self._names)):
+			name, object_id = self._names[i]
+			if not name.startswith(prefix):
+				break
+			matches.append(self._objects[object_id])
+		matches.sort(key=lambda obj: self._entries[obj][3])
+		return matches
+
 class WorldServer(Server):
 	_PEER_TYPE = MessageType.WorldServer.value
 
-	def __init__(self, address: Address, external_host: str, verify_address: str, world_id: Tuple[int, int], max_connections: int, db_conn: Connection, ssl: Optional[SSLContext]):
+	def __init__(self, address: Address, external_host: str, verify_address: str, world_id: Tuple[int, int], max_connections: int, db_conn: Connection, ssl: Optional[SSLContext], static_snapshot: Optional[str]=None):
 		excluded_packets = {"PositionUpdate", "GameMessage/DropClientLoot", "GameMessage/PickupItem", "GameMessage/ReadyForUpdates", "GameMessage/ScriptNetworkVarUpdate"}
 		super().__init__(address, max_connections, db_conn, ssl, excluded_packets)
-		self.replica_manager = ReplicaManager(self._dispatcher)
+		if not hasattr(self.db, "characters_by_name"):
+			raise RuntimeError("The database has no character name index, run the gen_char_index step of runtime/db/init.py once to create it")
+		self.static = StaticCache(static_snapshot)
+		self.static.refresh(self.db)
+		# session data of the players in the world, read when players are loaded from the DB
+		self.player_data: Dict[Player, Dict] = {}
+		self.commits = CommitScheduler(self._commit_transaction, self.db.config.get("commit_max_delay", DEFAULT_COMMIT_MAX_DELAY), self.db.config.get("commit_max_pending", DEFAULT_COMMIT_MAX_PENDING))
+		self.outbox = Outbox()
+		self.replica_manager = ReplicaManager(self._dispatcher, self.db.config.get("interest_radius", DEFAULT_INTEREST_RADIUS))
 		global _server
 		_server = self
+		behavior_compiler.compile_all()
 		self.external_host = external_host
 		self.verify_address = verify_address
 		self._dispatcher.add_listener(TransportEvent.NetworkInit, self._on_network_init)
@@ -137,20 +265,26 @@ class WorldServer(Server):
 		self.mail = MailHandling()
 		SocialHandling()
 
-		self.instance_id = self.db.current_instance_id
-		self.db.current_instance_id += 1
-		self.commit()
+		self.instance_id = IDLease(self.conn, self.commit_pending, "current_instance_id", 1).next()
+		self._clone_ids = IDLease(self.conn, self.commit_pending, "current_clone_id", self.db.config.get("clone_id_lease_size", DEFAULT_CLONE_ID_LEASE_SIZE))
 		self.current_object_id = 0
 		self.current_spawned_id = BITS_SPAWNED
 		self.world_data: WorldData = None
 		self.game_objects: Dict[ObjectID, GameObject] = {}
-		self.player_data: Dict[Player, Dict] = {}
+		self.spawned_index = ObjectIndex()
+		self.static_index = ObjectIndex()
+		self.faction_index = FactionIndex()
 		self.models = []
 		self.last_callback_id = CallbackID(0)
 		self.callback_handles: Dict[ObjectID, Dict[CallbackID, asyncio.Handle]] = {}
 		self.accounts: Dict[Connection, Account] = {}
+		self.dirty_objects: Set[GameObject] = set()
+		self.tick_rate = self.db.config.get("tick_rate", DEFAULT_TICK_RATE)
+		self.tick_stats = TickStats()
 		atexit.register(self.shutdown)
 		asyncio.get_event_loop().call_later(60, self._autosave)
+		self._next_tick = asyncio.get_event_loop().time()
+		self._tick()
 		self._dispatcher.add_listener(WorldServerMsg.SessionInfo, self._on_session_info)
 		self._load_plugins()
 		self.set_world_id(world_id)
@@ -164,9 +298,59 @@ class WorldServer(Server):
 			self.db.servers[self.world_id][conn_type] = external_address
 
 	def _autosave(self) -> None:
-		self.commit()
+		self._checkpoint_players()
+		self.request_commit()
+		if self.static.refresh(self.db):
+			behavior_compiler.compile_all()
 		asyncio.get_event_loop().call_later(60, self._autosave)
 
+	def _tick(self) -> None:
+		"""Serialize all objects that changed since the last tick in one pass, then schedule the next tick at a fixed rate."""
+		# schedule first, so that an error doesn't stop replication for the whole world
+		loop = asyncio.get_event_loop()
+		self._next_tick = max(self._next_tick + 1 / self.tick_rate, loop.time())
+		loop.call_at(self._next_tick, self._tick)
+
+		start = time.perf_counter()
+		dirty = self.dirty_objects
+		self.dirty_objects = set()
+		for obj in dirty:
+			try:
+				self.replica_manager.update(obj)
+			except Exception:
+				log.exception("Error updating the interest of %s", obj)
+		try:
+			self.replica_manager.update_viewpoints()
+		except Exception:
+			log.exception("Error updating viewpoints")
+		for obj in dirty:
+			if not obj._serialize_scheduled:
+				# already serialized when it was constructed for a new viewer during the interest update
+				continue
+			try:
+				obj._do_serialize()
+			except Exception:
+				log.exception("Error serializing %s", obj)
+				obj._serialize_scheduled = False
+		self.tick_stats.record(time.perf_counter() - start, len(dirty))
+
+	def broadcast(self, data: SupportsBytes, reliability: Reliability=Reliability.ReliableOrdered, exclude: Container[Connection]=(), near: GameObject=None) -> None:
+		"""
+		Send to all connections in this world through the outbox.
+		If near is specified, only send to connections that have the object constructed.
+		"""
+		if near is not None and self.replica_manager.is_scoped(near):
+			recipients = self.replica_manager.recipients(near)
+		else:
+			recipients = list(self.accounts)
+		if exclude:
+			recipients = [conn for conn in recipients if conn not in exclude]
+		self.outbox.send(data, recipients, reliability)
+
+	def send(self, data: SupportsBytes, conn: Connection, reliability: Reliability=Reliability.ReliableOrdered) -> None:
+		"""Send to one connection through the outbox, so that it's counted with broadcasts and replica packets."""
+		self.outbox.send(data, (conn,), reliability)
+
 	def _check_shutdown(self) -> None:
 		# shut down instances with no players every 60 minutes
 		if not self.accounts:
@@ -174,8 +358,14 @@ class WorldServer(Server):
 		else:
 			asyncio.get_event_loop().call_later(60 * 60, self._check_shutdown)
 
+	def _checkpoint_players(self) -> None:
+		for player in self.player_data:
+			player.checkpoint()
+
 	def shutdown(self) -> None:
-		self.commit()
+		self._checkpoint_players()
+		self.commit_pending()
+		self._clone_ids.release()
 		for address in self.accounts.copy():
 			self.close_connection(address, DisconnectReason.ServerShutdown)
 		if self.world_id in self.db.servers:
@@ -191,17 +381,19 @@ class WorldServer(Server):
 			self.conn.transaction_manager.commit()
 		else:
 			asyncio.get_event_loop().call_later(60 * 60, self._check_shutdown)
-			custom_script, world_control_lot = self.db.world_info[self.world_id[0]]
+			custom_script, world_control_lot = self.static.world_info[self.world_id[0]]
 			if world_control_lot is None:
 				world_control_lot = 2365
 			self.world_control_object = cast(ScriptObject, self.spawn_object(world_control_lot, set_vars={"custom_script": custom_script}, is_world_control=True))
 
 			self.spawners: Dict[str, SpawnerObject] = {}
-			wd = self.db.world_data[self.world_id[0]]
+			wd = self.static.world_data[self.world_id[0]]
 			objs: Dict[ObjectID, GameObject] = {}
 			for id, data in wd.objects.items():
 				objs[id] = GameObject(*data)
 			self.world_data = WorldData(objs, wd.paths, wd.spawnpoint)
+			for obj in objs.values():
+				self.static_index.add(obj)
 			for obj in self.world_data.objects.values():
 				obj.handle("startup", silent=True)
 			if self.world_id[2] != 0:
@@ -245,12 +437,14 @@ class WorldServer(Server):
 			player = self.accounts[conn].selected_char()
 			if player in self.replica_manager._network_ids: # might already be destructed if "switch character" is selected:
 				self.replica_manager.destruct(player)
+			player.checkpoint()
 		#self.accounts[conn].address = None
 		del self.accounts[conn]
-		self.commit()
+		self.request_commit()
 
 	def _on_session_info(self, session_info: ReadStream, conn: Connection) -> None:
-		self.commit()
+		# sync aborts the current transaction, so pending changes need to be committed first
+		self.commit_pending()
 		self.conn.sync()
 		username = session_info.read(str, allocated_length=33)
 		session_key = session_info.read(str, allocated_length=33)
@@ -281,12 +475,29 @@ class WorldServer(Server):
 		return (self.instance_id << 16) | self.current_object_id | BITS_PERSISTENT
 
 	def new_clone_id(self) -> ObjectID:
-		current = self.db.current_clone_id
-		self.db.current_clone_id += 1
-		self.commit()
-		return current
+		return self._clone_ids.next()
 
 	def commit(self) -> None:
+		"""
+		Commit immediately, together with any pending commit requests. Use this when other instances need to see the changes right away.
+		Raises CommitConflict if the transaction was aborted because of a conflict.
+		"""
+		self.commits.flush()
+
+	def commit_pending(self) -> None:
+		"""Commit pending changes before something that aborts or retries the transaction. A conflict is logged, but doesn't stop the caller."""
+		try:
+			self.commits.flush()
+		except CommitConflict:
+			pass
+
+	def request_commit(self) -> None:
+		"""Commit soon, batched together with other requests. Use this for changes that only need to be saved eventually."""
+		self.commits.request()
+
+	def _commit_transaction(self) -> int:
+		# reset the counts, so that only the objects stored by this commit are counted
+		self.conn.getTransferCounts(clear=True)
 		# failsafe on conflict error: abort transaction
 		try:
 			self.conn.transaction_manager.commit()
@@ -311,6 +522,8 @@ class WorldServer(Server):
 				log.error("new %s", new)
 
 			self.conn.transaction_manager.abort()
+			raise CommitConflict(self.conn.getTransferCounts()[1])
+		return self.conn.getTransferCounts()[1]
 
 	def spawn_object(self, lot: int, set_vars: Config=None, is_world_control: bool=False) -> GameObject:
 		if set_vars is None:
@@ -321,7 +534,7 @@ class WorldServer(Server):
 		else:
 			object_id = self.new_spawned_id()
 		obj = GameObject(lot, object_id, set_vars)
-		self.game_objects[obj.object_id] = obj
+		self.add_game_object(obj)
 		self.replica_manager.construct(obj)
 		obj.handle("startup", silent=True)
 		self.handle(Event.Spawn, obj)
@@ -337,20 +550,25 @@ class WorldServer(Server):
 		log.warning("Object %i not found", object_id)
 		raise KeyError(object_id)
 
+	def add_game_object(self, obj: GameObject) -> None:
+		"""Add a spawned object to game_objects and the lookup indexes."""
+		self.game_objects[obj.object_id] = obj
+		self.spawned_index.add(obj)
+		self.faction_index.add(obj)
+
+	def remove_game_object(self, obj: GameObject) -> None:
+		"""Remove a spawned object from game_objects and the lookup indexes."""
+		del self.game_objects[obj.object_id]
+		self.spawned_index.remove(obj)
+		self.faction_index.remove(obj)
+
 	def get_objects_in_group(self, group: str) -> List[GameObject]:
-		matches = []
-		for obj in self.game_objects.values():
-			if group in obj.groups:
-				matches.append(obj)
-		if self.world_id[0] != 0:
-			for obj in self.world_data.objects.values():
-				if group in obj.groups:
-					matches.append(obj)
-		return matches
+		"""Spawned objects in the group, followed by static objects in the group."""
+		return self.spawned_index.in_group(group) + self.static_index.in_group(group)
+
+	def get_objects_by_lot(self, lot: int) -> List[GameObject]:
+		"""Spawned objects with the LOT, followed by static objects with the LOT."""
+		return self.spawned_index.by_lot(lot) + self.static_index.by_lot(lot)
 
 	def find_player_by_name(self, name: str) -> Player:
-		for acc in self.db.accounts.values():
-			for char in acc.characters.values():
-				if char.name == name:
-					return char
-		raise KeyError
+		return self.db.characters_by_name[name]
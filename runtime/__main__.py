@@ -45,6 +45,7 @@ logging.getLogger("txn").setLevel(logging.WARNING)
 logging.getLogger("luserver.components.skill").setLevel(logging.INFO)
 
 log = logging.getLogger(__file__)
+static_snapshot = os.path.normpath(os.path.join(__file__, "..", "db", "static.snapshot"))
 
 while True:
 	try:
@@ -65,7 +66,7 @@ else:
 	context = None
 
 if len(sys.argv) == 1:
-	WorldServer((config["connection"]["internal_host"], 9999), config["connection"]["external_host"], config["auth"]["verify_address"], world_id=(0, 0), max_connections=8, db_conn=conn, ssl=context)
+	WorldServer((config["connection"]["internal_host"], 9999), config["connection"]["external_host"], config["auth"]["verify_address"], world_id=(0, 0), max_connections=8, db_conn=conn, ssl=context, static_snapshot=static_snapshot)
 else:
 	world_id = int(sys.argv[1]), int(sys.argv[2])
 	if len(sys.argv) == 4:
@@ -85,7 +86,7 @@ else:
 				sys.exit()
 		else:
 			port = 0
-	WorldServer((config["connection"]["internal_host"], port), config["connection"]["external_host"], config["auth"]["verify_address"], world_id, max_connections=8, db_conn=conn, ssl=context)
+	WorldServer((config["connection"]["internal_host"], port), config["connection"]["external_host"], config["auth"]["verify_address"], world_id, max_connections=8, db_conn=conn, ssl=context, static_snapshot=static_snapshot)
 
 loop = asyncio.get_event_loop()
 loop.run_forever()
@@ -10,16 +10,19 @@ import ZEO
 from persistent.mapping import PersistentMapping
 
 from luserver.auth import Account, GMLevel
+from luserver.commonserver import StaticDB, WorldData
+from luserver.ids import IDCounter
+from luserver.snapshot import write_snapshot
 from luserver.world import World
 from luserver.components.inventory import ItemType
-from luserver.components.mission import TaskType
+from luserver.components.mission import MissionState, TaskType
 
 import init_skills
 import luz_importer
 import scripts
 
 class Init:
-	def __init__(self, gen_accounts, gen_config, gen_skills, gen_missions, gen_comps, gen_world):
+	def __init__(self, gen_accounts, gen_char_index, migrate_achievements, gen_config, gen_skills, gen_missions, gen_comps, gen_world):
 		config_dir = os.path.normpath(os.path.join(__file__, ".."))
 		with open(os.path.join(config_dir, "db.toml"), encoding="utf8") as file:
 			self.config = toml.load(file)
@@ -43,6 +46,10 @@ class Init:
 
 		if gen_accounts:
 			self.gen_accounts()
+		if gen_char_index:
+			self.gen_char_index()
+		if migrate_achievements:
+			self.migrate_achievements()
 		if gen_config:
 			self.gen_config()
 		if gen_skills:
@@ -53,13 +60,16 @@ class Init:
 			self.gen_comps()
 		if gen_world:
 			luz_importer.import_data(self.root, os.path.join(self.config["paths"]["client_path"], "res", "maps"))
+		# running servers rebuild their static table cache when this changes
+		self.root.static_version = getattr(self.root, "static_version", 0) + 1
 
 		transaction.commit()
+		self.gen_snapshot(os.path.join(config_dir, "static.snapshot"))
 		print("Done initializing database!")
 
 	def gen_accounts(self):
-		self.root.current_instance_id = 0
-		self.root.current_clone_id = 1
+		self.root.current_instance_id = IDCounter(0)
+		self.root.current_clone_id = IDCounter(1)
 		self.root.accounts = BTrees.OOBTree.BTree()
 		admin_username = input("Enter admin username: ")
 		while True:
@@ -99,6 +109,38 @@ class Init:
 		for world_id, script_id, template in self.cdclient.execute("select zoneID, scriptID, zoneControlTemplate from ZoneTable"):
 			self.root.world_info[world_id] = scripts.SCRIPTS.get(script_id), template
 
+	def gen_snapshot(self, path):
+		# memory-mapped by the instances, see luserver/snapshot.py
+		tables = {}
+		for name in StaticDB.__annotations__:
+			if hasattr(self.root, name):
+				tables[name] = getattr(self.root, name)
+		if hasattr(self.root, "world_data"):
+			tables["world_data"] = {world_id: WorldData(dict(wd.objects.items()), dict(wd.paths.items()), wd.spawnpoint) for world_id, wd in self.root.world_data.items()}
+		write_snapshot(path, self.root.static_version, tables)
+
+	def gen_char_index(self):
+		# also migrates databases created before the index existed
+		self.root.characters_by_name = BTrees.OOBTree.BTree()
+		for account in self.root.accounts.values():
+			for char in account.characters.values():
+				if char.name in self.root.characters_by_name:
+					print("Duplicate character name %s, only the first character is indexed" % char.name)
+					continue
+				self.root.characters_by_name[char.name] = char
+
+	def migrate_achievements(self):
+		# characters created before achievements were stored lazily have a progress record for every achievement
+		removed = 0
+		for account in self.root.accounts.values():
+			for char in account.characters.values():
+				missions = char.char.mission.missions
+				for mission_id, mission in list(missions.items()):
+					if mission.state == MissionState.Active and not mission.is_mission and all(task.value == 0 for task in mission.tasks):
+						del missions[mission_id]
+						removed += 1
+		print("Removed %i achievement progress records without progress" % removed)
+
 	def gen_config(self):
 		self.root.config = PersistentMapping()
 		self.root.config["credits"] = "Created by lcdr"
@@ -356,9 +398,11 @@ class Init:
 if __name__ == "__main__":
 	# temporarily using int instead of bool for faster editing
 	GENERATE_ACCOUNTS = 1
+	GENERATE_CHARACTER_INDEX = 1
+	MIGRATE_ACHIEVEMENTS = 1
 	GENERATE_CONFIG = 1
 	GENERATE_SKILLS = 1
 	GENERATE_MISSIONS = 1
 	GENERATE_COMPS = 1
 	GENERATE_WORLD_DATA = 1
-	Init(GENERATE_ACCOUNTS, GENERATE_CONFIG, GENERATE_SKILLS, GENERATE_MISSIONS, GENERATE_COMPS, GENERATE_WORLD_DATA)
+	Init(GENERATE_ACCOUNTS, GENERATE_CHARACTER_INDEX, MIGRATE_ACHIEVEMENTS, GENERATE_CONFIG, GENERATE_SKILLS, GENERATE_MISSIONS, GENERATE_COMPS, GENERATE_WORLD_DATA)
@@ -1,6 +1,7 @@
 import logging
 
 from luserver.world import server
+from luserver.components.behaviors import behavior_compiler
 from luserver.interfaces.plugin import ChatCommand
 
 class Filelog(ChatCommand):
@@ -53,3 +54,16 @@ class NoConsoleLog(ChatCommand):
 			packets.remove(args.packetname)
 		elif args.action == "show":
 			server.chat.sys_msg_sender(packets)
+
+class TraceSkill(ChatCommand):
+	def __init__(self):
+		super().__init__("traceskill", description="Toggle debug logging of every behavior when a skill is cast. Needs the luserver.components.skill logger at debug level.")
+		self.command.add_argument("skill_id", type=int)
+
+	def run(self, args, sender):
+		if args.skill_id in behavior_compiler.traced_skills:
+			behavior_compiler.traced_skills.remove(args.skill_id)
+			server.chat.sys_msg_sender("Skill %i is no longer traced." % args.skill_id)
+		else:
+			behavior_compiler.traced_skills.add(args.skill_id)
+			server.chat.sys_msg_sender("Skill %i is traced." % args.skill_id)
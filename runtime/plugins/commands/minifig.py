@@ -91,7 +91,7 @@ class LCDR(_MinifigCommand):
 		super().__init__("lcdr")
 
 	def sub_run(self, args, sender):
-		sender.name = "lcdr"
+		server.char.rename(sender, "lcdr")
 		sender.char.hair_color = 10
 		sender.char.hair_style = 7
 		sender.char.eyebrow_style = 22
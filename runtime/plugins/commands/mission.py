@@ -1,7 +1,7 @@
 import asyncio
 
 from luserver.world import server
-from luserver.components.mission import MissionProgress, MissionState
+from luserver.components.mission import MissionState
 from luserver.interfaces.plugin import ChatCommand
 
 class AddMission(ChatCommand):
@@ -37,7 +37,7 @@ class CompleteMission(ChatCommand):
 
 	def find_prereqs(self, mission_id):
 		missions = set()
-		prereqs = server.db.missions[mission_id][1]
+		prereqs = server.static.missions[mission_id][1]
 		for prereq_ors in prereqs:
 			for prereq_mission in prereq_ors:
 				if isinstance(prereq_mission, tuple): # prereq requires special mission state
@@ -49,7 +49,7 @@ class CompleteMission(ChatCommand):
 		return missions
 
 	def async_complete_mission(self, mission_id, fully, sender):
-		if mission_id not in sender.char.mission.missions:
+		if sender.char.mission.get_progress(mission_id) is None:
 			sender.char.mission.add_mission(mission_id)
 
 		if fully:
@@ -75,7 +75,7 @@ class RemoveMission(ChatCommand):
 
 	def run(self, args, sender):
 		if args.id in sender.char.mission.missions:
-			del sender.char.mission.missions[args.id]
+			sender.char.mission.remove_mission(args.id)
 			server.chat.sys_msg_sender("Mission removed")
 		else:
 			server.chat.sys_msg_sender("Mission not found")
@@ -85,12 +85,8 @@ class ResetMissions(ChatCommand):
 		super().__init__("resetmissions")
 
 	def run(self, args, sender):
-		sender.char.mission.missions.clear()
-		# add achievements
-		for mission_id, data in server.db.missions.items():
-			is_mission = data[3] # if False, it's an achievement (internally works the same as missions, that's why the naming is weird)
-			if not is_mission:
-				sender.char.mission.missions[mission_id] = MissionProgress(mission_id, data)
+		# achievements without progress aren't stored, so this resets them too
+		sender.char.mission.reset_missions()
 
 MISSIONS = {
 	"VE": [1727, 173, 660, 1896, 308, 1732],
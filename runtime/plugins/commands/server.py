@@ -53,10 +53,14 @@ class CheckForLeaks(ChatCommand):
 
 class Commit(ChatCommand):
 	def __init__(self):
-		super().__init__("commit")
+		super().__init__("commit", description="Commit now and show commit statistics")
+		self.command.add_argument("--reset", action="store_true", help="Reset the statistics")
 
 	def run(self, args, sender):
 		server.commit()
+		server.chat.sys_msg_sender(server.commits.stats)
+		if args.reset:
+			server.commits.stats.reset()
 
 class CreateAccount(ChatCommand):
 	def __init__(self):
@@ -186,7 +190,7 @@ class Restart(ChatCommand):
 				redirect.write(server_address[0].encode("latin1"), allocated_length=33)
 				redirect.write(c_ushort(server_address[1]))
 				redirect.write(c_bool(args.show_message))
-				conn.send(redirect)
+				server.send(redirect, conn)
 		await asyncio.sleep(5)
 		server.shutdown()
 
@@ -205,7 +209,7 @@ class Send(ChatCommand):
 				data = content.read()
 				#if data[:4] == b"\x53\x05\x00\x0c":
 				#	data = data[:8] + bytes(c_int64(sender.object_id)) + data[16:]
-				sender.char.data()["conn"].send(data)
+				server.send(data, sender.char.data()["conn"])
 
 class SetGMLevel(ChatCommand):
 	def __init__(self):
@@ -233,6 +237,23 @@ class Shutdown(ChatCommand):
 	def run(self, args, sender):
 		server.shutdown()
 
+class Tick(ChatCommand):
+	def __init__(self):
+		super().__init__("tick", description="Show world tick and outbox statistics")
+		self.command.add_argument("--rate", type=int, help="Set the tick rate in Hz for this instance")
+		self.command.add_argument("--reset", action="store_true", help="Reset the statistics")
+
+	def run(self, args, sender):
+		if args.rate is not None:
+			if args.rate <= 0:
+				raise RuntimeError("Tick rate must be positive")
+			server.tick_rate = args.rate
+		server.chat.sys_msg_sender("Tick rate %i Hz: %s" % (server.tick_rate, server.tick_stats))
+		server.chat.sys_msg_sender("Outbox: %s" % server.outbox)
+		if args.reset:
+			server.tick_stats.reset()
+			server.outbox.reset_stats()
+
 class Unban(ChatCommand):
 	def __init__(self):
 		super().__init__("unban")